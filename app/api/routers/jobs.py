@@ -1,10 +1,20 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.config import get_settings, Settings
 from app.schemas.jobs import CreateJobRequest, Job
-from app.services import JobsService
+from app.services.gateway import SchedulerGateway
+from app.utils.enums.jobs import JobStatus
+from app.utils.helpers import (
+    is_ndjson_accepted,
+    json_response,
+    NDJSON_MEDIA_TYPE,
+    stream_ndjson,
+)
 
 settings: Settings = get_settings()
 router = APIRouter(
@@ -17,10 +27,37 @@ router = APIRouter(
     "",
     status_code=status.HTTP_200_OK,
     response_model=list[Job],
+    responses={status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}}},
 )
-async def get_all_jobs() -> list[Job]:
-    all_jobs = await JobsService.get_all_jobs()
-    return [Job.from_obj(job) for job in all_jobs]
+async def get_all_jobs(
+    request: Request,
+    job_status: Optional[JobStatus] = Query(None, alias="status"),
+    node_id: Optional[UUID] = None,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE),
+    stream: bool = False,
+) -> Response:
+    async def get_page(cursor: Optional[int], limit: Optional[int], ndjson: bool = False):
+        return await SchedulerGateway.get_jobs(
+            status=job_status,
+            node_id=node_id,
+            window_start=window_start,
+            window_end=window_end,
+            cursor=cursor,
+            limit=limit,
+            ndjson=ndjson,
+        )
+
+    if stream or is_ndjson_accepted(request):
+        return StreamingResponse(
+            stream_ndjson(lambda cursor, limit: get_page(cursor, limit, ndjson=True), cursor, limit),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    content, next_cursor = await get_page(cursor, limit)
+    return json_response(content, next_cursor=next_cursor)
 
 
 @router.post(
@@ -28,9 +65,9 @@ async def get_all_jobs() -> list[Job]:
     status_code=status.HTTP_201_CREATED,
     response_model=list[Job],
 )
-async def submit_jobs(jobs: list[CreateJobRequest]) -> list[Job]:
-    job_entities = await JobsService.submit_jobs(jobs)
-    return [Job.from_obj(job) for job in job_entities]
+async def submit_jobs(jobs: list[CreateJobRequest]) -> Response:
+    content, _ = await SchedulerGateway.submit_jobs(jobs)
+    return json_response(content, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete(
@@ -38,4 +75,4 @@ async def submit_jobs(jobs: list[CreateJobRequest]) -> list[Job]:
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def terminate_job(job_id: UUID) -> None:
-    await JobsService.terminate_job(job_id)
+    await SchedulerGateway.terminate_job(job_id)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Response, status
+
+from app.services.gateway import SchedulerGateway
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_200_OK: {"content": {PROMETHEUS_MEDIA_TYPE: {}}}},
+)
+async def get_metrics() -> Response:
+    """
+    The scheduler metrics in the Prometheus text format (of the scheduler process in the multi-worker mode).
+    """
+    content, _ = await SchedulerGateway.get_metrics()
+    return Response(content, media_type=PROMETHEUS_MEDIA_TYPE)
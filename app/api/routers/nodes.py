@@ -1,10 +1,20 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.config import get_settings, Settings
-from app.schemas.nodes import CreateNodeRequest, Node
-from app.services import NodesService
+from app.schemas.jobs import Job
+from app.schemas.nodes import CreateNodeRequest, DrainNodesRequest, Node
+from app.services.gateway import SchedulerGateway
+from app.utils.enums.nodes import EmbeddedJobs
+from app.utils.helpers import (
+    is_ndjson_accepted,
+    json_response,
+    NDJSON_MEDIA_TYPE,
+    stream_ndjson,
+)
 
 settings: Settings = get_settings()
 router = APIRouter(
@@ -17,10 +27,27 @@ router = APIRouter(
     "",
     status_code=status.HTTP_200_OK,
     response_model=list[Node],
+    responses={status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}}},
 )
-async def get_all_nodes() -> list[Node]:
-    all_nodes = await NodesService.get_all_nodes()
-    return [Node.from_obj(node) for node in all_nodes]
+async def get_all_nodes(
+    request: Request,
+    jobs: EmbeddedJobs = EmbeddedJobs.FULL,
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE),
+    stream: bool = False,
+) -> Response:
+    if stream or is_ndjson_accepted(request):
+        return StreamingResponse(
+            stream_ndjson(
+                lambda cursor, limit: SchedulerGateway.get_nodes(jobs, cursor=cursor, limit=limit, ndjson=True),
+                cursor,
+                limit,
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    content, next_cursor = await SchedulerGateway.get_nodes(jobs, cursor=cursor, limit=limit)
+    return json_response(content, next_cursor=next_cursor)
 
 
 @router.post(
@@ -28,9 +55,9 @@ async def get_all_nodes() -> list[Node]:
     status_code=status.HTTP_201_CREATED,
     response_model=list[Node],
 )
-async def provision_new_nodes(nodes: list[CreateNodeRequest]) -> list[Node]:
-    node_entities = await NodesService.provision_nodes(nodes)
-    return [Node.from_obj(node) for node in node_entities]
+async def provision_new_nodes(nodes: list[CreateNodeRequest]) -> Response:
+    content, _ = await SchedulerGateway.provision_nodes(nodes)
+    return json_response(content, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete(
@@ -38,4 +65,26 @@ async def provision_new_nodes(nodes: list[CreateNodeRequest]) -> list[Node]:
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def remove_node(node_id: UUID) -> None:
-    await NodesService.remove_node(node_id)
+    await SchedulerGateway.remove_node(node_id)
+
+
+@router.post(
+    "/drain",
+    status_code=status.HTTP_200_OK,
+    response_model=list[Job],
+)
+async def drain_nodes(request: DrainNodesRequest) -> Response:
+    """
+    Move the jobs off the nodes at once and remove or cordon the nodes (all of them or none).
+    Returns the moved jobs where they are placed (or would be placed, for the dry run).
+    """
+    content, _ = await SchedulerGateway.drain_nodes(request.node_ids, request.action, request.dry_run)
+    return json_response(content)
+
+
+@router.post(
+    "/uncordon",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def uncordon_nodes(node_ids: list[UUID]) -> None:
+    await SchedulerGateway.uncordon_nodes(node_ids)
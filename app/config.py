@@ -2,6 +2,9 @@ from functools import lru_cache
 
 from pydantic_settings import BaseSettings
 
+from app.utils.enums.scheduler import PlacementStrategy
+from app.utils.enums.storage import StorageBackend
+
 
 class Settings(BaseSettings):
     """
@@ -28,6 +31,7 @@ class Settings(BaseSettings):
         "/status",
         "/error",
         "/openapi.json",
+        "/metrics",
     }
 
     # Elastic APM configuration
@@ -40,6 +44,37 @@ class Settings(BaseSettings):
 
     DISABLE_RESOURCES_CHECKS: bool = False
 
+    # Listing configuration
+    MAX_PAGE_SIZE: int = 10000
+    NEXT_CURSOR_HEADER: str = "X-Next-Cursor"  # the cursor of the next page of a paginated listing
+    STREAM_CHUNK_SIZE: int = 1000  # items per chunk of a streamed (NDJSON) listing
+
+    # Storage configuration
+    STORAGE_BACKEND: StorageBackend = StorageBackend.MEMORY
+    DATABASE_POOL_SIZE: int = 5  # connections kept open (not applicable to SQLite)
+    DATABASE_MAX_OVERFLOW: int = 10  # connections opened on top of the pool under load
+    WAL_DIRECTORY: str = "data/wal"  # the write-ahead log segments and the snapshots of the state
+    WAL_FSYNC: bool = True  # every record is flushed to the disk, otherwise a crash of the host may lose the latest
+    WAL_SNAPSHOT_INTERVAL: float = 300.0  # seconds between the snapshots replacing the log, 0 disables them
+
+    # Multi-worker configuration
+    SCHEDULER_SOCKET: str = ""  # unix socket of the scheduler process owning the state, empty to own it in-process
+
+    # Jobs placement configuration
+    PLACEMENT_STRATEGY: PlacementStrategy = PlacementStrategy.EARLIEST_START
+    PLACEMENT_SCORE_CANDIDATES: int = 16  # number of the nodes scored by the 'weighted_score' strategy
+    PLACEMENT_SCORE_WAIT_WEIGHT: float = 1.0  # per second of waiting for the node to become available
+    PLACEMENT_SCORE_VCPU_WEIGHT: float = 1.0  # per share of the node vCPU left unused
+    PLACEMENT_SCORE_MEMORY_WEIGHT: float = 1.0  # per share of the node memory left unused
+    SCHEDULER_SHARDS: int = 1  # partitions of the nodes (by their ids), a job is placed within a single one
+    SCHEDULER_BACKFILL: bool = False  # terminations leave idle gaps behind, the jobs which fit are put into them
+
+    # Finished jobs retention configuration
+    JOBS_RETENTION_TTL: int = 600  # seconds the finished jobs are kept in the hot state
+    JOBS_RETENTION_MAX_COUNT: int = 10000  # finished jobs kept in the hot state at most
+    JOBS_ARCHIVE_MAX_SIZE: int = 1000000  # archived jobs kept at most, the oldest ones are dropped
+    JOBS_COMPACTION_INTERVAL: float = 30.0  # seconds between the compactions, 0 disables the background compactor
+
     class Config:
         """
         Tell BaseSettings the env file path
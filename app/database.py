@@ -1,10 +1,17 @@
+import asyncio
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID
 
 from app.config import get_settings
 from app.utils.enums.jobs import JobStatus
+from app.utils.events_queue import JobEventsQueue
+from app.utils.gaps_index import GapsIndex
+from app.utils.jobs_archive import JobsArchive
+from app.utils.jobs_index import JobsIndex
+from app.utils.nodes_index import ShardedNodesIndex
 
 settings = get_settings()
 
@@ -12,7 +19,7 @@ settings = get_settings()
 # =====================================
 #            Models (kind of)
 # =====================================
-@dataclass
+@dataclass(slots=True)
 class JobModel:
     id: UUID
     total_run_time: int  # milliseconds
@@ -20,12 +27,13 @@ class JobModel:
     memory: int  # MB
     node_id: Optional[UUID] = None  # node the job is scheduled on
     node_thread_id: Optional[int] = None
+    # the time window lags behind the shifts of the node thread until the job is read via 'JobsScheduler.get_job'
     expected_to_start_at: Optional[datetime] = None
     expected_to_finish_at: Optional[datetime] = None
     status: JobStatus = JobStatus.SCHEDULED
 
 
-@dataclass
+@dataclass(slots=True)
 class NodeModel:
     id: UUID
     max_concurrent_jobs: int
@@ -40,9 +48,9 @@ class NodeModel:
     #
     #  metadata={
     #    "threads": [                       - pool of threads
-    #       [],                             - thread #1
-    #       [],                             - thread #2
-    #       [],                             - thread #3
+    #       ThreadTimeline(),               - thread #1 (ids of its jobs in order of execution)
+    #       ThreadTimeline(),               - thread #2
+    #       ThreadTimeline(),               - thread #3
     #    ],
     #    "total_active_jobs": int,          - all jobs with the 'SCHEDULED' and 'RUNNING' statuses
     #    "free_threads": int,               - number of free threads (no jobs or already finished/terminated ones)
@@ -50,6 +58,8 @@ class NodeModel:
     #       "thread_id": int                - id of the thread
     #       "available_at": datetime        - time when the thread is going to be free
     #    },
+    #    "resources": ResourcesProfile,     - vCPU/memory usage timeline of all the node jobs
+    #    "cordoned": bool,                  - no new jobs go to the node (see 'JobsScheduler.drain_nodes')
     #  }
     metadata: dict
 
@@ -57,5 +67,24 @@ class NodeModel:
 # =====================================
 # The imitation of the database storage
 # =====================================
-StateType = dict[str, dict[UUID, NodeModel | JobModel]]
-state: StateType = {"nodes": {}, "jobs": {}}
+StateType = dict[str, Any]
+
+
+def init_state() -> StateType:
+    return {
+        "nodes": {},  # dict[UUID, NodeModel]
+        "jobs": {},  # dict[UUID, JobModel]
+        "events": JobEventsQueue(),  # upcoming start/finish instants of the scheduled jobs
+        "nodes_index": ShardedNodesIndex(settings.SCHEDULER_SHARDS),  # nodes by the time they can take a new job
+        "jobs_index": JobsIndex(),  # jobs by status in order of submission
+        "gaps": GapsIndex(),  # idle intervals of the threads left by the terminated jobs (backfill mode only)
+        "undo_log": None,  # UndoLog of the transaction in progress
+        "fresh_at": None,  # the time the state is up to date as of within the request in progress
+        "write_lock": asyncio.Lock(),  # serializes the modifying operations which await (see 'JobsScheduler')
+        "finished_jobs": deque(),  # (finished_at, job_id) of the finished jobs still in "jobs", oldest first
+        "changes": None,  # ChangeSet of the entities to be written to the SQL database (SQL storage backend only)
+        "archive": JobsArchive(settings.JOBS_ARCHIVE_MAX_SIZE),  # finished jobs moved out of "jobs"
+    }
+
+
+state: StateType = init_state()
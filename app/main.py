@@ -1,4 +1,5 @@
-from typing import Any, Callable, Literal
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Literal
 
 import secure
 from elasticapm.contrib.starlette import ElasticAPM, make_apm_client
@@ -7,17 +8,32 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from app.api.routers import jobs, nodes
+from app.api.routers import jobs, metrics, nodes
 from app.config import get_settings, Settings
 from app.logger import get_logger
+from app.scheduler_server import own_state
+from app.services.gateway import get_rpc_client
 from app.utils.helpers import custom_generate_unique_id
 
 settings: Settings = get_settings()
 logger = get_logger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.SCHEDULER_SOCKET:
+        # a worker: the state is owned by the scheduler process
+        yield
+        await get_rpc_client().close()
+        return
+
+    async with own_state():
+        yield
+
+
 app = FastAPI(
     root_path=settings.root_path,
+    lifespan=lifespan,
     generate_unique_id_function=custom_generate_unique_id,
     docs_url=None if settings.ENV == "prod" else "/docs",
     redoc_url=None if settings.ENV == "prod" else "/redoc",
@@ -48,6 +64,7 @@ apm = make_apm_client(
         "DEBUG": settings.ELASTIC_APM_DEBUG,
         "TRANSACTIONS_IGNORE_PATTERNS": [
             "/status",
+            "/metrics",
         ],
         "CAPTURE_BODY": settings.ELASTIC_APM_CAPTURE_BODY,
     }
@@ -104,6 +121,7 @@ async def get_error() -> None:
 
 app.include_router(nodes.router)
 app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 
 if __name__ == "__main__":
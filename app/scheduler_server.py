@@ -0,0 +1,105 @@
+"""
+The scheduler process: the single owner of the state in the multi-worker deployment.
+
+The API workers (any number of them, see 'SCHEDULER_SOCKET') forward the operations to this process
+over the unix socket, so they all share one authoritative cluster view:
+
+    SCHEDULER_SOCKET=/tmp/scheduler.sock python -m app.scheduler_server
+    SCHEDULER_SOCKET=/tmp/scheduler.sock uvicorn app.main:app --workers 4
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
+from pydantic import validate_call
+
+from app.config import get_settings, Settings
+from app.logger import get_logger
+from app.services import JobsService, NodesService
+from app.services.gateway import BaseSchedulerGateway, LocalSchedulerGateway
+from app.utils.enums.storage import StorageBackend
+from app.utils.rpc import serve
+
+settings: Settings = get_settings()
+logger = get_logger(__name__)
+
+
+async def compact_jobs_periodically(interval: float) -> None:
+    """
+    Move the finished jobs out of the hot state in the background, between the requests.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await JobsService.compact_jobs()
+        except Exception:
+            logger.exception("Jobs compaction failed")
+
+
+async def snapshot_state_periodically(interval: float) -> None:
+    """
+    Replace the write-ahead log with the snapshot of the state in the background (WAL storage backend only).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await NodesService.snapshot_state()
+        except Exception:
+            logger.exception("State snapshot failed")
+
+
+@asynccontextmanager
+async def own_state() -> AsyncIterator[None]:
+    """
+    Load the state (if persisted) and keep it compacted (and snapshotted) for as long as the process owns it.
+    """
+    if settings.STORAGE_BACKEND in (StorageBackend.SQL, StorageBackend.WAL):
+        await NodesService.load_state()
+
+    background_tasks = []
+    if settings.JOBS_COMPACTION_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(compact_jobs_periodically(settings.JOBS_COMPACTION_INTERVAL)))
+    if settings.STORAGE_BACKEND == StorageBackend.WAL and settings.WAL_SNAPSHOT_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(snapshot_state_periodically(settings.WAL_SNAPSHOT_INTERVAL)))
+
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if settings.STORAGE_BACKEND == StorageBackend.WAL:
+            # the next start up loads the snapshot only
+            await NodesService.snapshot_state()
+
+
+async def serve_gateway(path: str) -> asyncio.Server:
+    """
+    Serve the operations of the local gateway on the unix socket, the parameters are validated
+    (and so decoded from JSON) against the signatures of the operations.
+    """
+    with suppress(FileNotFoundError):
+        os.unlink(path)  # left by the previous run
+
+    handlers = {
+        name: validate_call(getattr(LocalSchedulerGateway, name)) for name in BaseSchedulerGateway.__abstractmethods__
+    }
+    return await serve(path, handlers)
+
+
+async def main() -> None:
+    if not settings.SCHEDULER_SOCKET:
+        raise SystemExit("SCHEDULER_SOCKET is not set")
+
+    async with own_state():
+        server = await serve_gateway(settings.SCHEDULER_SOCKET)
+        logger.info("Scheduler is listening on %s", settings.SCHEDULER_SOCKET)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
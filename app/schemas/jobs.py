@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from app.config import get_settings, Settings
 from app.database import JobModel
@@ -38,3 +38,9 @@ class Job(CreateJobRequest):
             expected_to_start_at=job_entity.expected_to_start_at,
             expected_to_finish_at=job_entity.expected_to_finish_at,
         )
+
+
+# The job entities are encoded to JSON bytes as they are (the same fields as of 'Job'),
+# without building and validating the 'Job' models first.
+job_encoder = TypeAdapter(JobModel)
+jobs_encoder = TypeAdapter(list[JobModel])
@@ -1,11 +1,13 @@
+from typing import NotRequired, Optional, TypedDict
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from app.config import get_settings, Settings
-from app.database import NodeModel
+from app.database import JobModel, NodeModel
 from app.schemas.jobs import Job
 from app.services import JobsService
+from app.utils.enums.nodes import DrainAction, EmbeddedJobs
 
 settings: Settings = get_settings()
 
@@ -17,17 +19,50 @@ class CreateNodeRequest(BaseModel):
     memory: int = Field(ge=1024, le=896000)  # MB
 
 
+class DrainNodesRequest(BaseModel):
+    node_ids: list[UUID] = Field(min_length=1)
+    action: DrainAction = DrainAction.REMOVE
+    dry_run: bool = False  # only report where the jobs would be moved to
+
+
 class Node(CreateNodeRequest):
     id: UUID
+    cordoned: bool = False
     jobs: list[Job] = []
+    job_ids: Optional[list[UUID]] = None
+
+
+class NodeEntry(TypedDict):
+    """
+    The content of 'Node' made of the entities: encoded straight to JSON bytes by 'node_encoder'.
+    """
+
+    max_concurrent_jobs: int
+    max_total_jobs: int
+    vcpu_units: int
+    memory: int
+    id: UUID
+    cordoned: bool
+    jobs: NotRequired[list[JobModel]]
+    job_ids: NotRequired[list[UUID]]
+
+
+def node_entry(node_entity: NodeModel, embedded_jobs: EmbeddedJobs = EmbeddedJobs.FULL) -> NodeEntry:
+    entry = NodeEntry(
+        max_concurrent_jobs=node_entity.max_concurrent_jobs,
+        max_total_jobs=node_entity.max_total_jobs,
+        vcpu_units=node_entity.vcpu_units,
+        memory=node_entity.memory,
+        id=node_entity.id,
+        cordoned=node_entity.metadata["cordoned"],
+    )
+    if embedded_jobs == EmbeddedJobs.FULL:
+        entry["jobs"] = [JobsService.get_job(job_id) for job_id in node_entity.jobs]
+    elif embedded_jobs == EmbeddedJobs.IDS:
+        entry["job_ids"] = list(node_entity.jobs)
+
+    return entry
+
 
-    @classmethod
-    def from_obj(cls, node_entity: NodeModel):
-        return cls(
-            id=node_entity.id,
-            max_concurrent_jobs=node_entity.max_concurrent_jobs,
-            max_total_jobs=node_entity.max_total_jobs,
-            vcpu_units=node_entity.vcpu_units,
-            memory=node_entity.memory,
-            jobs=[Job.from_obj(JobsService.get_job(job_id)) for job_id in node_entity.jobs],
-        )
+node_encoder = TypeAdapter(NodeEntry)
+nodes_encoder = TypeAdapter(list[NodeEntry])
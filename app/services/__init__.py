@@ -1,2 +1,12 @@
-from app.services.crud.jobs_service import InMemoryJobsService as JobsService
-from app.services.crud.nodes_service import InMemoryNodesService as NodesService
+from app.config import get_settings
+from app.utils.enums.storage import StorageBackend
+
+if get_settings().STORAGE_BACKEND == StorageBackend.SQL:
+    from app.services.crud.sql_jobs_service import SQLJobsService as JobsService
+    from app.services.crud.sql_nodes_service import SQLNodesService as NodesService
+elif get_settings().STORAGE_BACKEND == StorageBackend.WAL:
+    from app.services.crud.wal_jobs_service import WALJobsService as JobsService
+    from app.services.crud.wal_nodes_service import WALNodesService as NodesService
+else:
+    from app.services.crud.jobs_service import InMemoryJobsService as JobsService
+    from app.services.crud.nodes_service import InMemoryNodesService as NodesService
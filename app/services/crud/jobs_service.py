@@ -1,5 +1,7 @@
 import uuid
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterator
 from uuid import UUID
 
 from app.database import JobModel, state
@@ -7,15 +9,23 @@ from app.schemas.jobs import CreateJobRequest
 from app.services.jobs_scheduler import JobsScheduler
 from app.utils.custom_exceptions import (
     JobAlreadyTerminatedOrDoneException,
-    NoAvailableNodesLeftException,
+    JobNotFoundException,
 )
 from app.utils.enums.jobs import JobStatus
+from app.utils.helpers import paginate
 
 
 class BaseJobsService(ABC):
     @staticmethod
     @abstractmethod
-    async def get_all_jobs():
+    async def get_all_jobs(
+        status: JobStatus | None = None,
+        node_id: UUID | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: int | None = None,
+        limit: int | None = None,
+    ):
         pass
 
     @staticmethod
@@ -33,70 +43,119 @@ class BaseJobsService(ABC):
     async def terminate_job(job_id: UUID) -> None:
         pass
 
+    @staticmethod
+    @abstractmethod
+    async def compact_jobs() -> int:
+        pass
+
 
 class InMemoryJobsService(BaseJobsService):
     @staticmethod
-    async def get_all_jobs() -> list[JobModel]:
-        await JobsScheduler.update_jobs(state)
-        return list(state["jobs"].values())
+    async def get_all_jobs(
+        status: JobStatus | None = None,
+        node_id: UUID | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: int | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[JobModel], int | None]:
+        """
+        The jobs matching all the given filters, in order of submission: with the given status,
+        on the given node and expected to run within [window_start, window_end) at least partially.
+        Returns at most 'limit' jobs submitted after the 'cursor' and the cursor of the next page.
+
+        The time window narrows down the statuses looked at: the statuses are up to date as of "now",
+        so the queued jobs start after it and the done ones have finished before it. The jobs of the statuses
+        left are checked one by one, as there is no index by the start time: the time windows of the queued jobs
+        are shifted lazily (see 'ThreadTimeline'), so such an index would be rebuilt on every termination.
+        """
+        with JobsScheduler.fresh(state) as now:
+            jobs_index = state["jobs_index"]
+            candidates: Iterator[tuple[int, UUID]]
+            if node_id is not None:
+                # the node jobs are few, so the node is the most selective filter
+                node_jobs = state["nodes"][node_id].jobs if node_id in state["nodes"] else []
+                candidates = iter(
+                    sorted(
+                        (jobs_index.position(job_id), job_id)
+                        for job_id in node_jobs
+                        if state["jobs"][job_id].node_id == node_id
+                        and (status is None or state["jobs"][job_id].status == status)
+                        and (cursor is None or jobs_index.position(job_id) > cursor)
+                    )
+                )
+            else:
+                excluded_statuses = set()
+                if window_end is not None and window_end <= now:
+                    excluded_statuses.add(JobStatus.SCHEDULED)
+                if window_start is not None and window_start >= now:
+                    excluded_statuses.add(JobStatus.DONE)
+                statuses = list(JobStatus) if status is None else [status]
+                candidates = jobs_index.jobs(
+                    [job_status for job_status in statuses if job_status not in excluded_statuses], after=cursor
+                )
+
+            # the time windows are read, so they have to be up to date
+            jobs = ((position, JobsScheduler.get_job(state, job_id)) for position, job_id in candidates)
+            if window_start is not None or window_end is not None:
+                jobs = (
+                    (position, job_entity)
+                    for position, job_entity in jobs
+                    if (window_end is None or job_entity.expected_to_start_at < window_end)
+                    and (window_start is None or job_entity.expected_to_finish_at > window_start)
+                )
+
+            return paginate(jobs, limit)
 
     @staticmethod
     def get_job(job_id: UUID) -> JobModel:
-        return state["jobs"][job_id]
-
-    @staticmethod
-    async def revert_jobs(job_entities: list[JobModel]):
-        jobs_to_remove: list[UUID] = []
-
-        # terminate jobs from the batch that were submitted before the node run out of resources
-        for obj in job_entities:
-            state["jobs"][obj.id].status = JobStatus.TERMINATED
+        if job_id in state["jobs"]:
+            return JobsScheduler.get_job(state, job_id)
 
-        # update the jobs data and available node resources metrics
-        await JobsScheduler.update_jobs(state)
+        archived_job = state["archive"].get(job_id)
+        if archived_job is None:
+            raise JobNotFoundException
+        return JobModel(**archived_job)
 
-        # delete all jobs from batch since they shouldn't have been
-        # scheduled because of lack of available resources
-        for obj in job_entities:
-            jobs_to_remove.append(obj.id)
-            del state["jobs"][obj.id]
-
-        # remove deleted job ids from node entity's data
-        for node_id in state["nodes"].keys():
-            state["nodes"][node_id].jobs = [i for i in state["nodes"][node_id].jobs if i not in jobs_to_remove]
-
-    @classmethod
-    async def submit_jobs(cls, jobs: list[CreateJobRequest]) -> list[JobModel]:
-        await JobsScheduler.update_jobs(state)
+    @staticmethod
+    async def submit_jobs(jobs: list[CreateJobRequest]) -> list[JobModel]:
         jobs.sort(key=lambda obj: obj.total_run_time, reverse=True)
 
-        job_entities = []
-        for job in jobs:
-            job_id = uuid.uuid4()
-            job_entity = JobModel(
-                id=job_id,
+        job_entities = [
+            JobModel(
+                id=uuid.uuid4(),
                 total_run_time=job.total_run_time,
                 status=JobStatus.SCHEDULED,
                 vcpu_units=job.vcpu_units,
                 memory=job.memory,
             )
+            for job in jobs
+        ]
 
-            job_entities.append(job_entity)
-            state["jobs"][job_id] = job_entity
-            try:
-                await JobsScheduler.schedule_job(state, job_id)
-            except NoAvailableNodesLeftException as e:
-                await cls.revert_jobs(job_entities)
-                raise e
+        # the whole batch is placed as of a single moment and rolled back if any job can not be scheduled
+        with JobsScheduler.fresh(state), JobsScheduler.transaction(state):
+            for job_entity in job_entities:
+                JobsScheduler.add_job(state, job_entity)
+            JobsScheduler.schedule_jobs(state, [obj.id for obj in job_entities])
 
         return job_entities
 
     @staticmethod
     async def terminate_job(job_id: UUID) -> None:
-        await JobsScheduler.update_jobs(state)
-        if state["jobs"][job_id].status in (JobStatus.RUNNING, JobStatus.SCHEDULED):
-            previous_status = state["jobs"][job_id].status
-            state["jobs"][job_id].status = JobStatus.TERMINATED
-            await JobsScheduler.handle_job_termination(state, job_id, previous_status)
-        else:
-            raise JobAlreadyTerminatedOrDoneException
+        with JobsScheduler.fresh(state):
+            if job_id not in state["jobs"]:
+                # only the finished jobs are archived
+                if state["archive"].get(job_id) is None:
+                    raise JobNotFoundException
+                raise JobAlreadyTerminatedOrDoneException
+
+            if state["jobs"][job_id].status not in (JobStatus.RUNNING, JobStatus.SCHEDULED):
+                raise JobAlreadyTerminatedOrDoneException
+
+            with JobsScheduler.transaction(state):
+                JobsScheduler.handle_job_termination(state, job_id)
+
+    @staticmethod
+    async def compact_jobs() -> int:
+        JobsScheduler.update_jobs(state)
+        return JobsScheduler.compact_jobs(state)
@@ -1,19 +1,20 @@
-import copy
 import uuid
 from abc import ABC, abstractmethod
+from dataclasses import replace
 from uuid import UUID
 
-from app.database import NodeModel, state
+from app.database import JobModel, NodeModel, state
 from app.schemas.nodes import CreateNodeRequest
-from app.services.crud.jobs_service import InMemoryJobsService
 from app.services.jobs_scheduler import JobsScheduler
-from app.utils.custom_exceptions import NoAvailableNodesLeftException
+from app.utils.custom_exceptions import NodeNotFoundException
+from app.utils.enums.nodes import DrainAction
+from app.utils.helpers import paginate
 
 
 class BaseNodesService(ABC):
     @staticmethod
     @abstractmethod
-    async def get_all_nodes():
+    async def get_all_nodes(cursor: int | None = None, limit: int | None = None):
         pass
 
     @staticmethod
@@ -26,16 +27,38 @@ class BaseNodesService(ABC):
     async def remove_node(node_id: UUID) -> None:
         pass
 
+    @staticmethod
+    @abstractmethod
+    async def drain_nodes(
+        node_ids: list[UUID], action: DrainAction = DrainAction.REMOVE, dry_run: bool = False
+    ) -> list[JobModel]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def uncordon_nodes(node_ids: list[UUID]) -> None:
+        pass
+
 
 class InMemoryNodesService(BaseNodesService):
     @staticmethod
-    async def get_all_nodes() -> list[NodeModel]:
-        await JobsScheduler.update_jobs(state)
-        return list(state["nodes"].values())
+    async def get_all_nodes(cursor: int | None = None, limit: int | None = None) -> tuple[list[NodeModel], int | None]:
+        """
+        At most 'limit' nodes provisioned after the 'cursor', in order of provisioning,
+        and the cursor of the next page.
+        """
+        JobsScheduler.update_jobs(state)
+        return paginate(
+            (
+                (order, state["nodes"][node_id])
+                for order, node_id in state["nodes_index"].provisioned_nodes(after=cursor)
+            ),
+            limit,
+        )
 
     @staticmethod
     async def provision_nodes(nodes: list[CreateNodeRequest]) -> list[NodeModel]:
-        await JobsScheduler.update_jobs(state)
+        JobsScheduler.update_jobs(state)
 
         node_entities = []
         for node in nodes:
@@ -47,36 +70,50 @@ class InMemoryNodesService(BaseNodesService):
                 vcpu_units=node.vcpu_units,
                 memory=node.memory,
                 jobs=[],
-                metadata={
-                    "threads": [set() for _ in range(node.max_concurrent_jobs)],
-                    "free_threads": node.max_concurrent_jobs,
-                    "total_active_jobs": 0,
-                    "best_fit_thread": {
-                        "thread_id": 0,
-                        "available_at": None,  # 'None' means it can be used right away
-                    },
-                },
+                metadata=JobsScheduler.init_node_metadata(node.max_concurrent_jobs),
             )
 
             node_entities.append(node_entity)
             state["nodes"][node_id] = node_entity
+            JobsScheduler.refresh_threads_metadata(state, node_id)
 
         return node_entities
 
     @staticmethod
     async def remove_node(node_id: UUID) -> None:
-        await JobsScheduler.update_jobs(state)
+        await InMemoryNodesService.drain_nodes([node_id])
+
+    @staticmethod
+    async def drain_nodes(
+        node_ids: list[UUID], action: DrainAction = DrainAction.REMOVE, dry_run: bool = False
+    ) -> list[JobModel]:
+        """
+        Move the jobs off all the given nodes in a single batch placement pass and remove or cordon the nodes:
+        either all of them or none of them, if some job can not be placed.
+        Returns the moved jobs as they are placed. The dry run leaves the state as it was.
+        """
+        node_ids = list(dict.fromkeys(node_ids))
+        with JobsScheduler.fresh(state):
+            if any(node_id not in state["nodes"] for node_id in node_ids):
+                raise NodeNotFoundException
 
-        previous_nodes_state = copy.deepcopy(state["nodes"])
-        del state["nodes"][node_id]
+            with JobsScheduler.transaction(state, dry_run=dry_run):
+                job_ids = JobsScheduler.drain_nodes(state, node_ids)
+                # the copies as of now, the dry run is rolled back right after
+                moved_jobs = [replace(JobsScheduler.get_job(state, job_id)) for job_id in job_ids]
 
-        jobs_to_be_rescheduled = [
-            job_id for thread in previous_nodes_state[node_id].metadata["threads"] for job_id in thread
-        ]
+            if action == DrainAction.REMOVE and not dry_run:
+                for node_id in node_ids:
+                    del state["nodes"][node_id]
+                    state["nodes_index"].remove(node_id)
+
+        return moved_jobs
+
+    @staticmethod
+    async def uncordon_nodes(node_ids: list[UUID]) -> None:
+        JobsScheduler.update_jobs(state)
+        if any(node_id not in state["nodes"] for node_id in node_ids):
+            raise NodeNotFoundException
 
-        try:
-            for job_id in jobs_to_be_rescheduled:
-                await JobsScheduler.schedule_job(state, job_id)
-        except NoAvailableNodesLeftException as e:
-            state["nodes"] = previous_nodes_state
-            raise e
+        for node_id in node_ids:
+            JobsScheduler.uncordon_node(state, node_id)
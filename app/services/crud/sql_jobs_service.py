@@ -0,0 +1,20 @@
+from uuid import UUID
+
+from app.database import JobModel, StateType
+from app.services.crud.write_through_jobs_service import WriteThroughJobsService
+from app.sql_database import get_engine, load_job, save_changes
+
+
+class SQLJobsService(WriteThroughJobsService):
+    """
+    The changes are written to the SQL database in bulk, within a transaction per request.
+    The jobs finished before the restart are looked up in the database.
+    """
+
+    @staticmethod
+    async def _save_changes(state: StateType) -> None:
+        await save_changes(get_engine(), state)
+
+    @staticmethod
+    async def _load_job(job_id: UUID) -> JobModel | None:
+        return await load_job(get_engine(), job_id)
@@ -0,0 +1,28 @@
+from typing import Any, Mapping
+
+from app.database import JobModel, StateType
+from app.services.crud.write_through_nodes_service import WriteThroughNodesService
+from app.sql_database import (
+    create_tables,
+    get_engine,
+    load_active_jobs,
+    load_nodes,
+    save_changes,
+)
+from app.utils import clock
+
+
+class SQLNodesService(WriteThroughNodesService):
+    """
+    The nodes are written to the SQL database, the tables are created on start up if missing.
+    """
+
+    @staticmethod
+    async def _save_changes(state: StateType) -> None:
+        await save_changes(get_engine(), state)
+
+    @staticmethod
+    async def _load_state() -> tuple[list[Mapping[str, Any]], list[JobModel]]:
+        engine = get_engine()
+        await create_tables(engine)
+        return await load_nodes(engine), await load_active_jobs(engine, clock.now())
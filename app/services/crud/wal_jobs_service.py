@@ -0,0 +1,15 @@
+from app.database import StateType
+from app.services.crud.write_through_jobs_service import WriteThroughJobsService
+from app.wal_database import get_wal, save_changes
+
+
+class WALJobsService(WriteThroughJobsService):
+    """
+    The changes made by every modifying request are appended to the write-ahead log as a single record,
+    written off the event loop.
+    The jobs finished before the restart are not kept, so they are not found afterwards.
+    """
+
+    @staticmethod
+    async def _save_changes(state: StateType) -> None:
+        await save_changes(get_wal(), state)
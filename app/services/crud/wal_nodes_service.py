@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Mapping
+
+from app.database import JobModel, state, StateType
+from app.services.crud.write_through_nodes_service import WriteThroughNodesService
+from app.services.jobs_scheduler import JobsScheduler
+from app.wal_database import ACTIVE_STATUSES, get_wal, pack_snapshot, save_changes
+
+
+class WALNodesService(WriteThroughNodesService):
+    """
+    The changes of the nodes are appended to the write-ahead log, which is replaced by a snapshot from time to time.
+    """
+
+    @staticmethod
+    async def _save_changes(state: StateType) -> None:
+        await save_changes(get_wal(), state)
+
+    @staticmethod
+    async def _load_state() -> tuple[list[Mapping[str, Any]], list[JobModel]]:
+        return await asyncio.to_thread(get_wal().recover)
+
+    @staticmethod
+    async def snapshot_state() -> None:
+        """
+        Replace the log written so far with the snapshot of the nodes and their active jobs, so the restart
+        replays only the changes made since then. The state is only held still while it is packed.
+        """
+        wal = get_wal()
+        async with state["write_lock"]:
+            JobsScheduler.update_jobs(state)
+            await save_changes(wal, state)
+            segment = wal.rotate()
+            # the time windows of the jobs are brought up to date with the shifts of their threads on read
+            job_entities = [
+                JobsScheduler.get_job(state, job_id)
+                for job_id, job_entity in state["jobs"].items()
+                if job_entity.status in ACTIVE_STATUSES
+            ]
+            snapshot = pack_snapshot(segment, list(state["nodes"].values()), job_entities)
+
+        await asyncio.to_thread(wal.store_snapshot, snapshot)
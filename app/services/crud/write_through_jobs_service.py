@@ -0,0 +1,64 @@
+from abc import abstractmethod
+from uuid import UUID
+
+from app.database import JobModel, state, StateType
+from app.schemas.jobs import CreateJobRequest
+from app.services.crud.jobs_service import InMemoryJobsService
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.custom_exceptions import (
+    JobAlreadyTerminatedOrDoneException,
+    JobNotFoundException,
+)
+
+
+class WriteThroughJobsService(InMemoryJobsService):
+    """
+    The jobs are scheduled in memory (see InMemoryJobsService) and the changes made by every
+    modifying request are written through to the store of the backend, so the state survives restarts.
+    The status changes caused by the time passing only are written along with the next modification.
+    The modifying requests hold the state "write_lock" until their changes are written,
+    so the changes are written in the same order they are made.
+
+    The backends supply the persistence calls only: '_save_changes' and, optionally, '_load_job'.
+    """
+
+    @staticmethod
+    @abstractmethod
+    async def _save_changes(state: StateType) -> None:
+        """
+        Write the entities changed since the previous call (see ChangeSet) to the store.
+        """
+
+    @staticmethod
+    async def _load_job(job_id: UUID) -> JobModel | None:
+        """
+        The job which is not in memory (finished before the restart), 'None' if the store does not keep it.
+        """
+        return None
+
+    @classmethod
+    async def submit_jobs(cls, jobs: list[CreateJobRequest]) -> list[JobModel]:
+        async with state["write_lock"]:
+            job_entities = await InMemoryJobsService.submit_jobs(jobs)
+            state["changes"].new_jobs.update(dict.fromkeys(job_entity.id for job_entity in job_entities))
+            await cls._save_changes(state)
+            return job_entities
+
+    @classmethod
+    async def terminate_job(cls, job_id: UUID) -> None:
+        async with state["write_lock"]:
+            if job_id not in state["jobs"] and state["archive"].get(job_id) is None:
+                if await cls._load_job(job_id) is None:
+                    raise JobNotFoundException
+                raise JobAlreadyTerminatedOrDoneException
+
+            await InMemoryJobsService.terminate_job(job_id)
+            await cls._save_changes(state)
+
+    @classmethod
+    async def compact_jobs(cls) -> int:
+        async with state["write_lock"]:
+            JobsScheduler.update_jobs(state)
+            # the archived jobs are no longer tracked, so their final state is written beforehand
+            await cls._save_changes(state)
+            return JobsScheduler.compact_jobs(state)
@@ -0,0 +1,81 @@
+from abc import abstractmethod
+from typing import Any, Mapping
+from uuid import UUID
+
+from app.database import JobModel, NodeModel, state, StateType
+from app.schemas.nodes import CreateNodeRequest
+from app.services.crud.nodes_service import InMemoryNodesService
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.change_set import ChangeSet
+from app.utils.enums.nodes import DrainAction
+
+
+class WriteThroughNodesService(InMemoryNodesService):
+    """
+    The nodes are kept in memory (see InMemoryNodesService) and written through to the store of the backend.
+    The cordons are not written: the restored nodes take the new jobs again.
+
+    The backends supply the persistence calls only: '_save_changes' and '_load_state'.
+    """
+
+    @staticmethod
+    @abstractmethod
+    async def _save_changes(state: StateType) -> None:
+        """
+        Write the entities changed since the previous call (see ChangeSet) to the store.
+        """
+
+    @staticmethod
+    @abstractmethod
+    async def _load_state() -> tuple[list[Mapping[str, Any]], list[JobModel]]:
+        """
+        The attributes of the stored nodes and their active jobs.
+        """
+
+    @classmethod
+    async def load_state(cls) -> None:
+        """
+        Restore the nodes and their active jobs from the store once, on start up.
+        """
+        node_rows, job_entities = await cls._load_state()
+
+        for row in node_rows:
+            state["nodes"][row["id"]] = NodeModel(
+                id=row["id"],
+                max_concurrent_jobs=row["max_concurrent_jobs"],
+                max_total_jobs=row["max_total_jobs"],
+                vcpu_units=row["vcpu_units"],
+                memory=row["memory"],
+                jobs=[],
+                metadata=JobsScheduler.init_node_metadata(row["max_concurrent_jobs"]),
+            )
+
+        state["changes"] = ChangeSet()
+        JobsScheduler.restore_jobs(state, job_entities)
+
+    @classmethod
+    async def provision_nodes(cls, nodes: list[CreateNodeRequest]) -> list[NodeModel]:
+        async with state["write_lock"]:
+            node_entities = await InMemoryNodesService.provision_nodes(nodes)
+            state["changes"].new_nodes.update(dict.fromkeys(node_entity.id for node_entity in node_entities))
+            await cls._save_changes(state)
+            return node_entities
+
+    @classmethod
+    async def remove_node(cls, node_id: UUID) -> None:
+        async with state["write_lock"]:
+            await InMemoryNodesService.remove_node(node_id)
+            state["changes"].removed_nodes[node_id] = None
+            await cls._save_changes(state)
+
+    @classmethod
+    async def drain_nodes(
+        cls, node_ids: list[UUID], action: DrainAction = DrainAction.REMOVE, dry_run: bool = False
+    ) -> list[JobModel]:
+        async with state["write_lock"]:
+            moved_jobs = await InMemoryNodesService.drain_nodes(node_ids, action, dry_run)
+            if not dry_run:
+                if action == DrainAction.REMOVE:
+                    state["changes"].removed_nodes.update(dict.fromkeys(node_ids))
+                await cls._save_changes(state)
+            return moved_jobs
@@ -0,0 +1,239 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from functools import lru_cache
+from uuid import UUID
+
+from app.config import get_settings
+from app.schemas.jobs import CreateJobRequest, job_encoder, jobs_encoder
+from app.schemas.nodes import CreateNodeRequest, node_encoder, node_entry, nodes_encoder
+from app.services import JobsService, NodesService
+from app.services.metrics import render_metrics
+from app.utils.enums.jobs import JobStatus
+from app.utils.enums.nodes import DrainAction, EmbeddedJobs
+from app.utils.helpers import encode_ndjson
+from app.utils.rpc import RPCClient
+
+settings = get_settings()
+
+# Every operation returns the JSON encoded result (NDJSON for the streamed listings)
+# and the cursor of the next page (for the paginated listings, otherwise 'None').
+Result = tuple[bytes, int | None]
+
+
+class BaseSchedulerGateway(ABC):
+    """
+    The operations of the API over the scheduler state.
+    """
+
+    @staticmethod
+    @abstractmethod
+    async def get_jobs(
+        status: JobStatus | None = None,
+        node_id: UUID | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: int | None = None,
+        limit: int | None = None,
+        ndjson: bool = False,
+    ) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def submit_jobs(jobs: list[CreateJobRequest]) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def terminate_job(job_id: UUID) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_nodes(
+        embedded_jobs: EmbeddedJobs = EmbeddedJobs.FULL,
+        cursor: int | None = None,
+        limit: int | None = None,
+        ndjson: bool = False,
+    ) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def provision_nodes(nodes: list[CreateNodeRequest]) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def remove_node(node_id: UUID) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def drain_nodes(
+        node_ids: list[UUID], action: DrainAction = DrainAction.REMOVE, dry_run: bool = False
+    ) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def uncordon_nodes(node_ids: list[UUID]) -> Result:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_metrics() -> Result:
+        pass
+
+
+class LocalSchedulerGateway(BaseSchedulerGateway):
+    """
+    The operations are performed by the services of the current process (the owner of the state).
+    """
+
+    @staticmethod
+    async def get_jobs(
+        status: JobStatus | None = None,
+        node_id: UUID | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: int | None = None,
+        limit: int | None = None,
+        ndjson: bool = False,
+    ) -> Result:
+        jobs, next_cursor = await JobsService.get_all_jobs(
+            status=status,
+            node_id=node_id,
+            window_start=window_start,
+            window_end=window_end,
+            cursor=cursor,
+            limit=limit,
+        )
+        return encode_ndjson(job_encoder.dump_json, jobs) if ndjson else jobs_encoder.dump_json(jobs), next_cursor
+
+    @staticmethod
+    async def submit_jobs(jobs: list[CreateJobRequest]) -> Result:
+        return jobs_encoder.dump_json(await JobsService.submit_jobs(jobs)), None
+
+    @staticmethod
+    async def terminate_job(job_id: UUID) -> Result:
+        await JobsService.terminate_job(job_id)
+        return b"", None
+
+    @staticmethod
+    async def get_nodes(
+        embedded_jobs: EmbeddedJobs = EmbeddedJobs.FULL,
+        cursor: int | None = None,
+        limit: int | None = None,
+        ndjson: bool = False,
+    ) -> Result:
+        nodes, next_cursor = await NodesService.get_all_nodes(cursor=cursor, limit=limit)
+        entries = [node_entry(node, embedded_jobs) for node in nodes]
+        return (
+            encode_ndjson(node_encoder.dump_json, entries) if ndjson else nodes_encoder.dump_json(entries),
+            next_cursor,
+        )
+
+    @staticmethod
+    async def provision_nodes(nodes: list[CreateNodeRequest]) -> Result:
+        node_entities = await NodesService.provision_nodes(nodes)
+        return nodes_encoder.dump_json([node_entry(node) for node in node_entities]), None
+
+    @staticmethod
+    async def remove_node(node_id: UUID) -> Result:
+        await NodesService.remove_node(node_id)
+        return b"", None
+
+    @staticmethod
+    async def drain_nodes(
+        node_ids: list[UUID], action: DrainAction = DrainAction.REMOVE, dry_run: bool = False
+    ) -> Result:
+        return jobs_encoder.dump_json(await NodesService.drain_nodes(node_ids, action, dry_run)), None
+
+    @staticmethod
+    async def uncordon_nodes(node_ids: list[UUID]) -> Result:
+        await NodesService.uncordon_nodes(node_ids)
+        return b"", None
+
+    @staticmethod
+    async def get_metrics() -> Result:
+        return render_metrics().encode(), None
+
+
+@lru_cache()
+def get_rpc_client() -> RPCClient:
+    return RPCClient(settings.SCHEDULER_SOCKET)
+
+
+class RemoteSchedulerGateway(BaseSchedulerGateway):
+    """
+    The operations are forwarded to the scheduler process (see 'app.scheduler_server') which owns the state,
+    so any number of API workers share the same state. The results are passed through as they are encoded.
+    """
+
+    @staticmethod
+    async def get_jobs(
+        status: JobStatus | None = None,
+        node_id: UUID | None = None,
+        window_start: datetime | None = None,
+        window_end: datetime | None = None,
+        cursor: int | None = None,
+        limit: int | None = None,
+        ndjson: bool = False,
+    ) -> Result:
+        return await get_rpc_client().call(
+            "get_jobs",
+            status=status,
+            node_id=node_id,
+            window_start=window_start,
+            window_end=window_end,
+            cursor=cursor,
+            limit=limit,
+            ndjson=ndjson,
+        )
+
+    @staticmethod
+    async def submit_jobs(jobs: list[CreateJobRequest]) -> Result:
+        return await get_rpc_client().call("submit_jobs", jobs=jobs)
+
+    @staticmethod
+    async def terminate_job(job_id: UUID) -> Result:
+        return await get_rpc_client().call("terminate_job", job_id=job_id)
+
+    @staticmethod
+    async def get_nodes(
+        embedded_jobs: EmbeddedJobs = EmbeddedJobs.FULL,
+        cursor: int | None = None,
+        limit: int | None = None,
+        ndjson: bool = False,
+    ) -> Result:
+        return await get_rpc_client().call(
+            "get_nodes", embedded_jobs=embedded_jobs, cursor=cursor, limit=limit, ndjson=ndjson
+        )
+
+    @staticmethod
+    async def provision_nodes(nodes: list[CreateNodeRequest]) -> Result:
+        return await get_rpc_client().call("provision_nodes", nodes=nodes)
+
+    @staticmethod
+    async def remove_node(node_id: UUID) -> Result:
+        return await get_rpc_client().call("remove_node", node_id=node_id)
+
+    @staticmethod
+    async def drain_nodes(
+        node_ids: list[UUID], action: DrainAction = DrainAction.REMOVE, dry_run: bool = False
+    ) -> Result:
+        return await get_rpc_client().call("drain_nodes", node_ids=node_ids, action=action, dry_run=dry_run)
+
+    @staticmethod
+    async def uncordon_nodes(node_ids: list[UUID]) -> Result:
+        return await get_rpc_client().call("uncordon_nodes", node_ids=node_ids)
+
+    @staticmethod
+    async def get_metrics() -> Result:
+        return await get_rpc_client().call("get_metrics")
+
+
+SchedulerGateway: type[BaseSchedulerGateway] = (
+    RemoteSchedulerGateway if settings.SCHEDULER_SOCKET else LocalSchedulerGateway
+)
@@ -1,21 +1,58 @@
-import asyncio
-import copy
-from collections import namedtuple
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from typing import Callable, Iterator
 from uuid import UUID
 
 from app.config import get_settings
-from app.database import NodeModel, StateType
+from app.database import JobModel, NodeModel, StateType
 from app.logger import get_logger
+from app.services.placement_strategies import PLACEMENT_STRATEGIES
+from app.utils import clock
 from app.utils.custom_exceptions import NoAvailableNodesLeftException
 from app.utils.enums.jobs import JobStatus
-from app.utils.helpers import datetimes_intersection
+from app.utils.metrics import Histogram, SIZE_BUCKETS
+from app.utils.resources_profile import ResourcesProfile
+from app.utils.thread_timeline import ThreadTimeline
+from app.utils.undo_log import UndoLog
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+Thread = namedtuple("Thread", ["id", "available_at"])
+
+PLACEMENT_SECONDS = Histogram("scheduler_placement_seconds", "Time to place a single job on a node.")
+RESOURCES_CHECK_SECONDS = Histogram(
+    "scheduler_resources_check_seconds", "Time to check the node resources within the job time window."
+)
+UPDATE_SWEEP_SECONDS = Histogram("scheduler_update_sweep_seconds", "Time to bring the due jobs up to date.")
+BATCH_SIZE = Histogram("scheduler_batch_size", "Jobs placed in a single pass.", SIZE_BUCKETS)
+
 
 class JobsScheduler:
+    """
+    All the methods are synchronous on purpose: a change of the state is applied as a whole
+    before any other request gets a chance to run, so concurrent requests (served by the single
+    event loop) never see a torn state and the readers do not need any locks.
+    The operations which await in between of the changes (e.g. to write them to the database)
+    have to hold the state "write_lock" to keep them from interleaving.
+    """
+
+    @staticmethod
+    def init_node_metadata(max_concurrent_jobs: int) -> dict:
+        return {
+            "threads": [ThreadTimeline() for _ in range(max_concurrent_jobs)],
+            "free_threads": max_concurrent_jobs,
+            "total_active_jobs": 0,
+            "best_fit_thread": {
+                "thread_id": 0,
+                "available_at": None,  # 'None' means it can be used right away
+            },
+            "resources": ResourcesProfile(),
+            "cordoned": False,
+        }
+
     @staticmethod
     def _update_best_fit_thread_dict(node_entity: NodeModel, thread_id: int, available_at: datetime | None):
         node_entity.metadata["best_fit_thread"] = {
@@ -26,115 +63,526 @@ class JobsScheduler:
             "Best thread on node='%s' to schedule the job: %s", node_entity.id, node_entity.metadata["best_fit_thread"]
         )
 
+    @staticmethod
+    def get_job(state: StateType, job_id: UUID) -> JobModel:
+        """
+        The job with its time window up to date: the shifts of its thread are applied on read (see 'ThreadTimeline').
+        """
+        job_entity = state["jobs"][job_id]
+        node_entity = state["nodes"].get(job_entity.node_id)
+        if node_entity is not None and job_entity.node_thread_id is not None:
+            thread = node_entity.metadata["threads"][job_entity.node_thread_id]
+            if job_id in thread:
+                thread.materialize(job_entity)
+        return job_entity
+
+    @staticmethod
+    def _reindex_node(state: StateType, node_id: UUID):
+        node_entity = state["nodes"][node_id]
+        now = JobsScheduler.now(state)
+
+        # a thread runs a single job at a time, the first one
+        used_cpu, used_memory = 0, 0
+        for thread in node_entity.metadata["threads"]:
+            if thread:
+                job_entity = JobsScheduler.get_job(state, thread.first())
+                if job_entity.expected_to_start_at <= now < job_entity.expected_to_finish_at:
+                    used_cpu += job_entity.vcpu_units
+                    used_memory += job_entity.memory
+
+        state["nodes_index"].update(
+            node_id,
+            node_entity.metadata["best_fit_thread"]["available_at"],
+            free_resources=(node_entity.vcpu_units - used_cpu, node_entity.memory - used_memory),
+            eligible=bool(node_entity.metadata["threads"])
+            and node_entity.metadata["total_active_jobs"] < node_entity.max_total_jobs
+            and not node_entity.metadata["cordoned"],
+            free_slots=node_entity.max_total_jobs - node_entity.metadata["total_active_jobs"],
+            capacity=(node_entity.vcpu_units, node_entity.memory),
+        )
+
     @classmethod
-    async def refresh_threads_metadata(cls, state: StateType, node_id: UUID):
+    def refresh_threads_metadata(cls, state: StateType, node_id: UUID):
         node_entity = state["nodes"][node_id]
 
         if node_entity.metadata["free_threads"] == node_entity.max_concurrent_jobs:
             cls._update_best_fit_thread_dict(node_entity, 0, None)
         else:
             last_jobs_per_thread = []
-            Thread = namedtuple("Thread", ["id", "available_at"])
 
             for thread_id in range(len(node_entity.metadata["threads"])):
                 thread = node_entity.metadata["threads"][thread_id]
                 if not thread:
                     cls._update_best_fit_thread_dict(node_entity, thread_id, None)
-                    return
+                    break
 
                 last_jobs_per_thread.append(
                     Thread(
                         id=thread_id,
-                        available_at=state["jobs"][thread[-1]].expected_to_finish_at,
+                        available_at=cls.get_job(state, thread.last()).expected_to_finish_at,
                     )
                 )
+            else:
+                last_jobs_per_thread.sort(key=lambda x: x.available_at)
+                cls._update_best_fit_thread_dict(
+                    node_entity, last_jobs_per_thread[0].id, last_jobs_per_thread[0].available_at
+                )
 
-            last_jobs_per_thread.sort(key=lambda x: x.available_at)
-            cls._update_best_fit_thread_dict(
-                node_entity, last_jobs_per_thread[0].id, last_jobs_per_thread[0].available_at
-            )
+        cls._reindex_node(state, node_id)
 
-    @classmethod
-    async def _remove_inactive_jobs(cls, state: StateType, node_id: UUID, inactive_jobs: list[UUID]):
-        for thread_id in range(len(state["nodes"][node_id].metadata["threads"])):
-            jobs_in_thread = len(state["nodes"][node_id].metadata["threads"][thread_id])
-            state["nodes"][node_id].metadata["threads"][thread_id] = [
-                i for i in state["nodes"][node_id].metadata["threads"][thread_id] if i not in inactive_jobs
-            ]
-            active_jobs_in_thread = len(state["nodes"][node_id].metadata["threads"][thread_id])
-            state["nodes"][node_id].metadata["total_active_jobs"] -= jobs_in_thread - active_jobs_in_thread
+    @staticmethod
+    def _detach_job(state: StateType, job_id: UUID, finished_at: datetime):
+        """
+        Remove the finished/terminated job from its node thread and update the node metadata.
+        The job itself stays in the state until the compaction (see 'compact_jobs').
+        """
+        job_entity = JobsScheduler.get_job(state, job_id)  # its time window is final from now on
+        metadata = state["nodes"][job_entity.node_id].metadata
+        thread = metadata["threads"][job_entity.node_thread_id]
+        reserved = job_id in metadata["resources"]
+
+        position = thread.remove(job_id)
+        metadata["resources"].discard(job_id)
+        gap = state["gaps"].discard(job_id)  # nothing can be put before the job anymore
+        metadata["total_active_jobs"] -= 1
+        frees_thread = not thread
+        if frees_thread:
+            metadata["free_threads"] += 1
+
+        state["finished_jobs"].append((finished_at, job_id))
+
+        def undo():
+            thread.restore(job_id, position)
+            if reserved:
+                metadata["resources"].add(
+                    job_id,
+                    job_entity.expected_to_start_at,
+                    job_entity.expected_to_finish_at,
+                    job_entity.vcpu_units,
+                    job_entity.memory,
+                )
+            if gap is not None:
+                state["gaps"].add(job_id, *gap)
+            metadata["total_active_jobs"] += 1
+            if frees_thread:
+                metadata["free_threads"] -= 1
+            state["finished_jobs"].pop()
+
+        JobsScheduler._journal(state, undo, job_entity.node_id)
 
-            if not active_jobs_in_thread:
-                state["nodes"][node_id].metadata["free_threads"] += 1
+    @staticmethod
+    def _track_job(state: StateType, job_id: UUID):
+        """
+        Mark the job to be written to the persistent storage (if there is one).
+        """
+        if state["changes"] is not None:
+            state["changes"].updated_jobs[job_id] = None
 
-        await cls.refresh_threads_metadata(state, node_id)
+    @staticmethod
+    def _set_job_status(state: StateType, job_entity: JobModel, status: JobStatus):
+        job_entity.status = status
+        state["jobs_index"].update(job_entity.id, status)
+        JobsScheduler._track_job(state, job_entity.id)
 
     @staticmethod
-    async def _update_job_status(state: StateType, job_id: UUID) -> UUID | None:
-        if state["jobs"][job_id].status in (
-            JobStatus.SCHEDULED,
-            JobStatus.RUNNING,
-        ):
-            if (
-                state["jobs"][job_id].expected_to_start_at
-                <= datetime.now()
-                < state["jobs"][job_id].expected_to_finish_at
-            ):
-                state["jobs"][job_id].status = JobStatus.RUNNING
-            elif state["jobs"][job_id].expected_to_finish_at <= datetime.now():
-                state["jobs"][job_id].status = JobStatus.DONE
-            elif state["jobs"][job_id].expected_to_start_at > datetime.now():
-                state["jobs"][job_id].status = JobStatus.SCHEDULED
+    def _update_job_status(state: StateType, job_id: UUID, now: datetime) -> bool:
+        """
+        Bring the job status in line with its time window.
+        Returns True if the job has just finished.
+        """
+        job_entity = JobsScheduler.get_job(state, job_id)
+        previous_status = job_entity.status
+        if previous_status not in (JobStatus.SCHEDULED, JobStatus.RUNNING):
+            return False
+
+        if job_entity.expected_to_start_at <= now < job_entity.expected_to_finish_at:
+            status = JobStatus.RUNNING
+        elif job_entity.expected_to_finish_at <= now:
+            status = JobStatus.DONE
+        else:
+            status = JobStatus.SCHEDULED
+
+        if status != previous_status:
+            JobsScheduler._set_job_status(state, job_entity, status)
+            JobsScheduler._journal(
+                state, lambda: JobsScheduler._set_job_status(state, job_entity, previous_status), job_entity.node_id
+            )
+            if status == JobStatus.RUNNING:
+                # the first job of the thread is the only one waiting for its event (see '_advance_jobs')
+                state["events"].push(job_id, job_entity.expected_to_finish_at)
+        return status == JobStatus.DONE
+
+    @staticmethod
+    def _await_start(state: StateType, job_id: UUID):
+        """
+        The first job of the thread which is not due yet (there is an idle gap before it, see 'SCHEDULER_BACKFILL')
+        waits for its start event, as no previous job brings it up to date once finished.
+        """
+        job_entity = state["jobs"][job_id]
+        if job_entity.status != JobStatus.SCHEDULED:
+            return
 
-        return job_id if state["jobs"][job_id].status in (JobStatus.DONE, JobStatus.TERMINATED) else None
+        thread = state["nodes"][job_entity.node_id].metadata["threads"][job_entity.node_thread_id]
+        if thread.first() == job_id:
+            state["events"].push(job_id, job_entity.expected_to_start_at)
+
+    @staticmethod
+    def now(state: StateType) -> datetime:
+        """
+        The time the state is up to date as of within the request (see 'fresh'), otherwise the current time.
+        """
+        return state["fresh_at"] or clock.now()
+
+    @classmethod
+    @contextmanager
+    def fresh(cls, state: StateType) -> Iterator[datetime]:
+        """
+        Bring the job statuses up to date once for the whole request: within the block the scheduler
+        takes the state as fresh as of the same moment, so it neither sweeps the due jobs again
+        nor places the jobs relative to a different "now".
+        """
+        if state["fresh_at"] is not None:  # already within the request
+            yield state["fresh_at"]
+            return
+
+        now = clock.now()
+        cls.update_jobs(state, now)
+        state["fresh_at"] = now
+        try:
+            yield now
+        finally:
+            state["fresh_at"] = None
 
     @classmethod
-    async def update_jobs(cls, state: StateType):
+    def update_jobs(cls, state: StateType, now: datetime | None = None):
         """
         Ideally the job status should be changed via callback once the job if finished
         but since it's an emulation of job schedulement and we do not have such option
         then it is done before each GET, POST or DELETE request.
+
+        Only the jobs with the start/finish events due since the previous call are touched,
+        so the cost of the call does not depend on the total number of jobs in the state,
+        and nothing is done at all when no event is due (or the state is fresh already, see 'fresh').
         """
-        inactive_jobs = await asyncio.gather(
-            *[cls._update_job_status(state, job_id) for job_id in state["jobs"].keys()]
-        )
-        # remove all None elements
-        inactive_jobs = [job_id for job_id in inactive_jobs if job_id]
+        if state["fresh_at"] is not None:
+            return
+
+        now = now or clock.now()
+        if state["events"].is_due(now):
+            started_at = time.perf_counter()
+            cls._advance_jobs(state, state["events"].pop_due(now), now)
+            UPDATE_SWEEP_SECONDS.observe(time.perf_counter() - started_at)
+
+    @classmethod
+    def _advance_jobs(cls, state: StateType, job_ids: list[UUID], now: datetime):
+        """
+        Bring the statuses of the given jobs in line with their time windows as of 'now'.
+
+        Only the running jobs wait for their finish events: the next job of the thread starts once
+        the previous one finishes, so it is brought up to date right after the previous one is removed.
+        Thus the time windows of the queued jobs can be shifted without touching the events queue.
+        The only exception is the job with an idle gap before it, which waits for its start (see '_await_start').
+        """
+        finished_jobs = []
+        pending_jobs = deque(job_ids)
+        affected_nodes: dict[UUID, None] = {}
+        while pending_jobs:
+            job_id = pending_jobs.popleft()
+            if job_id not in state["jobs"]:
+                continue
+            if not cls._update_job_status(state, job_id, now):
+                cls._await_start(state, job_id)
+                continue
+
+            job_entity = state["jobs"][job_id]
+            next_job_id = state["nodes"][job_entity.node_id].metadata["threads"][job_entity.node_thread_id].next(job_id)
+            # Remove inactive jobs from their nodes threads and update metadata of the affected nodes only
+            cls._detach_job(state, job_id, job_entity.expected_to_finish_at)
+            finished_jobs.append(job_id)
+            affected_nodes[job_entity.node_id] = None
+            if next_job_id is not None:
+                pending_jobs.append(next_job_id)
+
+        if finished_jobs:
+            logger.info("Removing inactive jobs: %s", finished_jobs)
+
+        for node_id in affected_nodes:
+            cls.refresh_threads_metadata(state, node_id)
+
+        logger.debug("Advanced %s jobs, %s nodes affected", len(job_ids), len(affected_nodes))
+
+    @classmethod
+    def restore_jobs(cls, state: StateType, job_entities: list[JobModel]):
+        """
+        Put the active jobs loaded from the persistent storage back on the threads of their nodes
+        (the nodes are expected to be in the state already) and rebuild the nodes metadata.
+        """
+        for job_entity in sorted(job_entities, key=lambda job: job.expected_to_start_at):
+            if job_entity.node_id not in state["nodes"]:
+                logger.warning("The node of the job='%s' is not found, the job is skipped", job_entity.id)
+                continue
+
+            node_entity = state["nodes"][job_entity.node_id]
+            thread = node_entity.metadata["threads"][job_entity.node_thread_id]
+            if not thread:
+                node_entity.metadata["free_threads"] -= 1
+            elif settings.SCHEDULER_BACKFILL:
+                # the idle gaps between the jobs are not persisted, they are told by the time windows
+                previous_finish = state["jobs"][thread.last()].expected_to_finish_at
+                state["gaps"].add(job_entity.id, previous_finish, job_entity.expected_to_start_at)
+            thread.append(job_entity.id)
+            node_entity.jobs.append(job_entity.id)
+            node_entity.metadata["total_active_jobs"] += 1
+
+            state["jobs"][job_entity.id] = job_entity
+            state["jobs_index"].add(job_entity.id, job_entity.status)
+            state["events"].push(job_entity.id, job_entity.expected_to_start_at, job_entity.expected_to_finish_at)
+            node_entity.metadata["resources"].add(
+                job_entity.id,
+                job_entity.expected_to_start_at,
+                job_entity.expected_to_finish_at,
+                job_entity.vcpu_units,
+                job_entity.memory,
+            )
 
-        # Remove inactive jobs from all nodes threads and update metadata
-        logger.info("Removing inactive jobs: %s", inactive_jobs)
-        async with asyncio.TaskGroup() as tg:
-            for node_id in state["nodes"].keys():
-                tg.create_task(cls._remove_inactive_jobs(state, node_id, inactive_jobs))
+        for node_id in state["nodes"]:
+            cls.refresh_threads_metadata(state, node_id)
+        cls.update_jobs(state)
+
+    @staticmethod
+    def compact_jobs(state: StateType) -> int:
+        """
+        Move the finished jobs which are older than the retention TTL (or exceed the retention
+        count) out of the hot state into the archive, so the state holds mostly the active work.
+        Returns the number of archived jobs.
+        """
+        finished_jobs = state["finished_jobs"]
+        retained_since = clock.now() - timedelta(seconds=settings.JOBS_RETENTION_TTL)
 
-        logger.debug(state)
+        archived_jobs: dict[UUID, set[UUID]] = {}  # node_id -> ids of the node jobs
+        archived_count = 0
+        while finished_jobs and (
+            len(finished_jobs) > settings.JOBS_RETENTION_MAX_COUNT or finished_jobs[0][0] <= retained_since
+        ):
+            _, job_id = finished_jobs.popleft()
+            job_entity = state["jobs"].pop(job_id)
+            state["jobs_index"].remove(job_id)
+            state["archive"].append(job_entity)
+            archived_jobs.setdefault(job_entity.node_id, set()).add(job_id)
+            archived_count += 1
+
+        # a single pass over the jobs of every affected node
+        for node_id, job_ids in archived_jobs.items():
+            if node_id in state["nodes"]:
+                node_entity = state["nodes"][node_id]
+                node_entity.jobs = [job_id for job_id in node_entity.jobs if job_id not in job_ids]
+
+        logger.info("Archived %s finished jobs", archived_count)
+        return archived_count
 
     @staticmethod
+    def _journal(state: StateType, undo: Callable[[], None], node_id: UUID | None = None):
+        if state["undo_log"] is not None:
+            state["undo_log"].record(undo, node_id)
+
+    @classmethod
+    def _rollback(cls, state: StateType, undo_log: UndoLog):
+        undo_log.rollback()
+        for node_id in undo_log.affected_nodes:
+            if node_id in state["nodes"]:
+                cls.refresh_threads_metadata(state, node_id)
+
+    @classmethod
+    @contextmanager
+    def transaction(cls, state: StateType, dry_run: bool = False) -> Iterator[UndoLog]:
+        """
+        All the changes made by the scheduler within the block are either kept together
+        or rolled back together if the block raises an exception.
+        The changes of the dry run are rolled back in any case, once the block is over.
+        """
+        if state["undo_log"] is not None:
+            raise RuntimeError("Nested scheduler transactions are not supported")
+
+        undo_log = state["undo_log"] = UndoLog()
+        try:
+            yield undo_log
+            if dry_run:
+                cls._rollback(state, undo_log)
+        except BaseException:
+            cls._rollback(state, undo_log)
+            raise
+        finally:
+            state["undo_log"] = None
+
+    @classmethod
+    def add_job(cls, state: StateType, job_entity: JobModel):
+        state["jobs"][job_entity.id] = job_entity
+        state["jobs_index"].add(job_entity.id, job_entity.status)
+
+        def undo():
+            del state["jobs"][job_entity.id]
+            state["jobs_index"].remove(job_entity.id)
+
+        cls._journal(state, undo)
+
+    @classmethod
+    def _set_job_time_window(cls, state: StateType, job_id: UUID, start_time: datetime):
+        job_entity = cls.get_job(state, job_id)
+        resources = state["nodes"][job_entity.node_id].metadata["resources"]
+        previous_window = (job_entity.expected_to_start_at, job_entity.expected_to_finish_at)
+        previous_window_reserved = job_id in resources
+
+        job_entity.expected_to_start_at = start_time
+        job_entity.expected_to_finish_at = start_time + timedelta(milliseconds=job_entity.total_run_time)
+        # no events are pushed: the status of the job is brought up to date by the caller (see '_advance_jobs')
+        cls._track_job(state, job_id)
+        resources.add(
+            job_id,
+            job_entity.expected_to_start_at,
+            job_entity.expected_to_finish_at,
+            job_entity.vcpu_units,
+            job_entity.memory,
+        )
+
+        def undo():
+            job_entity.expected_to_start_at, job_entity.expected_to_finish_at = previous_window
+            if previous_window_reserved:
+                resources.add(job_id, *previous_window, job_entity.vcpu_units, job_entity.memory)
+            else:
+                resources.discard(job_id)
+            if previous_window[0] is not None:
+                state["events"].push(job_id, *previous_window)
+
+        cls._journal(state, undo, job_entity.node_id)
+
+    @classmethod
+    def _replace_gap(cls, state: StateType, job_id: UUID, gap: tuple[datetime, datetime] | None):
+        """
+        Replace the idle interval before the job (see 'GapsIndex'), 'None' removes it.
+        """
+        gaps = state["gaps"]
+        previous_gap = gaps.discard(job_id)
+        if gap is not None:
+            gaps.add(job_id, *gap)
+
+        def undo():
+            gaps.discard(job_id)
+            if previous_gap is not None:
+                gaps.add(job_id, *previous_gap)
+
+        cls._journal(state, undo)
+
+    @classmethod
     def _append_new_job_to_node(
+        cls,
         state: StateType,
         node_id: UUID,
         job_id: UUID,
         thread_id: int,
         start_time: datetime | None,
     ):
-        state["nodes"][node_id].jobs.append(job_id)
-        state["nodes"][node_id].metadata["threads"][thread_id].append(job_id)
-        state["nodes"][node_id].metadata["total_active_jobs"] += 1
-        if not start_time:
-            state["nodes"][node_id].metadata["free_threads"] -= 1
-            start_time = datetime.now()
-
-        # update job entity
-        state["jobs"][job_id].node_id = node_id
-        state["jobs"][job_id].node_thread_id = thread_id
-        state["jobs"][job_id].expected_to_start_at = start_time
-        state["jobs"][job_id].expected_to_finish_at = start_time + timedelta(
-            milliseconds=state["jobs"][job_id].total_run_time
+        node_entity = state["nodes"][node_id]
+        job_entity = state["jobs"][job_id]
+        previous_placement = (job_entity.node_id, job_entity.node_thread_id, job_entity.status)
+        takes_free_thread = not start_time
+
+        node_entity.jobs.append(job_id)
+        node_entity.metadata["threads"][thread_id].append(job_id)
+        node_entity.metadata["total_active_jobs"] += 1
+        if takes_free_thread:
+            node_entity.metadata["free_threads"] -= 1
+            start_time = cls.now(state)
+
+        def undo():
+            node_entity.jobs.pop()
+            node_entity.metadata["threads"][thread_id].pop()
+            node_entity.metadata["total_active_jobs"] -= 1
+            if takes_free_thread:
+                node_entity.metadata["free_threads"] += 1
+            job_entity.node_id, job_entity.node_thread_id, previous_status = previous_placement
+            cls._set_job_status(state, job_entity, previous_status)
+
+        cls._journal(state, undo, node_id)
+
+        # update job entity (the job moved from another node waits for its start as well)
+        job_entity.node_id = node_id
+        job_entity.node_thread_id = thread_id
+        cls._set_job_status(state, job_entity, JobStatus.SCHEDULED)
+        cls._set_job_time_window(state, job_id, start_time)
+
+    @classmethod
+    def _insert_job_into_gap(cls, state: StateType, next_job_id: UUID, job_id: UUID, start_time: datetime):
+        """
+        Put the job into the idle gap before the given job, the rest of the gap (if any) is left for the other jobs.
+        """
+        next_job_entity = state["jobs"][next_job_id]
+        node_id, thread_id = next_job_entity.node_id, next_job_entity.node_thread_id
+        node_entity = state["nodes"][node_id]
+        thread = node_entity.metadata["threads"][thread_id]
+        job_entity = state["jobs"][job_id]
+        previous_placement = (job_entity.node_id, job_entity.node_thread_id, job_entity.status)
+
+        node_entity.jobs.append(job_id)
+        thread.insert_before(next_job_id, job_id)
+        node_entity.metadata["total_active_jobs"] += 1
+
+        def undo():
+            node_entity.jobs.pop()
+            thread.remove(job_id)
+            node_entity.metadata["total_active_jobs"] -= 1
+            job_entity.node_id, job_entity.node_thread_id, previous_status = previous_placement
+            cls._set_job_status(state, job_entity, previous_status)
+
+        cls._journal(state, undo, node_id)
+
+        job_entity.node_id = node_id
+        job_entity.node_thread_id = thread_id
+        cls._set_job_status(state, job_entity, JobStatus.SCHEDULED)
+        _, gap_finish = state["gaps"].get(next_job_id)
+        cls._replace_gap(
+            state, next_job_id, (start_time + timedelta(milliseconds=job_entity.total_run_time), gap_finish)
         )
+        cls._set_job_time_window(state, job_id, start_time)
+
+    @classmethod
+    def _find_gap(cls, state: StateType, job_id: UUID) -> tuple[UUID, datetime] | None:
+        """
+        The earliest idle gap the job fits into (both in time and in the node resources) without moving
+        the job after the gap. Returns (the job after the gap, the start time of the job), 'None' if there is none.
+        """
+        job_entity = state["jobs"][job_id]
+
+        def fits(next_job_id: UUID, start_time: datetime) -> bool:
+            node_entity = state["nodes"].get(state["jobs"][next_job_id].node_id)
+            if node_entity is None or node_entity.metadata["cordoned"]:  # the node being drained or removed
+                return False
+            return node_entity.metadata["total_active_jobs"] < node_entity.max_total_jobs and (
+                cls._check_resources_availability(state, job_id, node_entity.id, start_time)
+            )
+
+        return state["gaps"].find(timedelta(milliseconds=job_entity.total_run_time), cls.now(state), fits)
+
+    @staticmethod
+    def _sync_resources(state: StateType, node_entity: NodeModel):
+        """
+        Bring the resources profile of the node in line with the time windows shifted since it was used the last time.
+        """
+        resources = node_entity.metadata["resources"]
+        for thread in node_entity.metadata["threads"]:
+            for job_id in thread.take_shifted():
+                job_entity = JobsScheduler.get_job(state, job_id)
+                resources.add(
+                    job_id,
+                    job_entity.expected_to_start_at,
+                    job_entity.expected_to_finish_at,
+                    job_entity.vcpu_units,
+                    job_entity.memory,
+                )
 
     @staticmethod
+    @RESOURCES_CHECK_SECONDS.timed
     def _check_resources_availability(
-        state: StateType, job_id: UUID, node_id: UUID, destined_thread: int, node_available_at: datetime | None
+        state: StateType, job_id: UUID, node_id: UUID, node_available_at: datetime | None
     ) -> bool:
         """
         This function is used to check the available amount of vCPU and memory
@@ -145,101 +593,190 @@ class JobsScheduler:
 
         job = state["jobs"][job_id]
         parent_node = state["nodes"][node_id]
+        JobsScheduler._sync_resources(state, parent_node)
 
-        threads = copy.deepcopy(parent_node.metadata["threads"])
-        threads.pop(destined_thread)
-        intersected_jobs_in_threads = [[] for _ in range(len(threads))]
-        max_used_resources_per_thread = []
-
-        for thread_id in range(len(threads)):
-            for job_uuid in threads[thread_id]:
-                expected_to_start_at = node_available_at if node_available_at else datetime.now()
-                expected_to_finish_at = expected_to_start_at + timedelta(milliseconds=job.total_run_time)
-
-                if datetimes_intersection(
-                    expected_to_start_at,
-                    expected_to_finish_at,
-                    state["jobs"][job_uuid].expected_to_start_at,
-                    state["jobs"][job_uuid].expected_to_finish_at,
-                ):
-                    intersected_jobs_in_threads[thread_id].append(state["jobs"][job_uuid])
-
-            if intersected_jobs_in_threads[thread_id]:
-                max_used_cpu = max(obj.vcpu_units for obj in intersected_jobs_in_threads[thread_id])
-            else:
-                max_used_cpu = 0
+        expected_to_start_at = node_available_at if node_available_at else JobsScheduler.now(state)
+        expected_to_finish_at = expected_to_start_at + timedelta(milliseconds=job.total_run_time)
+        used_cpu, used_memory = parent_node.metadata["resources"].peak(expected_to_start_at, expected_to_finish_at)
 
-            if intersected_jobs_in_threads[thread_id]:
-                max_used_memory = max(obj.memory for obj in intersected_jobs_in_threads[thread_id])
-            else:
-                max_used_memory = 0
+        return used_cpu + job.vcpu_units <= parent_node.vcpu_units and used_memory + job.memory <= parent_node.memory
 
-            Resources = namedtuple("Resources", ["cpu", "memory"])
-            max_used_resources_per_thread.append(Resources(max_used_cpu, max_used_memory))
+    @classmethod
+    @PLACEMENT_SECONDS.timed
+    def _place_job(cls, state: StateType, job_id: UUID) -> datetime | None:
+        """
+        Put the job on the node chosen by the placement strategy.
+        Returns the time the node is available at ('None' means right away).
+        """
+        if settings.SCHEDULER_BACKFILL:
+            # the jobs which fit into the idle gaps are put there first, the gaps would be wasted otherwise
+            gap = cls._find_gap(state, job_id)
+            if gap is not None:
+                next_job_id, start_time = gap
+                cls._insert_job_into_gap(state, next_job_id, job_id, start_time)
+                cls.refresh_threads_metadata(state, state["jobs"][job_id].node_id)
+                return start_time
+
+        placement_strategy = PLACEMENT_STRATEGIES[settings.PLACEMENT_STRATEGY]
+        job_entity = state["jobs"][job_id]
 
-        total_used_cpu = sum(item.cpu for item in max_used_resources_per_thread) + state["jobs"][job_id].vcpu_units
-        total_used_memory = sum(item.memory for item in max_used_resources_per_thread) + state["jobs"][job_id].memory
+        def fits(node_id: UUID, node_available_at: datetime | None) -> bool:
+            return cls._check_resources_availability(state, job_id, node_id, node_available_at)
 
-        return total_used_cpu <= parent_node.vcpu_units and total_used_memory <= parent_node.memory
+        # the shards are tried one by one, the most promising first, until some node of the shard takes the job
+        shards = (
+            state["nodes_index"].route()
+            if settings.DISABLE_RESOURCES_CHECKS
+            else state["nodes_index"].route(job_entity.vcpu_units, job_entity.memory)
+        )
+        now = cls.now(state)
+        node = next(
+            filter(None, (placement_strategy.find_node(state, shard, job_entity, fits, now) for shard in shards)), None
+        )
+        if not node:
+            raise NoAvailableNodesLeftException
+
+        node_id, node_available_at = node
+        thread_id = state["nodes"][node_id].metadata["best_fit_thread"]["thread_id"]
+        cls._append_new_job_to_node(state, node_id, job_id, thread_id, node_available_at)
+        cls.refresh_threads_metadata(state, node_id)
+        return node_available_at
 
     @classmethod
-    async def schedule_job(cls, state: StateType, job_id: UUID):
-        Node = namedtuple("Node", ["id", "thread_id", "available_at"])
-        nodes_availability = []
+    def schedule_job(cls, state: StateType, job_id: UUID):
+        cls._place_job(state, job_id)
+        cls._advance_jobs(state, [job_id], cls.now(state))
 
-        for node_id, node_entity in state["nodes"].items():
-            if node_entity.metadata["total_active_jobs"] < node_entity.max_total_jobs:
-                thread_id = node_entity.metadata["best_fit_thread"]["thread_id"]
-                node_available_at = node_entity.metadata["best_fit_thread"]["available_at"]
+    @staticmethod
+    def _check_batch_admission(state: StateType, job_ids: list[UUID]):
+        """
+        Reject the batch before placing any of its jobs when it can not be placed for sure:
+        there are less job slots left on all nodes than jobs in the batch or some job
+        requires more resources than any node has. Only the summaries of the shards are looked at.
+        """
+        summary = state["nodes_index"].summary()
+        if len(job_ids) > summary.free_slots:
+            raise NoAvailableNodesLeftException
 
-                if cls._check_resources_availability(state, job_id, node_id, thread_id, node_available_at):
-                    if not node_available_at:
-                        cls._append_new_job_to_node(state, node_id, job_id, thread_id, node_available_at)
-                        await cls.refresh_threads_metadata(state, node_id)
-                        return
+        if settings.DISABLE_RESOURCES_CHECKS:
+            return
 
-                    nodes_availability.append(Node(node_id, thread_id, node_available_at))
+        for job_id in job_ids:
+            job_entity = state["jobs"][job_id]
+            if job_entity.vcpu_units > summary.max_vcpu_units or job_entity.memory > summary.max_memory:
+                raise NoAvailableNodesLeftException
 
-        if not nodes_availability:
-            raise NoAvailableNodesLeftException
+    @classmethod
+    def schedule_jobs(cls, state: StateType, job_ids: list[UUID]):
+        """
+        Place the batch of jobs (in the given order) in a single pass: the node capacities are
+        checked once for the whole batch and the job statuses are not refreshed in between.
+        If some job can not be placed NoAvailableNodesLeftException is raised and the jobs placed
+        before it are left on their nodes, so the batch is expected to be placed within a transaction.
+        """
+        BATCH_SIZE.observe(len(job_ids))
+        cls._check_batch_admission(state, job_ids)
+
+        for job_id in job_ids:
+            cls._place_job(state, job_id)
+
+        # bring the statuses of the jobs started right away up to date (the rest of the state is fresh already)
+        cls._advance_jobs(state, job_ids, cls.now(state))
+
+    @classmethod
+    def _cordon_node(cls, state: StateType, node_id: UUID) -> list[UUID]:
+        """
+        Take the active jobs off the node and keep the new jobs from going to it.
+        Returns the ids of the jobs taken off, to be placed on the other nodes.
+        """
+        node_entity = state["nodes"][node_id]
+        metadata, jobs = node_entity.metadata, node_entity.jobs
+        job_ids = [cls.get_job(state, job_id).id for thread in metadata["threads"] for job_id in thread]
+
+        active_jobs = set(job_ids)
+        node_entity.metadata = cls.init_node_metadata(node_entity.max_concurrent_jobs)
+        node_entity.metadata["cordoned"] = True
+        node_entity.jobs = [job_id for job_id in jobs if job_id not in active_jobs]
 
-        nodes_availability.sort(key=lambda x: x.available_at)
-        node = nodes_availability[0]
-        cls._append_new_job_to_node(state, node.id, job_id, node.thread_id, node.available_at)
-        await cls.update_jobs(state)
-        await cls.refresh_threads_metadata(state, node.id)
+        def undo():
+            node_entity.metadata, node_entity.jobs = metadata, jobs
+
+        cls._journal(state, undo, node_id)
+        # the gaps before the jobs go along with their threads (the jobs are placed anew)
+        for job_id in job_ids:
+            if job_id in state["gaps"]:
+                cls._replace_gap(state, job_id, None)
+        cls.refresh_threads_metadata(state, node_id)
+        return job_ids
+
+    @classmethod
+    def uncordon_node(cls, state: StateType, node_id: UUID):
+        state["nodes"][node_id].metadata["cordoned"] = False
+        cls.refresh_threads_metadata(state, node_id)
+
+    @classmethod
+    def drain_nodes(cls, state: StateType, node_ids: list[UUID]) -> list[UUID]:
+        """
+        Cordon the nodes and move all their jobs to the other nodes in a single batch placement pass,
+        in order of their start (so the running jobs are placed first). If some job can not be placed
+        NoAvailableNodesLeftException is raised, so the nodes are expected to be drained within a transaction.
+        Returns the ids of the moved jobs.
+        """
+        job_ids = []
+        for node_id in dict.fromkeys(node_ids):
+            job_ids.extend(cls._cordon_node(state, node_id))
+
+        job_ids.sort(key=lambda job_id: state["jobs"][job_id].expected_to_start_at)
+        cls.schedule_jobs(state, job_ids)
+        return job_ids
 
     @classmethod
-    async def handle_job_termination(cls, state: StateType, job_id: UUID, previous_status: JobStatus):
+    def handle_job_termination(cls, state: StateType, job_id: UUID):
+        """
+        Terminate the active job: remove it from its thread and move the following jobs up to take its place.
+        The following jobs are shifted lazily (see 'ThreadTimeline'), so it takes O(log n)
+        regardless of the number of the jobs queued on the thread.
+
+        In the backfill mode (see 'SCHEDULER_BACKFILL') the following jobs keep their time windows instead,
+        and the time freed up is left as an idle gap for the jobs which fit into it.
+        All the changes are journaled, so the termination is rolled back along with the transaction it is made in.
+        """
         job_entity = state["jobs"][job_id]
+        previous_status = job_entity.status
+        cls._set_job_status(state, job_entity, JobStatus.TERMINATED)
+        cls._journal(state, lambda: cls._set_job_status(state, job_entity, previous_status), job_entity.node_id)
+
         jobs_thread = state["nodes"][job_entity.node_id].metadata["threads"][job_entity.node_thread_id]
-        job_index = jobs_thread.index(job_id)
-        jobs_to_reschedule = jobs_thread[job_index + 1 :]
-        remaining_jobs = jobs_thread[:job_index]
+        next_job_id = jobs_thread.next(job_id)
+        previous_job_id = jobs_thread.previous(job_id)
 
         logger.debug("Terminated job: %s", job_entity)
-        logger.debug("Jobs to reschedule: %s", jobs_to_reschedule)
 
-        if not jobs_to_reschedule:
-            return
+        now = cls.now(state)
+        if next_job_id is not None:
+            if previous_status == JobStatus.RUNNING or previous_job_id is None:
+                starting_point = now
+            else:
+                starting_point = cls.get_job(state, previous_job_id).expected_to_finish_at
 
-        if previous_status == JobStatus.RUNNING or not remaining_jobs:
-            starting_point = datetime.now()
-            new_status = JobStatus.RUNNING
-        else:
-            starting_point = remaining_jobs[-1].expected_to_finish_at
-            new_status = JobStatus.SCHEDULED
+            next_job_start = cls.get_job(state, next_job_id).expected_to_start_at
+            if settings.SCHEDULER_BACKFILL:
+                cls._replace_gap(state, next_job_id, (starting_point, next_job_start))
+            else:
+                delta = starting_point - next_job_start
+                jobs_thread.shift(next_job_id, delta)
+                cls._journal(state, lambda: jobs_thread.shift(next_job_id, -delta), job_entity.node_id)
 
-        for job in jobs_to_reschedule:
-            state["jobs"][job].expected_to_start_at = starting_point
-            state["jobs"][job].expected_to_finish_at = starting_point + timedelta(
-                milliseconds=state["jobs"][job].total_run_time
-            )
-            starting_point = state["jobs"][job].expected_to_finish_at
+        cls._detach_job(state, job_id, now)
 
-        state["jobs"][jobs_to_reschedule[0]].status = new_status
-        state["nodes"][job_entity.node_id].metadata["threads"][job_entity.node_thread_id] = (
-            remaining_jobs + jobs_to_reschedule
-        )
-        await cls.update_jobs(state)
-        await cls.refresh_threads_metadata(state, job_entity.node_id)
+        if next_job_id is not None:
+            if state["changes"] is not None and not settings.SCHEDULER_BACKFILL:
+                # the shifted jobs are written to the database as they are, so they are materialized right away
+                for job in (next_job_id, *jobs_thread.following(next_job_id)):
+                    cls.get_job(state, job)
+                    cls._track_job(state, job)
+
+            # the next job starts right away if the terminated job was running
+            cls._advance_jobs(state, [next_job_id], now)
+
+        cls.refresh_threads_metadata(state, job_entity.node_id)
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from app.database import NodeModel, state
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.enums.jobs import JobStatus
+from app.utils.metrics import HISTOGRAMS, render_gauge
+
+
+def _count_waiting_jobs(node_entity: NodeModel, now: datetime) -> int:
+    """
+    The jobs of the node expected to start after 'now'. The jobs of a thread run one after another,
+    so all of them wait but the first one, which waits as well unless it has started (e.g. behind a backfill gap).
+    """
+    waiting_jobs = 0
+    for thread in node_entity.metadata["threads"]:
+        if thread:
+            started = JobsScheduler.get_job(state, thread.first()).expected_to_start_at <= now
+            waiting_jobs += len(thread) - started
+    return waiting_jobs
+
+
+def render_metrics() -> str:
+    """
+    The metrics of the scheduler in the Prometheus text format: the histograms are observed on the hot path,
+    the gauges are read off the state only now, so they cost nothing in between of the scrapes.
+    """
+    JobsScheduler.update_jobs(state)
+    now = JobsScheduler.now(state)
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    lines.extend(
+        render_gauge(
+            "scheduler_jobs",
+            "Jobs in the hot state by status.",
+            (({"status": status.value}, state["jobs_index"].count(status)) for status in JobStatus),
+        )
+    )
+    lines.extend(
+        render_gauge("scheduler_events_queue_depth", "Upcoming job start/finish events.", [({}, len(state["events"]))])
+    )
+
+    nodes = list(state["nodes"].values())
+    lines.extend(
+        render_gauge(
+            "scheduler_node_active_jobs",
+            "Scheduled and running jobs of the node.",
+            (({"node_id": str(node.id)}, node.metadata["total_active_jobs"]) for node in nodes),
+        )
+    )
+    lines.extend(
+        render_gauge(
+            "scheduler_node_free_threads",
+            "Threads of the node without any jobs.",
+            (({"node_id": str(node.id)}, node.metadata["free_threads"]) for node in nodes),
+        )
+    )
+    lines.extend(
+        render_gauge(
+            "scheduler_node_queue_depth",
+            "Jobs of the node waiting for their start.",
+            (({"node_id": str(node.id)}, _count_waiting_jobs(node, now)) for node in nodes),
+        )
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, Iterator
+from uuid import UUID
+
+from app.config import get_settings
+from app.database import JobModel, StateType
+from app.utils.enums.scheduler import PlacementStrategy
+from app.utils.nodes_index import NodesIndex
+
+settings = get_settings()
+
+# (node_id, node_available_at) -> whether the job fits into the node at that time
+FitsCheck = Callable[[UUID, datetime | None], bool]
+Placement = tuple[UUID, datetime | None]
+
+
+class BasePlacementStrategy(ABC):
+    """
+    Policy choosing the node for a new job out of the nodes index (of the shard chosen for the job).
+    The job always goes to the best fit thread of the chosen node.
+    'now' is the moment the job is placed as of (see 'JobsScheduler.now').
+    """
+
+    @classmethod
+    @abstractmethod
+    def find_node(
+        cls, state: StateType, nodes_index: NodesIndex, job: JobModel, fits: FitsCheck, now: datetime
+    ) -> Placement | None:
+        pass
+
+    @staticmethod
+    def _free_nodes_by_resources(nodes_index: NodesIndex, job: JobModel, descending: bool = False) -> Iterator[UUID]:
+        """
+        The free nodes by the resources left unused, only the ones having enough of them for the job
+        unless the resources checks are disabled.
+        """
+        if settings.DISABLE_RESOURCES_CHECKS:
+            return (node_id for node_id, _, _ in nodes_index.free_nodes_by_resources(descending=descending))
+
+        return (
+            node_id
+            for node_id, _, memory in nodes_index.free_nodes_by_resources(
+                min_vcpu=job.vcpu_units, descending=descending
+            )
+            if memory >= job.memory
+        )
+
+    @staticmethod
+    def _queue(nodes_index: NodesIndex, fits: FitsCheck) -> Placement | None:
+        """
+        Queue the job on the busy node which becomes available first.
+        """
+        for node_id, node_available_at in nodes_index.busy_nodes():
+            if fits(node_id, node_available_at):
+                return node_id, node_available_at
+
+        return None
+
+
+class EarliestStartStrategy(BasePlacementStrategy):
+    @classmethod
+    def find_node(
+        cls, state: StateType, nodes_index: NodesIndex, job: JobModel, fits: FitsCheck, now: datetime
+    ) -> Placement | None:
+        # the node with a free thread takes the job right away
+        for node_id in nodes_index.free_nodes():
+            if fits(node_id, None):
+                return node_id, None
+
+        # otherwise the job is queued on the node which becomes available first
+        return cls._queue(nodes_index, fits)
+
+
+class BestFitStrategy(BasePlacementStrategy):
+    @classmethod
+    def find_node(
+        cls, state: StateType, nodes_index: NodesIndex, job: JobModel, fits: FitsCheck, now: datetime
+    ) -> Placement | None:
+        for node_id in cls._free_nodes_by_resources(nodes_index, job):
+            if fits(node_id, None):
+                return node_id, None
+
+        return cls._queue(nodes_index, fits)
+
+
+class WorstFitStrategy(BasePlacementStrategy):
+    @classmethod
+    def find_node(
+        cls, state: StateType, nodes_index: NodesIndex, job: JobModel, fits: FitsCheck, now: datetime
+    ) -> Placement | None:
+        for node_id in cls._free_nodes_by_resources(nodes_index, job, descending=True):
+            if fits(node_id, None):
+                return node_id, None
+
+        return cls._queue(nodes_index, fits)
+
+
+class WeightedScoreStrategy(BasePlacementStrategy):
+    """
+    Scores the first 'PLACEMENT_SCORE_CANDIDATES' fitting nodes in order of their availability
+    by the waiting time and the share of resources left unused (the lower the better).
+    Negative resources weights turn packing into spreading.
+    """
+
+    @staticmethod
+    def _candidates(nodes_index: NodesIndex, fits: FitsCheck) -> Iterator[Placement]:
+        nodes = chain(
+            ((node_id, None) for node_id in nodes_index.free_nodes()),
+            nodes_index.busy_nodes(),
+        )
+        return islice(
+            ((node_id, available_at) for node_id, available_at in nodes if fits(node_id, available_at)),
+            settings.PLACEMENT_SCORE_CANDIDATES,
+        )
+
+    @classmethod
+    def find_node(
+        cls, state: StateType, nodes_index: NodesIndex, job: JobModel, fits: FitsCheck, now: datetime
+    ) -> Placement | None:
+        def score(placement: Placement) -> float:
+            node_id, available_at = placement
+            node_entity = state["nodes"][node_id]
+            vcpu, memory = nodes_index.free_resources(node_id)
+            waiting_time = (available_at - now).total_seconds() if available_at else 0
+
+            return (
+                settings.PLACEMENT_SCORE_WAIT_WEIGHT * max(waiting_time, 0)
+                + settings.PLACEMENT_SCORE_VCPU_WEIGHT * (vcpu - job.vcpu_units) / node_entity.vcpu_units
+                + settings.PLACEMENT_SCORE_MEMORY_WEIGHT * (memory - job.memory) / node_entity.memory
+            )
+
+        return min(cls._candidates(nodes_index, fits), key=score, default=None)
+
+
+PLACEMENT_STRATEGIES: dict[PlacementStrategy, type[BasePlacementStrategy]] = {
+    PlacementStrategy.EARLIEST_START: EarliestStartStrategy,
+    PlacementStrategy.BEST_FIT: BestFitStrategy,
+    PlacementStrategy.WORST_FIT: WorstFitStrategy,
+    PlacementStrategy.WEIGHTED_SCORE: WeightedScoreStrategy,
+}
@@ -0,0 +1,188 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import (
+    BigInteger,
+    bindparam,
+    Column,
+    DateTime,
+    delete,
+    Index,
+    insert,
+    Integer,
+    MetaData,
+    select,
+    String,
+    Table,
+    update,
+    Uuid,
+)
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import get_settings
+from app.database import JobModel, NodeModel, StateType
+from app.utils.change_set import ChangeSet
+from app.utils.enums.jobs import JobStatus
+
+settings = get_settings()
+
+ACTIVE_STATUSES = (JobStatus.SCHEDULED.value, JobStatus.RUNNING.value)
+
+
+# =====================================
+#                Tables
+# =====================================
+metadata = MetaData()
+
+nodes_table = Table(
+    "nodes",
+    metadata,
+    Column("position", Integer, primary_key=True, autoincrement=True),  # order of provisioning
+    Column("id", Uuid, nullable=False, unique=True),
+    Column("max_concurrent_jobs", Integer, nullable=False),
+    Column("max_total_jobs", Integer, nullable=False),
+    Column("vcpu_units", Integer, nullable=False),
+    Column("memory", Integer, nullable=False),
+)
+
+jobs_table = Table(
+    "jobs",
+    metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("total_run_time", BigInteger, nullable=False),
+    Column("vcpu_units", Integer, nullable=False),
+    Column("memory", Integer, nullable=False),
+    Column("node_id", Uuid, index=True),
+    Column("node_thread_id", Integer),
+    Column("expected_to_start_at", DateTime),
+    Column("expected_to_finish_at", DateTime),
+    Column("status", String(16), nullable=False),
+    # active jobs lookup on start up, finished jobs lookup by the time of finish
+    Index("ix_jobs_status_expected_to_finish_at", "status", "expected_to_finish_at"),
+)
+
+JOB_UPDATABLE_COLUMNS = ("node_id", "node_thread_id", "expected_to_start_at", "expected_to_finish_at", "status")
+
+# executed once per batch with a list of parameters (executemany), the parameters can not be named after columns
+update_job_statement = (
+    update(jobs_table)
+    .where(jobs_table.c.id == bindparam("job_id"))
+    .values({column: bindparam(f"new_{column}") for column in JOB_UPDATABLE_COLUMNS})
+)
+
+
+# =====================================
+#          Engine & operations
+# =====================================
+@lru_cache()
+def get_engine() -> AsyncEngine:
+    """
+    The engine keeps a pool of async connections shared by all requests.
+    """
+    options: dict[str, Any] = {"echo": settings.echo_sql, "pool_pre_ping": True}
+    if not settings.database_url.startswith("sqlite"):
+        options.update(pool_size=settings.DATABASE_POOL_SIZE, max_overflow=settings.DATABASE_MAX_OVERFLOW)
+
+    return create_async_engine(settings.database_url, **options)
+
+
+async def create_tables(engine: AsyncEngine) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(metadata.create_all)
+
+
+def _node_row(node_entity: NodeModel) -> dict[str, Any]:
+    return {
+        "id": node_entity.id,
+        "max_concurrent_jobs": node_entity.max_concurrent_jobs,
+        "max_total_jobs": node_entity.max_total_jobs,
+        "vcpu_units": node_entity.vcpu_units,
+        "memory": node_entity.memory,
+    }
+
+
+def _job_row(job_entity: JobModel) -> dict[str, Any]:
+    return {
+        "id": job_entity.id,
+        "total_run_time": job_entity.total_run_time,
+        "vcpu_units": job_entity.vcpu_units,
+        "memory": job_entity.memory,
+        "node_id": job_entity.node_id,
+        "node_thread_id": job_entity.node_thread_id,
+        "expected_to_start_at": job_entity.expected_to_start_at,
+        "expected_to_finish_at": job_entity.expected_to_finish_at,
+        "status": job_entity.status.value,
+    }
+
+
+def _job_update_parameters(job_entity: JobModel) -> dict[str, Any]:
+    row = _job_row(job_entity)
+    return {"job_id": job_entity.id, **{f"new_{column}": row[column] for column in JOB_UPDATABLE_COLUMNS}}
+
+
+async def save_changes(engine: AsyncEngine, state: StateType) -> None:
+    """
+    Write the entities changed since the previous call (see ChangeSet) within a single
+    database transaction: one bulk statement per kind of change.
+    The entities which are no longer in the state (rolled back or archived) are skipped.
+    """
+    if not state["changes"]:
+        return
+
+    # the changes made while the statements are executed are left for the next call
+    changes, state["changes"] = state["changes"], ChangeSet()
+
+    new_nodes = [_node_row(state["nodes"][node_id]) for node_id in changes.new_nodes if node_id in state["nodes"]]
+    new_jobs = [_job_row(state["jobs"][job_id]) for job_id in changes.new_jobs if job_id in state["jobs"]]
+    updated_jobs = [
+        _job_update_parameters(state["jobs"][job_id])
+        for job_id in changes.updated_jobs
+        if job_id in state["jobs"] and job_id not in changes.new_jobs
+    ]
+
+    try:
+        async with engine.begin() as connection:
+            if new_nodes:
+                await connection.execute(insert(nodes_table), new_nodes)
+            if new_jobs:
+                await connection.execute(insert(jobs_table), new_jobs)
+            if updated_jobs:
+                await connection.execute(update_job_statement, updated_jobs)
+            if changes.removed_nodes:
+                await connection.execute(delete(nodes_table).where(nodes_table.c.id.in_(list(changes.removed_nodes))))
+    except BaseException:
+        # nothing is written, so everything is retried by the next call
+        state["changes"].update(changes)
+        raise
+
+
+async def load_nodes(engine: AsyncEngine) -> list[RowMapping]:
+    async with engine.connect() as connection:
+        result = await connection.execute(select(nodes_table).order_by(nodes_table.c.position))
+        return list(result.mappings())
+
+
+async def load_active_jobs(engine: AsyncEngine, now: datetime) -> list[JobModel]:
+    """
+    The scheduled and running jobs. The ones which are finished by now (e.g. while the service
+    was down) are marked as done in the database instead.
+    """
+    async with engine.begin() as connection:
+        await connection.execute(
+            update(jobs_table)
+            .where(jobs_table.c.status.in_(ACTIVE_STATUSES), jobs_table.c.expected_to_finish_at <= now)
+            .values(status=JobStatus.DONE.value)
+        )
+        result = await connection.execute(select(jobs_table).where(jobs_table.c.status.in_(ACTIVE_STATUSES)))
+        return [JobModel(**{**row, "status": JobStatus(row["status"])}) for row in result.mappings()]
+
+
+async def load_job(engine: AsyncEngine, job_id: UUID) -> JobModel | None:
+    async with engine.connect() as connection:
+        result = await connection.execute(select(jobs_table).where(jobs_table.c.id == job_id))
+        row = result.mappings().first()
+
+    return JobModel(**{**row, "status": JobStatus(row["status"])}) if row else None
@@ -0,0 +1,23 @@
+from uuid import UUID
+
+
+class ChangeSet:
+    """
+    Ids of the entities changed since the last write to the persistent storage,
+    so only they are written (in bulk) instead of the whole state.
+    """
+
+    def __init__(self) -> None:
+        self.new_nodes: dict[UUID, None] = {}
+        self.removed_nodes: dict[UUID, None] = {}
+        self.new_jobs: dict[UUID, None] = {}
+        self.updated_jobs: dict[UUID, None] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.new_nodes or self.removed_nodes or self.new_jobs or self.updated_jobs)
+
+    def update(self, other: "ChangeSet") -> None:
+        self.new_nodes.update(other.new_nodes)
+        self.removed_nodes.update(other.removed_nodes)
+        self.new_jobs.update(other.new_jobs)
+        self.updated_jobs.update(other.updated_jobs)
@@ -0,0 +1,64 @@
+"""
+The time source of the scheduler: the system time by default, the virtual time of the simulations
+(see 'benchmarks.simulate') and of the tests, which advance it instead of sleeping.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator
+
+
+class Clock(ABC):
+    @abstractmethod
+    def now(self) -> datetime:
+        pass
+
+
+class SystemClock(Clock):
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class VirtualClock(Clock):
+    """
+    The time which only moves when it is told to (and only forwards).
+    """
+
+    def __init__(self, start: datetime | None = None) -> None:
+        self._now = start or datetime.now()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def advance(self, delta: timedelta) -> None:
+        self.set(self._now + delta)
+
+    def set(self, moment: datetime) -> None:
+        if moment < self._now:
+            raise ValueError("The virtual time can not go backwards")
+        self._now = moment
+
+
+_clock: Clock = SystemClock()
+
+
+def now() -> datetime:
+    return _clock.now()
+
+
+def get_clock() -> Clock:
+    return _clock
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """
+    Make the given clock the time source of the process within the block.
+    """
+    global _clock
+    previous_clock, _clock = _clock, clock
+    try:
+        yield clock
+    finally:
+        _clock = previous_clock
@@ -15,3 +15,19 @@ class JobAlreadyTerminatedOrDoneException(HTTPException):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The job is already terminated or done.",
         )
+
+
+class NodeNotFoundException(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The node is not found.",
+        )
+
+
+class JobNotFoundException(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The job is not found.",
+        )
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class EmbeddedJobs(str, Enum):
+    FULL = "full"  # the node jobs are embedded as a whole
+    IDS = "ids"  # only the ids of the node jobs are embedded
+    NONE = "none"  # the node jobs are omitted
+
+
+class DrainAction(str, Enum):
+    REMOVE = "remove"  # the drained nodes are removed
+    CORDON = "cordon"  # the drained nodes are kept, but no new jobs go to them
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class PlacementStrategy(str, Enum):
+    EARLIEST_START = "earliest_start"  # first node with a free thread, otherwise the one available first
+    BEST_FIT = "best_fit"  # bin packing: the free node with the least vCPU/memory left
+    WORST_FIT = "worst_fit"  # spreading: the free node with the most vCPU/memory left
+    WEIGHTED_SCORE = "weighted_score"  # the lowest weighted score of the waiting time and leftover resources
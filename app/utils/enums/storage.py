@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class StorageBackend(str, Enum):
+    MEMORY = "memory"  # the state lives in the process memory only
+    SQL = "sql"  # the state is written through to the SQL database ('database_url')
+    WAL = "wal"  # the changes are appended to the write-ahead log, compacted into snapshots ('WAL_DIRECTORY')
@@ -0,0 +1,43 @@
+import heapq
+import itertools
+from datetime import datetime
+from uuid import UUID
+
+
+class JobEventsQueue:
+    """
+    Min-heap of the upcoming job lifecycle instants (expected start and finish times).
+
+    Entries are never updated in place: when the job's time window is changed
+    the new instants are pushed once again and the outdated ones are simply
+    re-evaluated against the actual job data once they are due.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, int, UUID]] = []
+        self._counter = itertools.count()  # tie-breaker, UUIDs are not meant to be compared
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, job_id: UUID, *instants: datetime) -> None:
+        for instant in instants:
+            heapq.heappush(self._heap, (instant, next(self._counter), job_id))
+
+    def is_due(self, now: datetime) -> bool:
+        return bool(self._heap) and self._heap[0][0] <= now
+
+    def pop_due(self, now: datetime) -> list[UUID]:
+        """
+        Pop all events which are due at the given moment and return
+        the ids of affected jobs (in order of the events, without duplicates).
+        """
+        due_jobs: dict[UUID, None] = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, _, job_id = heapq.heappop(self._heap)
+            due_jobs[job_id] = None
+
+        return list(due_jobs)
+
+    def clear(self) -> None:
+        self._heap.clear()
@@ -0,0 +1,97 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import UUID
+
+from app.utils.sorted_list import SortedList
+
+
+class GapsIndex:
+    """
+    The idle intervals of the node threads left between the queued jobs (see 'SCHEDULER_BACKFILL'),
+    in order of their start.
+
+    An interval is keyed by the job right after it: it lasts from the finish of the previous job of the thread
+    (or the moment it was freed up) till the start of that job, so the node and the thread of the interval
+    are the ones of the job.
+
+    The intervals are sorted by their length, so the ones too short for the job are not even looked at,
+    and by their finish, so the ones which are over are dropped without a scan.
+    """
+
+    def __init__(self) -> None:
+        self._sequence = itertools.count()  # tie-breaker, UUIDs are not meant to be compared
+        self._entries: dict[UUID, tuple[datetime, datetime, int, UUID]] = {}  # job_id -> (start, finish, seq, job_id)
+        self._by_length = SortedList()  # (length, start, finish, seq, job_id)
+        self._by_finish = SortedList()  # (finish, seq, job_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, job_id: UUID) -> bool:
+        return job_id in self._entries
+
+    def get(self, job_id: UUID) -> tuple[datetime, datetime] | None:
+        """
+        The (start, finish) of the interval before the job, 'None' if there is none.
+        """
+        entry = self._entries.get(job_id)
+        return None if entry is None else entry[:2]
+
+    def add(self, job_id: UUID, start: datetime, finish: datetime) -> None:
+        """
+        Put the interval before the job (replacing the previous one, if any). Empty intervals are not kept.
+        """
+        self.discard(job_id)
+        if start < finish:
+            entry = (start, finish, next(self._sequence), job_id)
+            self._entries[job_id] = entry
+            self._by_length.add((finish - start, *entry))
+            self._by_finish.add(entry[1:])
+
+    def discard(self, job_id: UUID) -> tuple[datetime, datetime] | None:
+        """
+        Remove the interval before the job and return its (start, finish), 'None' if there is none.
+        """
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return None
+
+        start, finish, _, _ = entry
+        self._by_length.remove((finish - start, *entry))
+        self._by_finish.remove(entry[1:])
+        return entry[:2]
+
+    def find(
+        self, duration: timedelta, now: datetime, fits: Callable[[UUID, datetime], bool]
+    ) -> tuple[UUID, datetime] | None:
+        """
+        The earliest interval which the job of the given duration fits into, starting no earlier than 'now'
+        and accepted by 'fits' (job_id after the interval, start of the job).
+        Returns (job_id after the interval, start of the job), 'None' if there is none.
+        The intervals which are over already are dropped along the way.
+
+        Only the intervals at least as long as the job are looked at (the ones begun already are shorter
+        by the time passed), and 'fits' is called in order of their start until one of them is accepted.
+        """
+        expired = []
+        for finish, _, job_id in self._by_finish:
+            if finish > now:
+                break
+            expired.append(job_id)
+        for job_id in expired:
+            self.discard(job_id)
+
+        candidates = []
+        for _, start, finish, sequence, job_id in self._by_length.irange((duration,)):
+            start_time = max(start, now)
+            if start_time + duration <= finish:
+                candidates.append((start_time, start, finish, sequence, job_id))
+
+        heapq.heapify(candidates)
+        while candidates:
+            start_time, _, _, _, job_id = heapq.heappop(candidates)
+            if fits(job_id, start_time):
+                return job_id, start_time
+        return None
@@ -1,11 +1,21 @@
-from datetime import datetime
+import itertools
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
 
+from fastapi import Request, Response, status
 from fastapi.routing import APIRoute
 
 from app.config import get_settings
 
 settings = get_settings()
 
+T = TypeVar("T")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     try:
@@ -14,5 +24,63 @@ def custom_generate_unique_id(route: APIRoute) -> str:
         return route.name
 
 
-def datetimes_intersection(t1_start: datetime, t1_end: datetime, t2_start: datetime, t2_end: datetime) -> bool:
-    return (t1_start <= t2_start < t1_end) or (t2_start <= t1_start < t2_end)
+def to_microseconds(moment: datetime) -> int:
+    # integer arithmetic keeps adjacent time windows ("finish" == next "start") exact
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_microseconds(microseconds: int) -> datetime:
+    return EPOCH + microseconds * MICROSECOND
+
+
+def paginate(items: Iterable[tuple[int, T]], limit: int | None) -> tuple[list[T], int | None]:
+    """
+    Take a page of at most 'limit' items (all of them if not given) from the (key, item) pairs sorted by the key.
+    Returns the items and the key of the last one if there are more items left (the cursor of the next page).
+    """
+    if limit is None:
+        return [item for _, item in items], None
+
+    page = list(itertools.islice(items, limit + 1))
+    if len(page) <= limit:
+        return [item for _, item in page], None
+
+    page.pop()
+    return [item for _, item in page], page[-1][0]
+
+
+def json_response(content: bytes, status_code: int = status.HTTP_200_OK, next_cursor: int | None = None) -> Response:
+    """
+    The response of already encoded JSON (FastAPI does not validate and serialize it against the 'response_model').
+    """
+    headers = {settings.NEXT_CURSOR_HEADER: str(next_cursor)} if next_cursor is not None else None
+    return Response(content, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def is_ndjson_accepted(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def encode_ndjson(encode: Callable[[T], bytes], items: Iterable[T]) -> bytes:
+    return b"".join(encode(item) + b"\n" for item in items)
+
+
+async def stream_ndjson(
+    get_page: Callable[[int | None, int], Awaitable[tuple[bytes, int | None]]],
+    cursor: int | None = None,
+    limit: int | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the newline delimited JSON chunk by chunk: 'get_page(cursor, size)' returns the next page
+    already encoded, so only a single page is in memory at a time and no snapshot of the whole listing is taken.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = settings.STREAM_CHUNK_SIZE if remaining is None else min(remaining, settings.STREAM_CHUNK_SIZE)
+        chunk, cursor = await get_page(cursor, page_size)
+        yield chunk
+
+        if cursor is None:
+            return
+        if remaining is not None:
+            remaining -= chunk.count(b"\n")  # a line per item
@@ -0,0 +1,86 @@
+import struct
+from typing import Any, Iterator
+from uuid import UUID
+
+from app.utils.enums.jobs import JobStatus
+from app.utils.helpers import from_microseconds, to_microseconds
+
+_STATUSES = list(JobStatus)
+_NONE = -1
+
+
+class JobsArchive:
+    """
+    Append-only storage of the finished (done/terminated) jobs moved out of the hot state.
+
+    Every job is packed into a fixed-size binary record of a single bytearray (~70 bytes, nothing for
+    the garbage collector to walk). The lookup by id goes through the index of the record numbers
+    (~100 bytes more per job, but no objects with references either).
+    Once the archive is full the oldest records are dropped, along with their index entries.
+    """
+
+    # id, node_id, node_thread_id, expected_to_start_at, expected_to_finish_at, total_run_time, vcpu_units, memory, status
+    RECORD = struct.Struct("<16s16siqqqiiB")
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._records = bytearray()
+        self._numbers: dict[bytes, int] = {}  # id -> number of the record, counting the dropped ones
+        self._dropped = 0  # records dropped from the start
+
+    def __len__(self) -> int:
+        return len(self._records) // self.RECORD.size
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for fields in self.RECORD.iter_unpack(self._records):
+            yield self._unpack(fields)
+
+    def append(self, job: Any) -> None:
+        self._numbers[job.id.bytes] = self._dropped + len(self)
+        self._records += self.RECORD.pack(
+            job.id.bytes,
+            job.node_id.bytes if job.node_id else bytes(16),
+            _NONE if job.node_thread_id is None else job.node_thread_id,
+            _NONE if job.expected_to_start_at is None else to_microseconds(job.expected_to_start_at),
+            _NONE if job.expected_to_finish_at is None else to_microseconds(job.expected_to_finish_at),
+            job.total_run_time,
+            job.vcpu_units,
+            job.memory,
+            _STATUSES.index(job.status),
+        )
+
+        overflow = len(self) - self.max_size
+        if overflow > 0:
+            # drop at least a tenth of the archive at once, so the records are not shifted on every append
+            dropped = max(overflow, self.max_size // 10)
+            for number in range(dropped):
+                job_id = bytes(self._records[number * self.RECORD.size : number * self.RECORD.size + 16])
+                if self._numbers.get(job_id) == self._dropped + number:  # not archived again since then
+                    del self._numbers[job_id]
+            del self._records[: dropped * self.RECORD.size]
+            self._dropped += dropped
+
+    def get(self, job_id: UUID) -> dict[str, Any] | None:
+        """
+        The fields of the archived job (JobModel keyword arguments) or 'None' if it is not archived.
+        """
+        number = self._numbers.get(job_id.bytes)
+        if number is None:
+            return None
+
+        return self._unpack(self.RECORD.unpack_from(self._records, (number - self._dropped) * self.RECORD.size))
+
+    @staticmethod
+    def _unpack(fields: tuple) -> dict[str, Any]:
+        job_id, node_id, thread_id, start, finish, total_run_time, vcpu_units, memory, status = fields
+        return {
+            "id": UUID(bytes=job_id),
+            "total_run_time": total_run_time,
+            "vcpu_units": vcpu_units,
+            "memory": memory,
+            "node_id": UUID(bytes=node_id) if any(node_id) else None,
+            "node_thread_id": None if thread_id == _NONE else thread_id,
+            "expected_to_start_at": None if start == _NONE else from_microseconds(start),
+            "expected_to_finish_at": None if finish == _NONE else from_microseconds(finish),
+            "status": _STATUSES[status],
+        }
@@ -0,0 +1,64 @@
+import heapq
+import itertools
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from app.utils.enums.jobs import JobStatus
+from app.utils.sorted_list import SortedList
+
+
+class JobsIndex:
+    """
+    The jobs of the state by status, in order of submission.
+
+    Every job gets a sequence number once it is added, which is a stable key for the keyset
+    pagination: the listing continues after the last returned sequence number, so pages are
+    not shifted by the jobs added or removed in between.
+    """
+
+    def __init__(self) -> None:
+        self._sequence = itertools.count()
+        self._entries: dict[UUID, tuple[int, JobStatus]] = {}  # job_id -> (sequence number, indexed status)
+        self._by_status: dict[JobStatus, SortedList] = {status: SortedList() for status in JobStatus}  # (seq, job_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, job_id: UUID) -> bool:
+        return job_id in self._entries
+
+    def add(self, job_id: UUID, status: JobStatus) -> None:
+        position = next(self._sequence)
+        self._entries[job_id] = (position, status)
+        self._by_status[status].add((position, job_id))
+
+    def update(self, job_id: UUID, status: JobStatus) -> None:
+        position, indexed_status = self._entries[job_id]
+        if status == indexed_status:
+            return
+
+        self._by_status[indexed_status].remove((position, job_id))
+        self._by_status[status].add((position, job_id))
+        self._entries[job_id] = (position, status)
+
+    def remove(self, job_id: UUID) -> None:
+        position, status = self._entries.pop(job_id)
+        self._by_status[status].remove((position, job_id))
+
+    def count(self, status: JobStatus) -> int:
+        return len(self._by_status[status])
+
+    def position(self, job_id: UUID) -> int:
+        return self._entries[job_id][0]
+
+    def jobs(self, statuses: Iterable[JobStatus] | None = None, after: int | None = None) -> Iterator[tuple[int, UUID]]:
+        """
+        (sequence number, job id) of the jobs with the given statuses (any status if not given)
+        submitted after the given sequence number, in order of submission.
+        """
+        minimum = (-1 if after is None else after + 1,)
+        statuses = list(self._by_status) if statuses is None else list(statuses)
+        if len(statuses) == 1:
+            return iter(self._by_status[statuses[0]].irange(minimum))
+
+        return heapq.merge(*(self._by_status[status].irange(minimum) for status in statuses))
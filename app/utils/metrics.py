@@ -0,0 +1,75 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+# seconds, from the lookups of the indexes up to the sweeps of the whole state
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 1.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+HISTOGRAMS: list["Histogram"] = []  # all the histograms of the process, in order of their definition
+
+
+class Histogram:
+    """
+    Counts of the observed values by buckets, exported in the Prometheus text format (see 'render').
+    Observing a value takes a bisect over the bucket bounds, so it is cheap enough for the hot path.
+    """
+
+    __slots__ = ("name", "description", "buckets", "_counts", "_sum")
+
+    def __init__(self, name: str, description: str, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # the last one is for the values above all the bounds
+        self._sum = 0.0
+        HISTOGRAMS.append(self)
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self._sum += value
+
+    def timed(self, function: Callable[..., T]) -> Callable[..., T]:
+        """
+        Decorator observing the time the function takes (in seconds).
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):  # type: ignore[no-untyped-def]
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(time.perf_counter() - started_at)
+
+        return wrapper
+
+    def reset(self) -> None:
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        total = 0
+        for bound, count in zip(self.buckets, self._counts):
+            total += count
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {total}')
+        total += self._counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f"{self.name}_sum {self._sum:.9g}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+def render_gauge(name: str, description: str, samples: Iterable[tuple[dict[str, str], float]]) -> list[str]:
+    """
+    The gauge in the Prometheus text format, 'samples' are (labels, value).
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        rendered_labels = ",".join(f'{key}="{label}"' for key, label in labels.items())
+        lines.append(f"{name}{{{rendered_labels}}} {value:g}" if labels else f"{name} {value:g}")
+    return lines
@@ -0,0 +1,252 @@
+import heapq
+import itertools
+from datetime import datetime
+from typing import Iterator, NamedTuple
+from uuid import UUID
+
+from app.utils.sorted_list import SortedList
+
+
+class NodesSummary(NamedTuple):
+    """
+    Capacity of the indexed nodes at a glance, to choose between the shards without looking into them.
+    """
+
+    free_slots: int  # jobs the indexed nodes can take in total
+    free_nodes: int  # indexed nodes with a free thread right now
+    available_at: datetime | None  # the earliest time a busy node becomes available ('None' if there is none)
+    max_vcpu_units: int  # the largest node (indexed or not)
+    max_memory: int
+
+
+class NodesIndex:
+    """
+    The nodes which can take one more job, ordered for the placement:
+    - nodes with a free thread right now, in order of provisioning;
+    - nodes with a free thread right now, by the amount of vCPU/memory left unused;
+    - busy nodes, by the time their best fit thread becomes available (then in order of provisioning).
+
+    Nodes which reached their limits are not indexed at all,
+    but every node is kept in order of provisioning for the listing.
+
+    The indexes of the shards share the 'sequence' of the provisioning order, so it is global.
+    """
+
+    def __init__(self, sequence: Iterator[int] | None = None) -> None:
+        self._sequence = sequence if sequence is not None else itertools.count()
+        self._order: dict[UUID, int] = {}  # node_id -> provisioning order
+        self._provisioned = SortedList()  # (order, node_id) of all the nodes, indexed or not
+        self._entries: dict[UUID, tuple] = {}  # node_id -> current entry in one of the containers
+        self._resources: dict[UUID, tuple[int, int]] = {}  # node_id -> (vCPU, memory) left unused
+        self._free = SortedList()  # (order, node_id)
+        self._free_by_resources = SortedList()  # (vCPU, memory, order, node_id)
+        self._free_by_resources_desc = SortedList()  # (-vCPU, -memory, order, node_id)
+        self._busy = SortedList()  # (available_at, order, node_id)
+        self._slots: dict[UUID, int] = {}  # node_id -> jobs the indexed node can take
+        self._free_slots = 0
+        self._capacities: dict[UUID, tuple[int, int]] = {}  # node_id -> (vCPU, memory) of all the nodes
+        self._max_capacity: tuple[int, int] | None = (0, 0)  # 'None' when it has to be recalculated
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[UUID]:
+        return iter(self._entries)
+
+    def __contains__(self, node_id: UUID) -> bool:
+        return node_id in self._entries
+
+    def update(
+        self,
+        node_id: UUID,
+        available_at: datetime | None,
+        free_resources: tuple[int, int] = (0, 0),
+        eligible: bool = True,
+        free_slots: int = 0,
+        capacity: tuple[int, int] = (0, 0),
+    ) -> None:
+        self.discard(node_id)
+        if node_id not in self._order:
+            self._order[node_id] = next(self._sequence)
+            self._provisioned.add((self._order[node_id], node_id))
+            self._capacities[node_id] = capacity
+            if self._max_capacity is not None:
+                self._max_capacity = (max(self._max_capacity[0], capacity[0]), max(self._max_capacity[1], capacity[1]))
+        if not eligible:
+            return
+
+        order = self._order[node_id]
+        if available_at is None:
+            entry: tuple = (order, node_id)
+            self._free.add(entry)
+            self._free_by_resources.add((*free_resources, order, node_id))
+            self._free_by_resources_desc.add((-free_resources[0], -free_resources[1], order, node_id))
+        else:
+            entry = (available_at, order, node_id)
+            self._busy.add(entry)
+
+        self._entries[node_id] = entry
+        self._resources[node_id] = free_resources
+        self._slots[node_id] = free_slots
+        self._free_slots += free_slots
+
+    def discard(self, node_id: UUID) -> None:
+        entry = self._entries.pop(node_id, None)
+        if entry is None:
+            return
+
+        free_resources = self._resources.pop(node_id)
+        self._free_slots -= self._slots.pop(node_id)
+        if len(entry) == 2:
+            self._free.remove(entry)
+            self._free_by_resources.remove((*free_resources, *entry))
+            self._free_by_resources_desc.remove((-free_resources[0], -free_resources[1], *entry))
+        else:
+            self._busy.remove(entry)
+
+    def remove(self, node_id: UUID) -> None:
+        self.discard(node_id)
+        order = self._order.pop(node_id, None)
+        if order is not None:
+            self._provisioned.remove((order, node_id))
+            if self._capacities.pop(node_id) != (0, 0):
+                self._max_capacity = None
+
+    def summary(self) -> NodesSummary:
+        if self._max_capacity is None:
+            self._max_capacity = (
+                max((vcpu for vcpu, _ in self._capacities.values()), default=0),
+                max((memory for _, memory in self._capacities.values()), default=0),
+            )
+
+        return NodesSummary(
+            free_slots=self._free_slots,
+            free_nodes=len(self._free),
+            available_at=self._busy[0][0] if self._busy else None,
+            max_vcpu_units=self._max_capacity[0],
+            max_memory=self._max_capacity[1],
+        )
+
+    def provisioned_nodes(self, after: int | None = None) -> Iterator[tuple[int, UUID]]:
+        """
+        (provisioning order, node id) of all the nodes provisioned after the given one, in order of provisioning.
+        """
+        return iter(self._provisioned.irange((-1 if after is None else after + 1,)))
+
+    def free_nodes(self) -> Iterator[UUID]:
+        for _, node_id in self._free:
+            yield node_id
+
+    def free_entries(self) -> Iterator[tuple[int, UUID]]:
+        """
+        (provisioning order, node id) of the nodes with a free thread, in the order of 'free_nodes'.
+        """
+        return iter(self._free)
+
+    def free_nodes_by_resources(self, min_vcpu: int = 0, descending: bool = False) -> Iterator[tuple[UUID, int, int]]:
+        """
+        Nodes with a free thread and at least 'min_vcpu' vCPU left unused,
+        by the amount of vCPU (then memory) left unused, then in order of provisioning.
+        """
+        if descending:
+            for vcpu, memory, _, node_id in self._free_by_resources_desc:
+                if -vcpu < min_vcpu:
+                    return
+                yield node_id, -vcpu, -memory
+        else:
+            for vcpu, memory, _, node_id in self._free_by_resources.irange((min_vcpu,)):
+                yield node_id, vcpu, memory
+
+    def free_resources(self, node_id: UUID) -> tuple[int, int]:
+        return self._resources[node_id]
+
+    def busy_nodes(self) -> Iterator[tuple[UUID, datetime]]:
+        for available_at, _, node_id in self._busy:
+            yield node_id, available_at
+
+    def busy_entries(self) -> Iterator[tuple[datetime, int, UUID]]:
+        """
+        (available at, provisioning order, node id) of the busy nodes, in the order of 'busy_nodes'.
+        """
+        return iter(self._busy)
+
+
+class ShardedNodesIndex:
+    """
+    The nodes partitioned into shards by their ids, every shard has its own index, so the placement
+    of a job looks into a single shard only. The shard for the job is chosen by the summaries of the shards.
+    """
+
+    def __init__(self, shards: int = 1) -> None:
+        sequence = itertools.count()
+        self.shards = [NodesIndex(sequence) for _ in range(max(shards, 1))]
+
+    def shard(self, node_id: UUID) -> NodesIndex:
+        return self.shards[node_id.int % len(self.shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self) -> Iterator[UUID]:
+        return itertools.chain.from_iterable(self.shards)
+
+    def __contains__(self, node_id: UUID) -> bool:
+        return node_id in self.shard(node_id)
+
+    def update(
+        self,
+        node_id: UUID,
+        available_at: datetime | None,
+        free_resources: tuple[int, int] = (0, 0),
+        eligible: bool = True,
+        free_slots: int = 0,
+        capacity: tuple[int, int] = (0, 0),
+    ) -> None:
+        self.shard(node_id).update(node_id, available_at, free_resources, eligible, free_slots, capacity)
+
+    def discard(self, node_id: UUID) -> None:
+        self.shard(node_id).discard(node_id)
+
+    def remove(self, node_id: UUID) -> None:
+        self.shard(node_id).remove(node_id)
+
+    def provisioned_nodes(self, after: int | None = None) -> Iterator[tuple[int, UUID]]:
+        return heapq.merge(*(shard.provisioned_nodes(after) for shard in self.shards))
+
+    def free_nodes(self) -> Iterator[UUID]:
+        for _, node_id in heapq.merge(*(shard.free_entries() for shard in self.shards)):
+            yield node_id
+
+    def free_resources(self, node_id: UUID) -> tuple[int, int]:
+        return self.shard(node_id).free_resources(node_id)
+
+    def busy_nodes(self) -> Iterator[tuple[UUID, datetime]]:
+        for available_at, _, node_id in heapq.merge(*(shard.busy_entries() for shard in self.shards)):
+            yield node_id, available_at
+
+    def summary(self) -> NodesSummary:
+        summaries = [shard.summary() for shard in self.shards]
+        return NodesSummary(
+            free_slots=sum(summary.free_slots for summary in summaries),
+            free_nodes=sum(summary.free_nodes for summary in summaries),
+            available_at=min((s.available_at for s in summaries if s.available_at is not None), default=None),
+            max_vcpu_units=max(summary.max_vcpu_units for summary in summaries),
+            max_memory=max(summary.max_memory for summary in summaries),
+        )
+
+    def route(self, vcpu_units: int = 0, memory: int = 0) -> Iterator[NodesIndex]:
+        """
+        The shards which may take the job of the given size, the most promising first: the shards
+        with more free nodes right now, then the shards with a node becoming available earlier.
+        """
+        if len(self.shards) == 1:
+            return iter(self.shards)
+
+        candidates = []
+        for position, shard in enumerate(self.shards):
+            summary = shard.summary()
+            if summary.free_slots and summary.max_vcpu_units >= vcpu_units and summary.max_memory >= memory:
+                candidates.append(((-summary.free_nodes, summary.available_at or datetime.min, position), shard))
+
+        candidates.sort(key=lambda candidate: candidate[0])
+        return (shard for _, shard in candidates)
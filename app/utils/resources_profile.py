@@ -0,0 +1,167 @@
+from datetime import datetime
+from uuid import UUID
+
+from app.utils import clock
+from app.utils.helpers import MICROSECOND, to_microseconds
+
+
+class ResourcesProfile:
+    """
+    Piecewise-constant vCPU/memory usage timeline of a single node.
+
+    Backed by a sparse segment tree over the time axis (in microseconds since
+    the profile origin) with range additions, so both adding/removing a job time
+    window and finding the peak concurrent usage over [start, finish) take O(log T),
+    where T is the time span of the node jobs. The span of the tree is doubled on demand.
+
+    The tree is stored column-wise in plain lists, node #0 is an "empty" sentinel, node #1 is the root.
+    """
+
+    __slots__ = (
+        "_left",
+        "_right",
+        "_cpu",
+        "_memory",
+        "_add_cpu",
+        "_add_memory",
+        "_origin",
+        "_span",
+        "_windows",
+        "_garbage",
+    )
+
+    MIN_SPAN = 1 << 20  # ~1 second
+    REBUILD_THRESHOLD = 64
+
+    def __init__(self) -> None:
+        self._windows: dict[UUID, tuple[int, int, int, int]] = {}  # job_id -> (start, finish, vcpu, memory)
+        self._reset(to_microseconds(clock.now()))
+
+    def _reset(self, origin: int) -> None:
+        # the windows are only added from the current moment onwards, so the past is cut off
+        self._origin = origin
+        self._span = self.MIN_SPAN
+        # sentinel and root
+        self._left = [0, 0]
+        self._right = [0, 0]
+        self._cpu = [0, 0]  # max usage within the node's range (including the node's own addition)
+        self._memory = [0, 0]
+        self._add_cpu = [0, 0]  # usage added to the whole node's range
+        self._add_memory = [0, 0]
+        self._garbage = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def __contains__(self, job_id: UUID) -> bool:
+        return job_id in self._windows
+
+    def _new_node(self) -> int:
+        self._left.append(0)
+        self._right.append(0)
+        self._cpu.append(0)
+        self._memory.append(0)
+        self._add_cpu.append(0)
+        self._add_memory.append(0)
+        return len(self._left) - 1
+
+    def _grow(self, finish: int) -> None:
+        while finish > self._origin + self._span:
+            # the current root becomes the left child of the new one
+            child = self._new_node()
+            for column in (self._left, self._right, self._cpu, self._memory, self._add_cpu, self._add_memory):
+                column[child] = column[1]
+
+            self._left[1], self._right[1] = child, 0
+            self._add_cpu[1], self._add_memory[1] = 0, 0
+            self._span *= 2
+
+    def _update(self, node: int, low: int, high: int, start: int, finish: int, vcpu: int, memory: int) -> None:
+        if start <= low and high <= finish:
+            self._add_cpu[node] += vcpu
+            self._add_memory[node] += memory
+            self._cpu[node] += vcpu
+            self._memory[node] += memory
+            return
+
+        middle = (low + high) // 2
+        if start < middle:
+            if not self._left[node]:
+                self._left[node] = self._new_node()
+            self._update(self._left[node], low, middle, start, finish, vcpu, memory)
+        if finish > middle:
+            if not self._right[node]:
+                self._right[node] = self._new_node()
+            self._update(self._right[node], middle, high, start, finish, vcpu, memory)
+
+        left, right = self._left[node], self._right[node]
+        self._cpu[node] = self._add_cpu[node] + max(self._cpu[left], self._cpu[right])
+        self._memory[node] = self._add_memory[node] + max(self._memory[left], self._memory[right])
+
+    def _query(self, node: int, low: int, high: int, start: int, finish: int) -> tuple[int, int]:
+        if not node:
+            return 0, 0
+        if start <= low and high <= finish:
+            return self._cpu[node], self._memory[node]
+
+        middle = (low + high) // 2
+        cpu, memory = 0, 0
+        if start < middle:
+            cpu, memory = self._query(self._left[node], low, middle, start, finish)
+        if finish > middle:
+            right_cpu, right_memory = self._query(self._right[node], middle, high, start, finish)
+            cpu, memory = max(cpu, right_cpu), max(memory, right_memory)
+
+        return self._add_cpu[node] + cpu, self._add_memory[node] + memory
+
+    def add(self, job_id: UUID, start: datetime, finish: datetime, vcpu: int, memory: int) -> None:
+        """
+        Add (or move) the job time window to the profile.
+        """
+        self.discard(job_id)
+
+        window = (max(to_microseconds(start), self._origin), to_microseconds(finish), vcpu, memory)
+        self._windows[job_id] = window
+        if window[0] < window[1]:
+            self._grow(window[1])
+            self._update(1, self._origin, self._origin + self._span, *window)
+
+    def discard(self, job_id: UUID) -> None:
+        window = self._windows.pop(job_id, None)
+        if window is None:
+            return
+
+        if window[0] < window[1]:
+            start, finish, vcpu, memory = window
+            self._update(1, self._origin, self._origin + self._span, start, finish, -vcpu, -memory)
+
+        # the removed windows leave their tree nodes behind, rebuild the tree once they prevail
+        self._garbage += 1
+        if self._garbage > self.REBUILD_THRESHOLD and self._garbage > len(self._windows):
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        # the origin moves forward to the current moment (or to the start of the earliest running job)
+        now = to_microseconds(clock.now())
+        self._reset(min([now, *(window[0] for window in self._windows.values())]))
+        for start, finish, vcpu, memory in self._windows.values():
+            if start < finish:
+                self._grow(finish)
+                self._update(1, self._origin, self._origin + self._span, start, finish, vcpu, memory)
+
+    def peak(self, start: datetime, finish: datetime) -> tuple[int, int]:
+        """
+        The highest concurrent (vCPU, memory) usage within [start, finish).
+        """
+        start_us = max(to_microseconds(start), self._origin)
+        finish_us = min(to_microseconds(finish), self._origin + self._span)
+        if start_us >= finish_us:
+            return 0, 0
+
+        return self._query(1, self._origin, self._origin + self._span, start_us, finish_us)
+
+    def usage_at(self, moment: datetime) -> tuple[int, int]:
+        """
+        The (vCPU, memory) used at the given moment.
+        """
+        return self.peak(moment, moment + MICROSECOND)
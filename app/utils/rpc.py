@@ -0,0 +1,101 @@
+import asyncio
+import json
+import struct
+from typing import Any, Awaitable, Callable
+
+import pydantic_core
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Every message is a frame: 4 bytes of the payload length (big-endian) and the payload.
+# The request is a single JSON frame: {"method": ..., "params": {...}},
+# the response is a JSON frame of the header: {"status_code": ..., "detail": ..., "cursor": ...}
+# followed by a frame of the body (the JSON encoded result as it is, so it is never decoded on the way).
+_LENGTH = struct.Struct(">I")
+
+Handler = Callable[..., Awaitable[tuple[bytes, int | None]]]
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return await reader.readexactly(length)
+
+
+def _write_frame(writer: asyncio.StreamWriter, payload: bytes) -> None:
+    writer.write(_LENGTH.pack(len(payload)))
+    writer.write(payload)
+
+
+class RPCClient:
+    """
+    Client of the RPC server listening on the unix socket. The connections are reused
+    (one request at a time per connection), so there is a pool of them growing up to the number of concurrent calls.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def call(self, method: str, **params: Any) -> tuple[bytes, int | None]:
+        """
+        Returns the encoded result and the cursor of the next page (if any),
+        the errors of the server are raised as HTTPException.
+        """
+        reader, writer = self._idle.pop() if self._idle else await asyncio.open_unix_connection(self.path)
+        try:
+            _write_frame(writer, pydantic_core.to_json({"method": method, "params": params}))
+            await writer.drain()
+            header = json.loads(await _read_frame(reader))
+            body = await _read_frame(reader)
+        except BaseException:
+            # the connection is left in an unknown state
+            writer.close()
+            raise
+
+        self._idle.append((reader, writer))
+        if header["status_code"] >= status.HTTP_400_BAD_REQUEST:
+            raise HTTPException(status_code=header["status_code"], detail=header["detail"])
+
+        return body, header["cursor"]
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            await writer.wait_closed()
+
+
+async def serve(path: str, handlers: dict[str, Handler]) -> asyncio.Server:
+    """
+    Start the RPC server on the unix socket: the requests of every connection are handled one by one.
+    """
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = json.loads(await _read_frame(reader))
+                header: dict[str, Any] = {"status_code": status.HTTP_200_OK, "detail": None, "cursor": None}
+                body = b""
+                try:
+                    body, header["cursor"] = await handlers[request["method"]](**request["params"])
+                except HTTPException as e:
+                    header.update(status_code=e.status_code, detail=e.detail)
+                except ValidationError as e:
+                    header.update(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+                except Exception:
+                    logger.exception("RPC call '%s' failed", request["method"])
+                    header.update(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+                _write_frame(writer, json.dumps(header).encode())
+                _write_frame(writer, body)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass  # the client has closed the connection
+        finally:
+            writer.close()
+
+    return await asyncio.start_unix_server(handle_connection, path)
@@ -0,0 +1,128 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator
+
+
+class SortedList:
+    """
+    Minimal sorted container: values are kept in a list of sorted buckets
+    of bounded size, so lookups take O(log n) and insertions/removals only
+    shift a single bucket instead of the whole list.
+    """
+
+    __slots__ = ("_buckets", "_maxes", "_len")
+
+    LOAD = 512
+
+    def __init__(self, iterable: Iterable = ()) -> None:
+        self._buckets: list[list] = []
+        self._maxes: list = []
+        self._len = 0
+        for value in iterable:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._buckets)
+
+    def __reversed__(self) -> Iterator:
+        return chain.from_iterable(reversed(bucket) for bucket in reversed(self._buckets))
+
+    def __contains__(self, value: Any) -> bool:
+        position = bisect_left(self._maxes, value)
+        if position == len(self._maxes):
+            return False
+
+        bucket = self._buckets[position]
+        index = bisect_left(bucket, value)
+        return index < len(bucket) and bucket[index] == value
+
+    def __getitem__(self, index: int) -> Any:
+        if not -self._len <= index < self._len:
+            raise IndexError("SortedList index out of range")
+
+        if index >= 0:
+            for bucket in self._buckets:
+                if index < len(bucket):
+                    return bucket[index]
+                index -= len(bucket)
+        else:
+            for bucket in reversed(self._buckets):
+                if -index <= len(bucket):
+                    return bucket[index]
+                index += len(bucket)
+
+    def add(self, value: Any) -> None:
+        if not self._buckets:
+            self._buckets.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            return
+
+        position = bisect_right(self._maxes, value)
+        if position == len(self._maxes):
+            position -= 1
+            self._buckets[position].append(value)
+            self._maxes[position] = value
+        else:
+            insort(self._buckets[position], value)
+
+        self._len += 1
+        bucket = self._buckets[position]
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[position : position + 1] = [bucket[: self.LOAD], bucket[self.LOAD :]]
+            self._maxes[position : position + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+
+    def discard(self, value: Any) -> bool:
+        position = bisect_left(self._maxes, value)
+        if position == len(self._maxes):
+            return False
+
+        bucket = self._buckets[position]
+        index = bisect_left(bucket, value)
+        if index == len(bucket) or bucket[index] != value:
+            return False
+
+        del bucket[index]
+        self._len -= 1
+        if bucket:
+            self._maxes[position] = bucket[-1]
+        else:
+            del self._buckets[position]
+            del self._maxes[position]
+
+        return True
+
+    def remove(self, value: Any) -> None:
+        if not self.discard(value):
+            raise ValueError(f"{value!r} is not in the list")
+
+    def irange(self, minimum: Any) -> Iterator:
+        """
+        Iterate over the values greater than or equal to the minimum.
+        """
+        position = bisect_left(self._maxes, minimum)
+        if position == len(self._maxes):
+            return iter(())
+
+        bucket = self._buckets[position]
+        return chain(
+            islice(bucket, bisect_left(bucket, minimum), None),
+            chain.from_iterable(self._buckets[position + 1 :]),
+        )
+
+    def lower(self, value: Any) -> Any:
+        """
+        The greatest value less than the given one ('None' if there is no such value).
+        """
+        position = bisect_left(self._maxes, value)
+        if position < len(self._maxes):
+            bucket = self._buckets[position]
+            index = bisect_left(bucket, value)
+            if index:
+                return bucket[index - 1]
+        if position:
+            return self._buckets[position - 1][-1]
+        return None
@@ -0,0 +1,224 @@
+from datetime import timedelta
+from typing import Any, Iterator
+from uuid import UUID
+
+from app.utils.helpers import MICROSECOND
+from app.utils.sorted_list import SortedList
+
+
+class ShiftsTree:
+    """
+    Sparse Fenwick tree of the time shifts (in microseconds) over the positions of the thread jobs:
+    a shift added at some position applies to it and to all the following positions.
+    Both adding a shift and summing up the shifts of a position take O(log P), P is the largest position.
+    """
+
+    __slots__ = ("_tree", "_size")
+
+    def __init__(self) -> None:
+        self._tree: dict[int, int] = {}  # 1-based, the missing nodes are zeros
+        self._size = 1  # a power of two
+
+    def _grow(self, position: int) -> None:
+        while position >= self._size:
+            # the new nodes cover the new (still unshifted) positions only, except for the last one covering all
+            total = self.prefix(self._size - 1)
+            self._size *= 2
+            if total:
+                self._tree[self._size] = total
+
+    def add(self, position: int, shift: int) -> None:
+        self._grow(position)
+        index = position + 1
+        while index <= self._size:
+            self._tree[index] = self._tree.get(index, 0) + shift
+            index += index & -index
+
+    def prefix(self, position: int) -> int:
+        """
+        The total shift of the position.
+        """
+        index = min(position + 1, self._size)
+        total = 0
+        while index:
+            total += self._tree.get(index, 0)
+            index -= index & -index
+        return total
+
+
+class ThreadTimeline:
+    """
+    The jobs of a single node thread in order of their execution.
+
+    The thread is a sorted list of (position, job_id): the jobs added to the end of the thread get positions
+    'STRIDE' apart, so there is room for the jobs put in between later on (backfill). Adding and removal
+    of any job (finished or terminated), the lookups of its neighbours and of the last job take O(log n)
+    instead of a linear scan of the thread.
+
+    The time windows of the jobs are shifted lazily: 'shift' records the shift of the job and all the following
+    ones in O(log n), and the shifts are applied to the job once it is read (see 'materialize').
+    """
+
+    __slots__ = ("_positions", "_jobs", "_shifts", "_applied", "_unsynced_from")
+
+    STRIDE = 1 << 16
+
+    def __init__(self, job_ids: Iterator[UUID] | list[UUID] = ()) -> None:
+        self._positions: dict[UUID, int] = {}  # job_id -> position
+        self._jobs = SortedList()  # (position, job_id)
+        self._shifts = ShiftsTree()
+        self._applied: dict[UUID, int] = {}  # job_id -> the total shift its time window has seen already
+        self._unsynced_from: int | None = None  # the first position shifted since the last 'take_shifted'
+        for job_id in job_ids:
+            self.append(job_id)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __iter__(self) -> Iterator[UUID]:
+        for _, job_id in self._jobs:
+            yield job_id
+
+    def __contains__(self, job_id: UUID) -> bool:
+        return job_id in self._positions
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ThreadTimeline, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def _add(self, job_id: UUID, position: int) -> None:
+        self._positions[job_id] = position
+        self._jobs.add((position, job_id))
+        # the shifts recorded before the job was added do not apply to it
+        self._applied[job_id] = self._shifts.prefix(position)
+
+    def append(self, job_id: UUID) -> None:
+        self._add(job_id, self._jobs[-1][0] + self.STRIDE if self._jobs else self.STRIDE)
+
+    def insert_before(self, next_job_id: UUID, job_id: UUID) -> None:
+        """
+        Put the job right before the given one.
+        """
+        previous = self._jobs.lower((self._positions[next_job_id], next_job_id))
+        low, high = -1 if previous is None else previous[0], self._positions[next_job_id]
+        if high - low < 2:
+            self._renumber()
+            return self.insert_before(next_job_id, job_id)
+
+        self._add(job_id, (low + high) // 2)
+
+    def _renumber(self) -> None:
+        """
+        Spread the positions 'STRIDE' apart once again, keeping the shifts of every job.
+        """
+        entries = list(self._jobs)
+        shifts = self._shifts
+        unsynced_from, self._unsynced_from = self._unsynced_from, None
+        self._jobs, self._shifts = SortedList(), ShiftsTree()
+
+        total = 0
+        for index, (old_position, job_id) in enumerate(entries):
+            position = (index + 1) * self.STRIDE
+            self._positions[job_id] = position
+            self._jobs.add((position, job_id))
+            job_total = shifts.prefix(old_position)
+            if job_total != total:
+                self._shifts.add(position, job_total - total)
+                total = job_total
+            if unsynced_from is not None and old_position >= unsynced_from and self._unsynced_from is None:
+                self._unsynced_from = position
+
+    def remove(self, job_id: UUID) -> int:
+        """
+        Remove the job, returns the position it had (see 'restore').
+        """
+        position = self._positions.pop(job_id)
+        self._jobs.remove((position, job_id))
+        del self._applied[job_id]
+        if not self._jobs:
+            # nothing is left to be shifted, so the positions start over and the shifts tree does not grow forever
+            self._shifts = ShiftsTree()
+            self._unsynced_from = None
+        return position
+
+    def restore(self, job_id: UUID, position: int) -> None:
+        """
+        Put the removed job back to the position it had (on rollback), its time window is expected to be up to date.
+        """
+        self._add(job_id, position)
+
+    def pop(self) -> UUID:
+        """
+        Remove and return the last job.
+        """
+        job_id = self.last()
+        self.remove(job_id)
+        return job_id
+
+    def first(self) -> UUID:
+        if not self._jobs:
+            raise IndexError("the thread is empty")
+        return self._jobs[0][1]
+
+    def last(self) -> UUID:
+        if not self._jobs:
+            raise IndexError("the thread is empty")
+        return self._jobs[-1][1]
+
+    def previous(self, job_id: UUID) -> UUID | None:
+        """
+        The job right before the given one ('None' if it is the first one).
+        """
+        entry = self._jobs.lower((self._positions[job_id], job_id))
+        return None if entry is None else entry[1]
+
+    def next(self, job_id: UUID) -> UUID | None:
+        """
+        The job right after the given one ('None' if it is the last one).
+        """
+        return next(self.following(job_id), None)
+
+    def following(self, job_id: UUID) -> Iterator[UUID]:
+        """
+        The jobs after the given one, in order of their execution.
+        """
+        for _, following_job_id in self._jobs.irange((self._positions[job_id] + 1,)):
+            yield following_job_id
+
+    def shift(self, job_id: UUID, delta: timedelta) -> None:
+        """
+        Shift the time windows of the job and all the following jobs by 'delta'.
+        """
+        position = self._positions[job_id]
+        self._shifts.add(position, delta // MICROSECOND)
+        if self._unsynced_from is None or position < self._unsynced_from:
+            self._unsynced_from = position
+
+    def materialize(self, job: Any) -> None:
+        """
+        Apply the shifts of the thread recorded since the job was read the last time
+        to its time window ('expected_to_start_at' and 'expected_to_finish_at' of the job entity).
+        """
+        total = self._shifts.prefix(self._positions[job.id])
+        delta = total - self._applied[job.id]
+        if delta:
+            job.expected_to_start_at += delta * MICROSECOND
+            job.expected_to_finish_at += delta * MICROSECOND
+            self._applied[job.id] = total
+
+    def take_shifted(self) -> list[UUID]:
+        """
+        The jobs shifted since the previous call (the ones the derived data may be out of sync for).
+        """
+        if self._unsynced_from is None:
+            return []
+
+        job_ids = [job_id for _, job_id in self._jobs.irange((self._unsynced_from,))]
+        self._unsynced_from = None
+        return job_ids
@@ -0,0 +1,25 @@
+from typing import Callable
+from uuid import UUID
+
+
+class UndoLog:
+    """
+    Journal of the state changes made within a transaction: every change registers
+    a callback restoring the previous values, so the rollback costs as much as the change itself.
+    """
+
+    def __init__(self) -> None:
+        self._undo: list[Callable[[], None]] = []
+        self.affected_nodes: dict[UUID, None] = {}  # nodes which derived metadata has to be refreshed on rollback
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    def record(self, undo: Callable[[], None], node_id: UUID | None = None) -> None:
+        self._undo.append(undo)
+        if node_id is not None:
+            self.affected_nodes[node_id] = None
+
+    def rollback(self) -> None:
+        while self._undo:
+            self._undo.pop()()
@@ -0,0 +1,343 @@
+"""
+The write-ahead log of the state changes and the snapshots of the state (the WAL storage backend).
+
+The log is split into the segments, a snapshot holds the nodes and the active jobs as of the end of a segment:
+
+    snapshot-00000000000000000006.bin  - the state as of the end of the segment #6
+    wal-00000000000000000007.log       - the changes made since then
+
+Every write of the changes is a single record of the log: the rows of the new nodes, the ids of the removed
+nodes and the rows of the new or updated jobs, in a fixed-size binary layout (see NODE_ROW and JOB_ROW),
+prefixed by the length and the checksum, so a record torn by a crash is told and skipped on recovery.
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import zlib
+from contextlib import suppress
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO
+from uuid import UUID
+
+from app.config import get_settings
+from app.database import JobModel, NodeModel, StateType
+from app.logger import get_logger
+from app.utils.change_set import ChangeSet
+from app.utils.enums.jobs import JobStatus
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+ACTIVE_STATUSES = (JobStatus.SCHEDULED, JobStatus.RUNNING)
+
+
+# =====================================
+#            Binary layout
+# =====================================
+# id, max_concurrent_jobs, max_total_jobs, vcpu_units, memory
+NODE_ROW = struct.Struct("<16s4i")
+# id, total_run_time, vcpu_units, memory, node_id, node_thread_id, expected_to_start_at, expected_to_finish_at, status
+JOB_ROW = struct.Struct("<16sq2i16si2qB")
+NODE_ID = struct.Struct("<16s")
+
+RECORD_HEADER = struct.Struct("<2I")  # length and crc32 of the payload
+COMMIT_HEADER = struct.Struct("<3I")  # number of the new nodes, the removed nodes and the jobs of the record
+SNAPSHOT_HEADER = struct.Struct("<8s3Q")  # magic, segment, number of the nodes and the jobs
+SNAPSHOT_MAGIC = b"JOBSNAP1"
+
+EPOCH = datetime(1970, 1, 1)  # the times of the state are naive
+NO_TIME = -(2**63)
+NO_NODE = bytes(16)
+NO_THREAD = -1
+STATUSES = list(JobStatus)
+ACTIVE_STATUS_CODES = frozenset(STATUSES.index(status) for status in ACTIVE_STATUSES)
+
+
+def _encode_time(moment: datetime | None) -> int:
+    return NO_TIME if moment is None else (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def _decode_time(microseconds: int) -> datetime | None:
+    return None if microseconds == NO_TIME else EPOCH + timedelta(microseconds=microseconds)
+
+
+def _pack_node(node_entity: NodeModel) -> bytes:
+    return NODE_ROW.pack(
+        node_entity.id.bytes,
+        node_entity.max_concurrent_jobs,
+        node_entity.max_total_jobs,
+        node_entity.vcpu_units,
+        node_entity.memory,
+    )
+
+
+def _node_row(row: tuple) -> dict[str, Any]:
+    node_id, max_concurrent_jobs, max_total_jobs, vcpu_units, memory = row
+    return {
+        "id": UUID(bytes=node_id),
+        "max_concurrent_jobs": max_concurrent_jobs,
+        "max_total_jobs": max_total_jobs,
+        "vcpu_units": vcpu_units,
+        "memory": memory,
+    }
+
+
+def _pack_job(job_entity: JobModel) -> bytes:
+    return JOB_ROW.pack(
+        job_entity.id.bytes,
+        job_entity.total_run_time,
+        job_entity.vcpu_units,
+        job_entity.memory,
+        NO_NODE if job_entity.node_id is None else job_entity.node_id.bytes,
+        NO_THREAD if job_entity.node_thread_id is None else job_entity.node_thread_id,
+        _encode_time(job_entity.expected_to_start_at),
+        _encode_time(job_entity.expected_to_finish_at),
+        STATUSES.index(job_entity.status),
+    )
+
+
+def _is_active(row: tuple) -> bool:
+    return row[-1] in ACTIVE_STATUS_CODES
+
+
+def _job_model(row: tuple, node_ids: dict[bytes, UUID | None]) -> JobModel:
+    """
+    'node_ids' caches the decoded ids of the nodes, the jobs share a few of them.
+    """
+    job_id, total_run_time, vcpu_units, memory, node_id, node_thread_id, started_at, finished_at, status = row
+    if node_id not in node_ids:
+        node_ids[node_id] = None if node_id == NO_NODE else UUID(bytes=node_id)
+    return JobModel(
+        id=UUID(bytes=job_id),
+        total_run_time=total_run_time,
+        vcpu_units=vcpu_units,
+        memory=memory,
+        node_id=node_ids[node_id],
+        node_thread_id=None if node_thread_id == NO_THREAD else node_thread_id,
+        expected_to_start_at=_decode_time(started_at),
+        expected_to_finish_at=_decode_time(finished_at),
+        status=STATUSES[status],
+    )
+
+
+def pack_record(new_nodes: list[NodeModel], removed_node_ids: list[UUID], jobs: list[JobModel]) -> bytes:
+    """
+    The record of the log holding the given changes.
+    """
+    payload = b"".join(
+        [
+            COMMIT_HEADER.pack(len(new_nodes), len(removed_node_ids), len(jobs)),
+            *map(_pack_node, new_nodes),
+            *(NODE_ID.pack(node_id.bytes) for node_id in removed_node_ids),
+            *map(_pack_job, jobs),
+        ]
+    )
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def pack_snapshot(segment: int, node_entities: list[NodeModel], job_entities: list[JobModel]) -> bytes:
+    """
+    The snapshot of the given nodes (in order of provisioning) and jobs as of the end of the segment.
+    """
+    return b"".join(
+        [
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, segment, len(node_entities), len(job_entities)),
+            *map(_pack_node, node_entities),
+            *map(_pack_job, job_entities),
+        ]
+    )
+
+
+# =====================================
+#              The log
+# =====================================
+class WriteAheadLog:
+    """
+    The segments of the log and the snapshots in the directory, owned by a single process.
+    The records are appended to the latest segment, a snapshot replaces the segments it covers.
+    """
+
+    def __init__(self, directory: str | Path, fsync: bool = True) -> None:
+        self.directory = Path(directory)
+        self.fsync = fsync
+        self.segment = 0  # the one appended to
+        self._file: BinaryIO | None = None
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"wal-{segment:020d}.log"
+
+    def _snapshot_path(self, segment: int) -> Path:
+        return self.directory / f"snapshot-{segment:020d}.bin"
+
+    def _segments(self) -> list[int]:
+        return sorted(int(path.name[len("wal-") : -len(".log")]) for path in self.directory.glob("wal-*.log"))
+
+    def _snapshots(self) -> list[int]:
+        # not the '.tmp' ones left by a crash while writing
+        return sorted(int(path.name[len("snapshot-") : -len(".bin")]) for path in self.directory.glob("snapshot-*.bin"))
+
+    def _open(self, segment: int) -> None:
+        self.close()
+        self._file = open(self._segment_path(segment), "ab")
+        self.segment = segment
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def recover(self) -> tuple[list[dict[str, Any]], list[JobModel]]:
+        """
+        The nodes (in order of provisioning) and the active jobs as of the latest snapshot and the log after it.
+        The records are appended to a new segment from then on, so a torn record stays at the end of the last one.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snapshots = self._snapshots()
+        snapshot = snapshots[-1] if snapshots else 0
+        segments = [segment for segment in self._segments() if segment > snapshot]
+
+        nodes: dict[bytes, tuple] = {}  # by the id, in order of provisioning
+        jobs: dict[bytes, tuple] = {}  # by the id, the latest rows of the jobs changed since the snapshot
+        active_jobs = []
+        node_ids: dict[bytes, UUID | None] = {}
+        if snapshots:
+            with open(self._snapshot_path(snapshot), "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    magic, _, nodes_count, jobs_count = SNAPSHOT_HEADER.unpack_from(view)
+                    if magic != SNAPSHOT_MAGIC:
+                        raise ValueError(f"Not a snapshot: {self._snapshot_path(snapshot)}")
+
+                    offset = SNAPSHOT_HEADER.size
+                    nodes_end = offset + nodes_count * NODE_ROW.size
+                    for row in NODE_ROW.iter_unpack(view[offset:nodes_end]):
+                        nodes[row[0]] = row
+                    for segment in segments:
+                        self._replay(segment, nodes, jobs)
+
+                    # the snapshot holds the bulk of the jobs, they are decoded right from the mapped file
+                    for row in JOB_ROW.iter_unpack(view[nodes_end : nodes_end + jobs_count * JOB_ROW.size]):
+                        if row[0] not in jobs and _is_active(row):
+                            active_jobs.append(_job_model(row, node_ids))
+                finally:
+                    view.release()
+        else:
+            for segment in segments:
+                self._replay(segment, nodes, jobs)
+
+        active_jobs.extend(_job_model(row, node_ids) for row in jobs.values() if _is_active(row))
+        self._open(max([snapshot, *segments]) + 1)
+        return [_node_row(row) for row in nodes.values()], active_jobs
+
+    def _replay(self, segment: int, nodes: dict[bytes, tuple], jobs: dict[bytes, tuple]) -> None:
+        with open(self._segment_path(segment), "rb") as file:
+            data = file.read()
+
+        offset = 0
+        while offset < len(data):
+            if offset + RECORD_HEADER.size > len(data):
+                break
+            length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + RECORD_HEADER.size : offset + RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+
+            new_count, removed_count, jobs_count = COMMIT_HEADER.unpack_from(payload)
+            position = COMMIT_HEADER.size
+            for row in NODE_ROW.iter_unpack(payload[position : position + new_count * NODE_ROW.size]):
+                nodes[row[0]] = row
+            position += new_count * NODE_ROW.size
+            for (node_id,) in NODE_ID.iter_unpack(payload[position : position + removed_count * NODE_ID.size]):
+                nodes.pop(node_id, None)
+            position += removed_count * NODE_ID.size
+            for row in JOB_ROW.iter_unpack(payload[position : position + jobs_count * JOB_ROW.size]):
+                jobs[row[0]] = row
+            offset += RECORD_HEADER.size + length
+
+        if offset < len(data):
+            logger.warning("The torn record at %s of the log segment #%s is skipped", offset, segment)
+
+    def append(self, record: bytes) -> None:
+        """
+        Write the record (see 'pack_record'), durable once written if 'fsync' is set.
+        Blocks on the disk, so it is called off the event loop.
+        """
+        assert self._file is not None, "The log is not recovered"
+        try:
+            self._file.write(record)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except BaseException:
+            # the records after a torn one are not read on recovery, so the next ones go to a new segment
+            with suppress(OSError):
+                self.close()
+            self._open(self.segment + 1)
+            raise
+
+    def rotate(self) -> int:
+        """
+        Seal the segment appended to and start the next one, returns the sealed one.
+        """
+        sealed = self.segment
+        self._open(sealed + 1)
+        return sealed
+
+    def store_snapshot(self, snapshot: bytes) -> None:
+        """
+        Write the snapshot (see 'pack_snapshot') and drop the segments and the snapshots it replaces.
+        The snapshot is written aside and renamed, so a crash leaves either the old one or the new one.
+        """
+        _, segment, _, _ = SNAPSHOT_HEADER.unpack_from(snapshot)
+        path = self._snapshot_path(segment)
+        temporary_path = path.with_suffix(".tmp")
+        with open(temporary_path, "wb") as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+        for covered_segment in self._segments():
+            if covered_segment <= segment:
+                self._segment_path(covered_segment).unlink()
+        for previous_snapshot in self._snapshots():
+            if previous_snapshot < segment:
+                self._snapshot_path(previous_snapshot).unlink()
+
+
+# =====================================
+#              Operations
+# =====================================
+@lru_cache()
+def get_wal() -> WriteAheadLog:
+    return WriteAheadLog(settings.WAL_DIRECTORY, fsync=settings.WAL_FSYNC)
+
+
+async def save_changes(wal: WriteAheadLog, state: StateType) -> None:
+    """
+    Append the entities changed since the previous call (see ChangeSet) to the log as a single record,
+    leaving out the ones gone from the state by now.
+    The record is packed right away and written off the event loop, the callers hold the state "write_lock"
+    until it is written, so the records are written in the same order the changes are made.
+    """
+    if not state["changes"]:
+        return
+
+    changes, state["changes"] = state["changes"], ChangeSet()
+
+    new_nodes = [state["nodes"][node_id] for node_id in changes.new_nodes if node_id in state["nodes"]]
+    jobs = [state["jobs"][job_id] for job_id in {**changes.new_jobs, **changes.updated_jobs} if job_id in state["jobs"]]
+
+    record = pack_record(new_nodes, list(changes.removed_nodes), jobs)
+    try:
+        await asyncio.to_thread(wal.append, record)
+    except BaseException:
+        # nothing is written (or the record is torn), so everything is retried by the next call
+        state["changes"].update(changes)
+        raise
@@ -0,0 +1,2 @@
+# the schemas of the nodes import the services (which import those schemas back), so the services go first
+import app.services  # noqa: F401
@@ -0,0 +1,100 @@
+"""
+Synthetic clusters and workloads for the benchmarks, reproducible by the seed of the given 'random.Random'.
+"""
+
+import math
+import random
+import uuid
+from dataclasses import dataclass
+from uuid import UUID
+
+from app.database import NodeModel, StateType
+from app.schemas.jobs import CreateJobRequest
+from app.schemas.nodes import CreateNodeRequest
+from app.services.jobs_scheduler import JobsScheduler
+
+
+@dataclass(frozen=True)
+class ClusterSpec:
+    nodes: int
+    max_concurrent_jobs: tuple[int, int] = (1, 8)  # uniform, inclusive
+    vcpu_units: tuple[int, ...] = (8, 16, 32, 64)  # picked at random
+    memory: tuple[int, ...] = (16384, 32768, 65536, 131072)  # MB, picked at random
+    max_total_jobs: int = 100
+
+    @classmethod
+    def for_jobs(cls, jobs: int, jobs_per_node: int = 50, headroom: float = 2.0) -> "ClusterSpec":
+        """
+        The cluster taking the given number of jobs with room to spare (e.g. for the jobs of the removed nodes).
+        """
+        nodes = max(2, math.ceil(jobs / jobs_per_node))
+        return cls(nodes=nodes, max_total_jobs=max(1, math.ceil(jobs * headroom / nodes)))
+
+
+@dataclass(frozen=True)
+class WorkloadSpec:
+    jobs: int
+    batch_size: tuple[int, int] = (1, 50)  # uniform, inclusive
+    run_time_median: int = 60000  # ms, log-normally distributed
+    run_time_sigma: float = 1.0
+    vcpu_units: tuple[int, ...] = (1, 1, 1, 2, 4)  # picked at random
+    memory: tuple[int, ...] = (128, 256, 512, 1024, 2048)  # MB, picked at random
+
+
+def generate_nodes(spec: ClusterSpec, rng: random.Random) -> list[CreateNodeRequest]:
+    return [
+        CreateNodeRequest(
+            max_concurrent_jobs=rng.randint(*spec.max_concurrent_jobs),
+            max_total_jobs=spec.max_total_jobs,
+            vcpu_units=rng.choice(spec.vcpu_units),
+            memory=rng.choice(spec.memory),
+        )
+        for _ in range(spec.nodes)
+    ]
+
+
+def generate_cluster(state: StateType, spec: ClusterSpec, rng: random.Random) -> list[UUID]:
+    """
+    Provision the nodes of the cluster in the state, returns their ids.
+    """
+    node_ids = []
+    for node in generate_nodes(spec, rng):
+        node_id = uuid.uuid4()
+        state["nodes"][node_id] = NodeModel(
+            id=node_id,
+            max_concurrent_jobs=node.max_concurrent_jobs,
+            max_total_jobs=node.max_total_jobs,
+            vcpu_units=node.vcpu_units,
+            memory=node.memory,
+            jobs=[],
+            metadata=JobsScheduler.init_node_metadata(node.max_concurrent_jobs),
+        )
+        JobsScheduler.refresh_threads_metadata(state, node_id)
+        node_ids.append(node_id)
+
+    return node_ids
+
+
+def generate_workload(spec: WorkloadSpec, rng: random.Random) -> list[list[CreateJobRequest]]:
+    """
+    The jobs of the workload split into the batches (as they are submitted).
+    """
+    batches = []
+    remaining = spec.jobs
+    while remaining:
+        size = min(remaining, rng.randint(*spec.batch_size))
+        batches.append(
+            [
+                CreateJobRequest(
+                    total_run_time=max(
+                        1, round(rng.lognormvariate(math.log(spec.run_time_median), spec.run_time_sigma))
+                    ),
+                    vcpu_units=rng.choice(spec.vcpu_units),
+                    memory=rng.choice(spec.memory),
+                )
+                for _ in range(size)
+            ]
+        )
+        remaining -= size
+
+    return batches
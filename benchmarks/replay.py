@@ -0,0 +1,306 @@
+"""
+Load test: the workload trace (see 'benchmarks.trace') replayed against the API or right against the services,
+in the wall time sped up by the given factor and with up to the given number of the requests in flight.
+
+Targets:
+- services: the in-memory services are called in process (the cost of the scheduler alone);
+- api: the app is called in process through ASGI (plus the validation, the serialization and the middlewares);
+- --url: a running server is called over HTTP (its state is not reset, so it should be a fresh one).
+
+Reported per endpoint: the latency percentiles and the errors (by the status) of the requests.
+The operations on the jobs/nodes of a rejected batch are skipped, those on the ones not created yet wait for them.
+
+Usage: PYTHONPATH=. python -m benchmarks.replay [--trace trace.jsonl] [--target services|api] [--url URL]
+       [--concurrency 8 --speedup 0 --hours 1 --batches-per-hour 600 --nodes 50 --seed 42]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable
+from uuid import UUID
+
+import httpx
+from fastapi import HTTPException
+
+from app.config import get_settings, Settings
+from app.main import app
+from app.schemas.jobs import CreateJobRequest
+from app.schemas.nodes import CreateNodeRequest
+from app.services.crud.jobs_service import InMemoryJobsService
+from app.services.crud.nodes_service import InMemoryNodesService
+from benchmarks.generators import ClusterSpec, WorkloadSpec
+from benchmarks.run import reset_state, silence_app_logging, summarize
+from benchmarks.trace import read_trace, synthetic_trace, TraceEvent
+
+settings: Settings = get_settings()
+
+ENDPOINTS = {
+    "provision_nodes": f"POST {settings.API_V1_PREFIX}/nodes",
+    "submit_jobs": f"POST {settings.API_V1_PREFIX}/jobs",
+    "terminate_job": f"DELETE {settings.API_V1_PREFIX}/jobs/{{id}}",
+    "remove_node": f"DELETE {settings.API_V1_PREFIX}/nodes/{{id}}",
+}
+
+
+class Target(ABC):
+    """
+    The operations of the trace, the failed ones raise 'HTTPException'.
+    """
+
+    @abstractmethod
+    async def provision_nodes(self, nodes: list[dict]) -> list[UUID]:
+        pass
+
+    @abstractmethod
+    async def submit_jobs(self, jobs: list[dict]) -> list[UUID]:
+        """
+        The ids in order of the created jobs, i.e. sorted by the run time (see 'InMemoryJobsService.submit_jobs').
+        """
+
+    @abstractmethod
+    async def terminate_job(self, job_id: UUID) -> None:
+        pass
+
+    @abstractmethod
+    async def remove_node(self, node_id: UUID) -> None:
+        pass
+
+
+class ServicesTarget(Target):
+    async def provision_nodes(self, nodes: list[dict]) -> list[UUID]:
+        node_entities = await InMemoryNodesService.provision_nodes([CreateNodeRequest(**node) for node in nodes])
+        return [node_entity.id for node_entity in node_entities]
+
+    async def submit_jobs(self, jobs: list[dict]) -> list[UUID]:
+        job_entities = await InMemoryJobsService.submit_jobs([CreateJobRequest(**job) for job in jobs])
+        return [job_entity.id for job_entity in job_entities]
+
+    async def terminate_job(self, job_id: UUID) -> None:
+        await InMemoryJobsService.terminate_job(job_id)
+
+    async def remove_node(self, node_id: UUID) -> None:
+        await InMemoryNodesService.remove_node(node_id)
+
+
+class ApiTarget(Target):
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+
+    async def _request(self, method: str, path: str, body: list[dict] | None = None) -> httpx.Response:
+        response = await self.client.request(method, f"{settings.API_V1_PREFIX}{path}", json=body)
+        if response.is_error:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+        return response
+
+    async def provision_nodes(self, nodes: list[dict]) -> list[UUID]:
+        response = await self._request("POST", "/nodes", nodes)
+        return [UUID(node["id"]) for node in response.json()]
+
+    async def submit_jobs(self, jobs: list[dict]) -> list[UUID]:
+        response = await self._request("POST", "/jobs", jobs)
+        return [UUID(job["id"]) for job in response.json()]
+
+    async def terminate_job(self, job_id: UUID) -> None:
+        await self._request("DELETE", f"/jobs/{job_id}")
+
+    async def remove_node(self, node_id: UUID) -> None:
+        await self._request("DELETE", f"/nodes/{node_id}")
+
+
+@dataclass
+class EndpointReport:
+    latencies: list[float] = field(default_factory=list)  # seconds
+    errors: Counter[str] = field(default_factory=Counter)  # by the status or the type of the exception
+    skipped: int = 0
+
+    def __str__(self) -> str:
+        requests = len(self.latencies)
+        errors = sum(self.errors.values())
+        line = f"n={requests:<7}"
+        if requests:
+            summary = summarize(self.latencies)
+            line += (
+                f"p50={summary['p50_ms']:8.3f} ms p99={summary['p99_ms']:8.3f} ms max={summary['max_ms']:8.3f} ms "
+                f"errors={errors / requests:.1%}"
+            )
+        if self.errors:
+            line += " (" + ", ".join(f"{status}: {count}" for status, count in self.errors.most_common()) + ")"
+        if self.skipped:
+            line += f" skipped={self.skipped}"
+        return line
+
+
+@dataclass
+class ReplayReport:
+    endpoints: dict[str, EndpointReport] = field(default_factory=lambda: {name: EndpointReport() for name in ENDPOINTS})
+    wall_time: float = 0.0  # seconds
+    max_lag: float = 0.0  # seconds, the latest start of an operation against the (sped up) trace
+
+    def __str__(self) -> str:
+        requests = sum(len(report.latencies) for report in self.endpoints.values())
+        lines = [
+            f"{requests} requests in {self.wall_time:.2f} s ({requests / max(self.wall_time, 1e-9):,.0f}/s), "
+            f"max lag {self.max_lag * 1000:.1f} ms"
+        ]
+        for operation, report in self.endpoints.items():
+            lines.append(f"{ENDPOINTS[operation]:<28} {report}")
+        return "\n".join(lines)
+
+
+class Replay:
+    def __init__(self, target: Target, concurrency: int = 1, speedup: float = 0.0) -> None:
+        """
+        'speedup' is the factor the time of the trace is divided by, 0 for no waiting between the operations.
+        """
+        self.target = target
+        self.speedup = speedup
+        self.report = ReplayReport()
+        self._slots = asyncio.Semaphore(concurrency)
+        # the ids resolved once the operations creating them are done, 'None' for the rejected ones
+        self._job_ids: list[asyncio.Future[UUID | None]] = []
+        self._node_ids: list[asyncio.Future[UUID | None]] = []
+
+    async def run(self, events: Iterable[TraceEvent]) -> ReplayReport:
+        loop = asyncio.get_running_loop()
+        tasks = []
+        started_at = time.perf_counter()
+        for event in events:
+            if self.speedup:
+                delay = event["at"] / self.speedup - (time.perf_counter() - started_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.report.max_lag = max(self.report.max_lag, -delay)
+
+            # the ids of the trace are assigned in order of the events, not of the (concurrent) responses
+            if event["op"] == "provision_nodes":
+                futures = [loop.create_future() for _ in event["nodes"]]
+                self._node_ids.extend(futures)
+                operation = self._create(event["op"], event["nodes"], futures)
+            elif event["op"] == "submit_jobs":
+                futures = [loop.create_future() for _ in event["jobs"]]
+                self._job_ids.extend(futures)
+                operation = self._create(event["op"], event["jobs"], futures)
+            elif event["op"] == "terminate_job":
+                operation = self._delete(event["op"], self._job_ids[event["job"]])
+            else:
+                operation = self._delete(event["op"], self._node_ids[event["node"]])
+
+            await self._slots.acquire()  # released by the operation
+            tasks.append(asyncio.create_task(operation))
+
+        await asyncio.gather(*tasks)
+        self.report.wall_time = time.perf_counter() - started_at
+        return self.report
+
+    async def _call(self, operation: str, *args: object) -> object:
+        report = self.report.endpoints[operation]
+        started_at = time.perf_counter()
+        try:
+            return await getattr(self.target, operation)(*args)
+        except HTTPException as e:
+            report.errors[str(e.status_code)] += 1
+            return None
+        except Exception as e:  # the transport errors and the bugs of the target alike, by the type
+            report.errors[type(e).__name__] += 1
+            return None
+        finally:
+            report.latencies.append(time.perf_counter() - started_at)
+
+    async def _create(self, operation: str, items: list[dict], futures: list[asyncio.Future[UUID | None]]) -> None:
+        try:
+            ids = await self._call(operation, items)
+            if ids is not None:
+                # the jobs come back sorted by the run time (stable), the nodes in order
+                order = range(len(items))
+                if operation == "submit_jobs":
+                    order = sorted(order, key=lambda index: items[index]["total_run_time"], reverse=True)
+                for index, item_id in zip(order, ids):
+                    futures[index].set_result(item_id)
+        finally:
+            self._slots.release()
+            # the operations waiting for the ids are skipped, whatever went wrong (the waiting ones hang otherwise)
+            for future in futures:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _delete(self, operation: str, future: asyncio.Future[UUID | None]) -> None:
+        try:
+            item_id = await future
+            if item_id is None:
+                self.report.endpoints[operation].skipped += 1
+                return
+            await self._call(operation, item_id)
+        finally:
+            self._slots.release()
+
+
+@asynccontextmanager
+async def open_target(target: str, url: str | None) -> AsyncIterator[Target]:
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+            yield ApiTarget(client)
+        return
+
+    reset_state()
+    if target == "services":
+        yield ServicesTarget()
+        return
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            yield ApiTarget(client)
+
+
+async def replay(
+    events: Iterable[TraceEvent],
+    target: str = "services",
+    url: str | None = None,
+    concurrency: int = 1,
+    speedup: float = 0.0,
+) -> ReplayReport:
+    async with open_target(target, url) as opened_target:
+        return await Replay(opened_target, concurrency, speedup).run(events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="the trace to replay, a synthetic one is generated otherwise")
+    parser.add_argument("--target", choices=("services", "api"), default="services")
+    parser.add_argument("--url", help="the base URL of a running server, e.g. http://localhost:3000")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at most")
+    parser.add_argument("--speedup", type=float, default=0.0, help="of the time of the trace, 0 for no waiting")
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--batches-per-hour", type=float, default=600.0)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--terminations", type=float, default=0.05, help="share of the jobs terminated")
+    parser.add_argument("--removals", type=int, default=5, help="nodes removed")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    silence_app_logging()
+    if args.trace:
+        events = list(read_trace(args.trace))
+    else:
+        rng = random.Random(args.seed)
+        workload = WorkloadSpec(jobs=round(args.hours * args.batches_per_hour * sum(WorkloadSpec.batch_size) / 2))
+        events = synthetic_trace(
+            ClusterSpec(nodes=args.nodes),
+            workload,
+            rng,
+            batches_per_hour=args.batches_per_hour,
+            terminations=args.terminations,
+            removals=args.removals,
+        )
+
+    print(asyncio.run(replay(events, args.target, args.url, args.concurrency, args.speedup)))
+
+
+if __name__ == "__main__":
+    main()
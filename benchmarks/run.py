@@ -0,0 +1,210 @@
+"""
+Latency of the scheduler operations on the synthetic clusters and workloads (see 'benchmarks.generators'):
+- submit_jobs: a batch of jobs submitted through the jobs service, as the API does it;
+- schedule_job: a single job placed by the scheduler;
+- handle_job_termination: a random active job terminated;
+- remove_node: a random node removed through the nodes service, its jobs moved to the other nodes;
+- update_jobs: the due jobs swept as the time goes by, from the first job start to the last job finish.
+
+Usage: PYTHONPATH=. python -m benchmarks.run [--sizes 10 100 ...] [--save | --compare] [--threshold 1.5]
+
+The results (milliseconds per operation) are stored in 'benchmarks/baseline.json' with '--save'
+and compared against it with '--compare': the operations which mean latency got slower than 'threshold' times
+the baseline one are reported and the exit code is 1. The baseline is only comparable on the same machine.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Iterator
+
+from app.database import init_state, JobModel, state
+from app.services.crud.jobs_service import InMemoryJobsService
+from app.services.crud.nodes_service import InMemoryNodesService
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.enums.jobs import JobStatus
+from benchmarks.generators import (
+    ClusterSpec,
+    generate_cluster,
+    generate_workload,
+    WorkloadSpec,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+SIZES = (10, 100, 1000, 10000, 100000)
+SAMPLES = 1000  # operations measured at most per size (terminations, node removals are capped by the cluster)
+UPDATE_STEPS = 100
+SEED = 42
+MIN_COMPARED_MS = 1.0  # the operations which took less in total are too noisy to be compared
+
+Results = dict[str, dict[str, dict[str, float]]]  # size -> operation -> statistic -> value
+
+
+def reset_state() -> None:
+    """
+    The services work on the module level state, so it is reset in place.
+    """
+    state.clear()
+    state.update(init_state())
+
+
+def silence_app_logging() -> None:
+    # the scheduler logs every sweep on the INFO level
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("app."):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "total_ms": sum(latencies) * 1000,
+    }
+
+
+def timed(operation: Callable[[], object]) -> float:
+    started_at = time.perf_counter()
+    operation()
+    return time.perf_counter() - started_at
+
+
+async def timed_async(operation: Callable[[], object]) -> float:
+    started_at = time.perf_counter()
+    await operation()  # type: ignore[misc]
+    return time.perf_counter() - started_at
+
+
+def sample(rng: random.Random, items: list, count: int) -> list:
+    return rng.sample(items, min(count, len(items)))
+
+
+def jobs_of(size: int, rng: random.Random) -> Iterator[JobModel]:
+    for batch in generate_workload(WorkloadSpec(jobs=size), rng):
+        for job in batch:
+            yield JobModel(
+                id=uuid.uuid4(),
+                total_run_time=job.total_run_time,
+                vcpu_units=job.vcpu_units,
+                memory=job.memory,
+            )
+
+
+async def benchmark_submit_jobs(size: int) -> list[float]:
+    rng = random.Random(SEED)
+    reset_state()
+    generate_cluster(state, ClusterSpec.for_jobs(size), rng)
+    return [
+        await timed_async(lambda: InMemoryJobsService.submit_jobs(batch))
+        for batch in generate_workload(WorkloadSpec(jobs=size), rng)
+    ]
+
+
+async def benchmark_scheduler(size: int) -> dict[str, list[float]]:
+    """
+    The operations run one after another on the same state: the jobs are placed,
+    some of them are terminated, some nodes are removed and the rest of the jobs are swept once finished.
+    """
+    rng = random.Random(SEED)
+    reset_state()
+    node_ids = generate_cluster(state, ClusterSpec.for_jobs(size), rng)
+    latencies: dict[str, list[float]] = {}
+
+    job_ids = []
+    latencies["schedule_job"] = []
+    for job_entity in jobs_of(size, rng):
+        JobsScheduler.add_job(state, job_entity)
+        latencies["schedule_job"].append(timed(lambda: JobsScheduler.schedule_job(state, job_entity.id)))
+        job_ids.append(job_entity.id)
+
+    latencies["handle_job_termination"] = []
+    for job_id in sample(rng, job_ids, SAMPLES):
+        job_entity = state["jobs"][job_id]
+        if job_entity.status not in (JobStatus.SCHEDULED, JobStatus.RUNNING):
+            continue
+        with JobsScheduler.fresh(state):
+            latencies["handle_job_termination"].append(
+                timed(lambda: JobsScheduler.handle_job_termination(state, job_id))
+            )
+
+    latencies["remove_node"] = [
+        await timed_async(lambda: InMemoryNodesService.remove_node(node_id))
+        for node_id in sample(rng, node_ids, max(1, len(node_ids) // 10))
+    ]
+
+    active_jobs = [JobsScheduler.get_job(state, job_id) for job_id in state["jobs"]]
+    start = min(job_entity.expected_to_start_at for job_entity in active_jobs)
+    finish = max(job_entity.expected_to_finish_at for job_entity in active_jobs)
+    step = (finish - start) / UPDATE_STEPS
+    latencies["update_jobs"] = [
+        timed(lambda: JobsScheduler.update_jobs(state, start + step * index))
+        for index in range(1, UPDATE_STEPS + 2)  # the last one is past all the finishes
+    ]
+    assert not state["events"].is_due(finish + timedelta(seconds=1))
+    return latencies
+
+
+async def run(sizes: list[int]) -> Results:
+    results: Results = {}
+    for size in sizes:
+        latencies = {"submit_jobs": await benchmark_submit_jobs(size), **await benchmark_scheduler(size)}
+        results[str(size)] = {operation: summarize(values) for operation, values in latencies.items() if values}
+        for operation, summary in results[str(size)].items():
+            print(
+                f"{size:>7} {operation:<24} n={summary['count']:<6.0f} p50={summary['p50_ms']:9.3f} ms "
+                f"p99={summary['p99_ms']:9.3f} ms max={summary['max_ms']:9.3f} ms"
+            )
+    return results
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> list[str]:
+    regressions = []
+    for size, operations in results.items():
+        for operation, summary in operations.items():
+            baseline_summary = baseline.get(size, {}).get(operation)
+            if baseline_summary is None or baseline_summary["total_ms"] < MIN_COMPARED_MS:
+                continue
+
+            ratio = summary["mean_ms"] / baseline_summary["mean_ms"]
+            print(f"{size:>7} {operation:<24} x{ratio:.2f} of the baseline")
+            if ratio > threshold:
+                regressions.append(f"{operation} ({size} jobs): x{ratio:.2f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--save", action="store_true", help="store the results as the baseline")
+    action.add_argument("--compare", action="store_true", help="compare the results against the baseline")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    args = parser.parse_args()
+
+    silence_app_logging()
+    results = asyncio.run(run(args.sizes))
+    if args.save:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        BASELINE_PATH.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+    elif args.compare:
+        regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.threshold)
+        if regressions:
+            print("Regressions:", *regressions, sep="\n  ")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Serialization of a jobs listing response (10k jobs by default), the previous path against the current one:
+- the previous path: 'Job.from_obj' models, which FastAPI dumps, re-validates against the 'response_model'
+  and serializes to JSON (the way 'fastapi.routing.serialize_response' and 'JSONResponse' do it);
+- the current path: the job entities are encoded to JSON bytes at once by the precompiled 'jobs_encoder'.
+
+Usage: PYTHONPATH=. python -m benchmarks.serialization [--jobs 10000] [--repeat 10]
+"""
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from app.database import JobModel
+from app.schemas.jobs import Job, jobs_encoder
+from app.utils.enums.jobs import JobStatus
+
+
+def make_jobs(count: int) -> list[JobModel]:
+    now = datetime.now()
+    return [
+        JobModel(
+            id=uuid.uuid4(),
+            total_run_time=10000,
+            vcpu_units=1,
+            memory=128,
+            node_id=uuid.uuid4(),
+            node_thread_id=index % 8,
+            expected_to_start_at=now + timedelta(seconds=index),
+            expected_to_finish_at=now + timedelta(seconds=index + 10),
+            status=JobStatus.SCHEDULED,
+        )
+        for index in range(count)
+    ]
+
+
+response_model = TypeAdapter(list[Job])
+
+
+def pydantic_models_path(jobs: list[JobModel]) -> bytes:
+    content = [Job.from_obj(job).model_dump() for job in jobs]
+    validated = response_model.validate_python(content)
+    return json.dumps(response_model.dump_python(validated, mode="json")).encode()
+
+
+def encoder_path(jobs: list[JobModel]) -> bytes:
+    return jobs_encoder.dump_json(jobs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.jobs)
+    assert json.loads(pydantic_models_path(jobs)) == json.loads(encoder_path(jobs))
+
+    results = {}
+    for path in (pydantic_models_path, encoder_path):
+        results[path.__name__] = min(timeit.repeat(lambda: path(jobs), number=1, repeat=args.repeat))
+        print(f"{path.__name__:<24} {results[path.__name__] * 1000:8.2f} ms")
+
+    print(f"speedup: x{results['pydantic_models_path'] / results['encoder_path']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Discrete-event simulation: the real scheduler (through the services, as the API drives it) is fed
+with the workload trace (see 'benchmarks.trace') in the virtual time, which jumps from one operation
+of the trace to the next one, so a day of traffic takes seconds.
+
+Reported:
+- throughput: the jobs done per hour of the virtual time;
+- queue wait: the time from the submission of the job till its (final) start, percentiles;
+- utilization: the vCPU time used by the jobs against the vCPU time of the provisioned nodes;
+- rejections: the batches (and their jobs) the cluster had no room for, the failed node removals.
+
+Usage: PYTHONPATH=. python -m benchmarks.simulate [--trace trace.jsonl]
+       [--hours 24 --batches-per-hour 60 --nodes 50 --seed 42 --save-trace trace.jsonl]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from app.database import state
+from app.schemas.jobs import CreateJobRequest
+from app.schemas.nodes import CreateNodeRequest
+from app.services.crud.jobs_service import InMemoryJobsService
+from app.services.crud.nodes_service import InMemoryNodesService
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.clock import use_clock, VirtualClock
+from app.utils.enums.jobs import JobStatus
+from benchmarks.generators import ClusterSpec, WorkloadSpec
+from benchmarks.run import reset_state, silence_app_logging
+from benchmarks.trace import read_trace, synthetic_trace, TraceEvent, write_trace
+
+START = datetime(2024, 1, 1)
+
+
+@dataclass
+class SimulationReport:
+    virtual_time: timedelta = timedelta()
+    wall_time: float = 0.0  # seconds
+    batches: int = 0
+    rejected_batches: int = 0
+    jobs: int = 0
+    rejected_jobs: int = 0
+    done_jobs: int = 0
+    terminated_jobs: int = 0
+    failed_removals: int = 0
+    waits: list[float] = field(default_factory=list)  # seconds
+    used_vcpu_time: float = 0.0  # vCPU * seconds
+    provisioned_vcpu_time: float = 0.0  # vCPU * seconds
+
+    @property
+    def throughput(self) -> float:
+        hours = self.virtual_time.total_seconds() / 3600
+        return self.done_jobs / hours if hours else 0.0
+
+    @property
+    def utilization(self) -> float:
+        return self.used_vcpu_time / self.provisioned_vcpu_time if self.provisioned_vcpu_time else 0.0
+
+    def wait_percentile(self, percentile: float) -> float:
+        if not self.waits:
+            return 0.0
+        waits = sorted(self.waits)
+        return waits[min(len(waits) - 1, int(len(waits) * percentile / 100))]
+
+    def __str__(self) -> str:
+        return "\n".join(
+            [
+                f"virtual time:   {self.virtual_time} in {self.wall_time:.2f} s "
+                f"(x{self.virtual_time.total_seconds() / max(self.wall_time, 1e-9):,.0f})",
+                f"throughput:     {self.throughput:,.1f} jobs/hour ({self.done_jobs} done, "
+                f"{self.terminated_jobs} terminated)",
+                f"queue wait:     p50={self.wait_percentile(50):.1f} s p90={self.wait_percentile(90):.1f} s "
+                f"p99={self.wait_percentile(99):.1f} s mean={statistics.mean(self.waits or [0]):.1f} s",
+                f"utilization:    {self.utilization:.1%} of the provisioned vCPU",
+                f"rejections:     {self.rejected_batches}/{self.batches} batches, {self.rejected_jobs}/{self.jobs} jobs, "
+                f"{self.failed_removals} node removals",
+            ]
+        )
+
+
+class Simulation:
+    def __init__(self) -> None:
+        self.clock = VirtualClock(START)
+        self.report = SimulationReport()
+        self.job_ids: list[UUID | None] = []  # in order of submission by the trace, 'None' for the rejected ones
+        self.node_ids: list[UUID] = []  # in order of provisioning by the trace
+        self.submitted_at: dict[UUID, datetime] = {}
+        self.terminated_at: dict[UUID, datetime] = {}
+        self._vcpu_units = 0  # of the provisioned nodes
+        self._vcpu_since = START
+
+    def _account_capacity(self) -> None:
+        now = self.clock.now()
+        self.report.provisioned_vcpu_time += self._vcpu_units * (now - self._vcpu_since).total_seconds()
+        self._vcpu_since = now
+
+    async def provision_nodes(self, nodes: list[dict]) -> None:
+        self._account_capacity()
+        node_entities = await InMemoryNodesService.provision_nodes([CreateNodeRequest(**node) for node in nodes])
+        self.node_ids.extend(node_entity.id for node_entity in node_entities)
+        self._vcpu_units += sum(node_entity.vcpu_units for node_entity in node_entities)
+
+    async def submit_jobs(self, jobs: list[dict]) -> None:
+        requests = [CreateJobRequest(**job) for job in jobs]
+        positions = {id(request): len(self.job_ids) + index for index, request in enumerate(requests)}
+        self.job_ids.extend([None] * len(requests))
+        self.report.batches += 1
+        self.report.jobs += len(requests)
+        try:
+            # the requests are sorted in place, the same way as the entities are returned
+            job_entities = await InMemoryJobsService.submit_jobs(requests)
+        except HTTPException:
+            self.report.rejected_batches += 1
+            self.report.rejected_jobs += len(requests)
+            return
+
+        for request, job_entity in zip(requests, job_entities):
+            self.job_ids[positions[id(request)]] = job_entity.id
+            self.submitted_at[job_entity.id] = self.clock.now()
+
+    async def terminate_job(self, job: int) -> None:
+        job_id = self.job_ids[job]
+        if job_id is None:
+            return
+        try:
+            await InMemoryJobsService.terminate_job(job_id)
+        except HTTPException:  # done already
+            return
+        self.terminated_at[job_id] = self.clock.now()
+
+    async def remove_node(self, node: int) -> None:
+        node_id = self.node_ids[node]
+        if node_id not in state["nodes"]:
+            return
+        self._account_capacity()
+        vcpu_units = state["nodes"][node_id].vcpu_units
+        try:
+            await InMemoryNodesService.remove_node(node_id)
+        except HTTPException:
+            self.report.failed_removals += 1
+            return
+        self._vcpu_units -= vcpu_units
+
+    async def run(self, events: Iterable[TraceEvent]) -> SimulationReport:
+        started_at = time.perf_counter()
+        with use_clock(self.clock):
+            for event in events:
+                self.clock.set(max(self.clock.now(), START + timedelta(seconds=event["at"])))
+                if event["op"] == "provision_nodes":
+                    await self.provision_nodes(event["nodes"])
+                elif event["op"] == "submit_jobs":
+                    await self.submit_jobs(event["jobs"])
+                elif event["op"] == "terminate_job":
+                    await self.terminate_job(event["job"])
+                elif event["op"] == "remove_node":
+                    await self.remove_node(event["node"])
+
+            # the rest of the jobs run to completion
+            active_jobs = [JobsScheduler.get_job(state, job_id) for job_id in state["jobs"]]
+            finish = max((job_entity.expected_to_finish_at for job_entity in active_jobs), default=self.clock.now())
+            self.clock.set(max(self.clock.now(), finish))
+            JobsScheduler.update_jobs(state)
+            self._account_capacity()
+
+        self._collect()
+        self.report.virtual_time = self.clock.now() - START
+        self.report.wall_time = time.perf_counter() - started_at
+        return self.report
+
+    def _collect(self) -> None:
+        for job_id, submitted_at in self.submitted_at.items():
+            job_entity = JobsScheduler.get_job(state, job_id)
+            started_at, finished_at = job_entity.expected_to_start_at, job_entity.expected_to_finish_at
+            if job_entity.status == JobStatus.DONE:
+                self.report.done_jobs += 1
+            elif job_entity.status == JobStatus.TERMINATED:
+                self.report.terminated_jobs += 1
+                finished_at = min(finished_at, self.terminated_at[job_id])
+                if finished_at <= started_at:  # terminated before it started
+                    continue
+
+            self.report.waits.append((started_at - submitted_at).total_seconds())
+            self.report.used_vcpu_time += job_entity.vcpu_units * (finished_at - started_at).total_seconds()
+
+
+async def simulate(events: Iterable[TraceEvent]) -> SimulationReport:
+    reset_state()
+    return await Simulation().run(events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="the trace to replay, a synthetic one is generated otherwise")
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--batches-per-hour", type=float, default=60.0)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--terminations", type=float, default=0.05, help="share of the jobs terminated")
+    parser.add_argument("--removals", type=int, default=0, help="nodes removed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-trace", help="store the synthetic trace")
+    args = parser.parse_args()
+
+    silence_app_logging()
+    if args.trace:
+        events = list(read_trace(args.trace))
+    else:
+        rng = random.Random(args.seed)
+        workload = WorkloadSpec(jobs=round(args.hours * args.batches_per_hour * sum(WorkloadSpec.batch_size) / 2))
+        events = synthetic_trace(
+            ClusterSpec(nodes=args.nodes),
+            workload,
+            rng,
+            batches_per_hour=args.batches_per_hour,
+            terminations=args.terminations,
+            removals=args.removals,
+        )
+        if args.save_trace:
+            write_trace(args.save_trace, events)
+
+    print(asyncio.run(simulate(events)))
+
+
+if __name__ == "__main__":
+    main()
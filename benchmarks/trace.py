@@ -0,0 +1,78 @@
+"""
+Workload traces: the operations of the API in order of their time, one JSON object per line.
+'at' is the offset (seconds) from the start of the trace, the jobs and the nodes are referred to
+by the order the trace submits/provisions them in (their ids are only known once it is replayed):
+
+    {"at": 0, "op": "provision_nodes", "nodes": [{"max_concurrent_jobs": 4, "max_total_jobs": 100, ...}]}
+    {"at": 1.5, "op": "submit_jobs", "jobs": [{"total_run_time": 60000, "vcpu_units": 1, "memory": 128}]}
+    {"at": 30, "op": "terminate_job", "job": 3}     - the 4th job submitted by the trace
+    {"at": 60, "op": "remove_node", "node": 0}      - the 1st node provisioned by the trace
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from benchmarks.generators import (
+    ClusterSpec,
+    generate_nodes,
+    generate_workload,
+    WorkloadSpec,
+)
+
+OPERATIONS = ("provision_nodes", "submit_jobs", "terminate_job", "remove_node")
+
+TraceEvent = dict[str, Any]
+
+
+def read_trace(path: str | Path) -> Iterator[TraceEvent]:
+    with open(path) as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+
+            event = json.loads(line)
+            if event.get("op") not in OPERATIONS or not isinstance(event.get("at"), (int, float)):
+                raise ValueError(f"{path}:{line_number}: not a trace event: {line.strip()}")
+            yield event
+
+
+def write_trace(path: str | Path, events: Iterable[TraceEvent]) -> None:
+    with open(path, "w") as file:
+        for event in events:
+            file.write(json.dumps(event) + "\n")
+
+
+def synthetic_trace(
+    cluster: ClusterSpec,
+    workload: WorkloadSpec,
+    rng: random.Random,
+    batches_per_hour: float = 60.0,
+    terminations: float = 0.05,
+    removals: int = 0,
+) -> list[TraceEvent]:
+    """
+    The cluster provisioned at once and the batches of the workload arriving as a Poisson process.
+    The given share of the jobs is terminated at random before they are expected to finish,
+    the given number of the nodes is removed at random times.
+    """
+    events: list[TraceEvent] = [
+        {"at": 0.0, "op": "provision_nodes", "nodes": [node.model_dump() for node in generate_nodes(cluster, rng)]}
+    ]
+
+    at, submitted = 0.0, 0
+    for batch in generate_workload(workload, rng):
+        at += rng.expovariate(batches_per_hour / 3600)
+        events.append({"at": at, "op": "submit_jobs", "jobs": [job.model_dump() for job in batch]})
+        for job in batch:
+            if rng.random() < terminations:
+                terminated_at = at + rng.uniform(0, job.total_run_time / 1000)
+                events.append({"at": terminated_at, "op": "terminate_job", "job": submitted})
+            submitted += 1
+
+    for node in rng.sample(range(cluster.nodes), min(removals, cluster.nodes)):
+        events.append({"at": rng.uniform(0, at), "op": "remove_node", "node": node})
+
+    events.sort(key=lambda event: event["at"])  # stable: the submission goes before its termination at the same time
+    return events
@@ -5,7 +5,9 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.config import get_settings
+from app.database import init_state
 from app.main import app as actual_app
+from app.services.crud import jobs_service, nodes_service
 
 settings = get_settings()
 
@@ -22,6 +24,17 @@ def client(app):
         yield c
 
 
+@pytest.fixture
+def isolated_state(monkeypatch):
+    """
+    A fresh state the services (and so the API) work on instead of the global one.
+    """
+    state = init_state()
+    monkeypatch.setattr(jobs_service, "state", state)
+    monkeypatch.setattr(nodes_service, "state", state)
+    return state
+
+
 @pytest.fixture(scope="session")
 def event_loop(request):
     loop = asyncio.get_event_loop_policy().new_event_loop()
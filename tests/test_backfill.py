@@ -0,0 +1,140 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import get_settings
+from app.database import init_state
+from app.services.crud import nodes_service
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.custom_exceptions import NoAvailableNodesLeftException
+from app.utils.enums.jobs import JobStatus
+from app.utils.gaps_index import GapsIndex
+from tests.test_batch_scheduling import create_jobs
+from tests.utils import provision_node, submit_job
+
+settings = get_settings()
+
+
+@pytest.fixture(autouse=True)
+def backfill(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_BACKFILL", True)
+
+
+def terminate(state, job_id):
+    JobsScheduler.handle_job_termination(state, job_id)
+
+
+def test_short_job_fills_the_gap_left_by_terminated_job():
+    state = init_state()
+    node_id = provision_node(state)
+    first_job_id, terminated_job_id, last_job_id = [submit_job(state, total_run_time=60000) for _ in range(3)]
+    last_job_window = (
+        state["jobs"][last_job_id].expected_to_start_at,
+        state["jobs"][last_job_id].expected_to_finish_at,
+    )
+
+    terminate(state, terminated_job_id)
+    short_job_id = submit_job(state, total_run_time=30000)
+    long_job_id = submit_job(state, total_run_time=40000)  # does not fit into the rest of the gap
+
+    thread = state["nodes"][node_id].metadata["threads"][0]
+    assert thread == [first_job_id, short_job_id, last_job_id, long_job_id]
+    assert state["jobs"][short_job_id].expected_to_start_at == state["jobs"][first_job_id].expected_to_finish_at
+    # the jobs scheduled already are not moved
+    assert (state["jobs"][last_job_id].expected_to_start_at, state["jobs"][last_job_id].expected_to_finish_at) == (
+        last_job_window
+    )
+    assert state["gaps"].get(last_job_id) == (state["jobs"][short_job_id].expected_to_finish_at, last_job_window[0])
+
+
+def test_job_after_the_gap_waits_for_its_start():
+    state = init_state()
+    node_id = provision_node(state)
+    running_job_id, next_job_id = [submit_job(state, total_run_time=60000) for _ in range(2)]
+
+    terminate(state, running_job_id)
+    short_job_id = submit_job(state, total_run_time=10)
+    assert state["jobs"][short_job_id].status == JobStatus.RUNNING
+    assert state["jobs"][next_job_id].status == JobStatus.SCHEDULED
+
+    JobsScheduler.update_jobs(state, state["jobs"][next_job_id].expected_to_start_at)
+    assert state["jobs"][short_job_id].status == JobStatus.DONE
+    assert state["jobs"][next_job_id].status == JobStatus.RUNNING
+    assert state["nodes"][node_id].metadata["threads"] == [[next_job_id]]
+
+
+def test_gap_is_restored_on_rollback():
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2, vcpu_units=2)
+    long_job_id = submit_job(state, total_run_time=1000000)
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(3)]
+    terminate(state, job_ids[1])
+    gap = state["gaps"].get(job_ids[2])
+
+    # the first job is put into the gap, the second one does not fit next to the long job anywhere
+    with pytest.raises(NoAvailableNodesLeftException):
+        with JobsScheduler.transaction(state):
+            JobsScheduler.schedule_jobs(state, create_jobs(state, 1) + create_jobs(state, 1, vcpu_units=2))
+
+    assert state["gaps"].get(job_ids[2]) == gap
+    assert state["nodes"][node_id].metadata["threads"] == [[long_job_id], [job_ids[0], job_ids[2]]]
+    assert state["jobs"][job_ids[2]].expected_to_start_at - gap[0] == timedelta(seconds=60)
+
+
+async def test_jobs_of_the_removed_node_are_not_put_into_its_gaps(monkeypatch):
+    state = init_state()
+    monkeypatch.setattr(nodes_service, "state", state)
+    removed_node_id = provision_node(state)
+    first_job_id, terminated_job_id, last_job_id = [submit_job(state, total_run_time=60000) for _ in range(3)]
+    terminate(state, terminated_job_id)
+    node_id = provision_node(state)
+
+    await nodes_service.InMemoryNodesService.remove_node(removed_node_id)
+
+    assert removed_node_id not in state["nodes"]
+    assert state["nodes"][node_id].metadata["threads"][0] == [first_job_id, last_job_id]
+    assert {state["jobs"][job_id].node_id for job_id in (first_job_id, last_job_id)} == {node_id}
+    assert len(state["gaps"]) == 0
+
+
+def test_drained_node_leaves_no_gaps_behind():
+    state = init_state()
+    drained_node_id = provision_node(state)
+    first_job_id, terminated_job_id, last_job_id = [submit_job(state, total_run_time=60000) for _ in range(3)]
+    terminate(state, terminated_job_id)
+    gap = state["gaps"].get(last_job_id)
+    node_id = provision_node(state)
+
+    with JobsScheduler.transaction(state, dry_run=True):
+        JobsScheduler.drain_nodes(state, [drained_node_id])
+        assert len(state["gaps"]) == 0
+    assert state["gaps"].get(last_job_id) == gap
+
+    with JobsScheduler.transaction(state):
+        assert JobsScheduler.drain_nodes(state, [drained_node_id]) == [first_job_id, last_job_id]
+    assert state["nodes"][node_id].metadata["threads"][0] == [first_job_id, last_job_id]
+    assert state["nodes"][drained_node_id].metadata["cordoned"]
+    assert len(state["gaps"]) == 0
+
+
+def test_only_the_gaps_long_enough_are_looked_at():
+    gaps = GapsIndex()
+    now = datetime(2024, 1, 1)
+    short_id, later_id, earlier_id, begun_id, expired_id = [uuid.uuid4() for _ in range(5)]
+    gaps.add(short_id, now + timedelta(minutes=1), now + timedelta(minutes=2))
+    gaps.add(later_id, now + timedelta(minutes=5), now + timedelta(minutes=10))
+    gaps.add(earlier_id, now + timedelta(minutes=3), now + timedelta(minutes=8))
+    gaps.add(begun_id, now - timedelta(minutes=5), now + timedelta(minutes=1))  # long, but shorter by now
+    gaps.add(expired_id, now - timedelta(minutes=10), now - timedelta(minutes=5))
+
+    looked_at = []
+
+    def fits(job_id, start_time):
+        looked_at.append(job_id)
+        return job_id == later_id
+
+    assert gaps.find(timedelta(minutes=4), now, fits) == (later_id, now + timedelta(minutes=5))
+    assert looked_at == [earlier_id, later_id]
+    assert expired_id not in gaps
+    assert len(gaps) == 4
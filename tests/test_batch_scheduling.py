@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+
+from app.database import init_state, JobModel
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.custom_exceptions import NoAvailableNodesLeftException
+from tests.utils import provision_node
+
+
+def create_jobs(state, count, **kwargs):
+    job_ids = []
+    for _ in range(count):
+        job_id = uuid.uuid4()
+        JobsScheduler.add_job(
+            state, JobModel(id=job_id, **{"total_run_time": 10000, "vcpu_units": 1, "memory": 128, **kwargs})
+        )
+        job_ids.append(job_id)
+    return job_ids
+
+
+def test_batch_is_placed_in_given_order():
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2)
+    job_ids = create_jobs(state, 4)
+
+    JobsScheduler.schedule_jobs(state, job_ids)
+
+    assert state["nodes"][node_id].metadata["threads"] == [[job_ids[0], job_ids[2]], [job_ids[1], job_ids[3]]]
+
+
+@pytest.mark.parametrize(
+    "count, job_kwargs",
+    [
+        (11, {}),  # more jobs than the node can take
+        (1, {"vcpu_units": 11}),  # the job does not fit into any node
+    ],
+)
+def test_batch_is_rejected_before_placement(count, job_kwargs):
+    state = init_state()
+    node_id = provision_node(state)
+    job_ids = create_jobs(state, count, **job_kwargs)
+
+    with pytest.raises(NoAvailableNodesLeftException):
+        JobsScheduler.schedule_jobs(state, job_ids)
+
+    assert state["nodes"][node_id].jobs == []
+    assert all(state["jobs"][job_id].node_id is None for job_id in job_ids)
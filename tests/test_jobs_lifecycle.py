@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import init_state
+from app.schemas.jobs import CreateJobRequest
+from app.services.crud import jobs_service
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.clock import use_clock, VirtualClock
+from app.utils.enums.jobs import JobStatus
+from tests.utils import provision_node, submit_job
+
+
+@pytest.fixture
+def virtual_clock():
+    with use_clock(VirtualClock()) as clock:
+        yield clock
+
+
+def test_update_jobs_advances_only_due_jobs(virtual_clock):
+    state = init_state()
+    node_id = provision_node(state)
+
+    short_job_id = submit_job(state, total_run_time=5)
+    long_job_id = submit_job(state, total_run_time=60000)
+    virtual_clock.advance(timedelta(milliseconds=10))
+
+    JobsScheduler.update_jobs(state)
+
+    assert state["jobs"][short_job_id].status == JobStatus.DONE
+    assert state["jobs"][long_job_id].status == JobStatus.RUNNING
+    assert state["nodes"][node_id].metadata["threads"] == [[long_job_id]]
+    assert state["nodes"][node_id].metadata["total_active_jobs"] == 1
+    # only the finish event of the long job is left in the queue
+    assert len(state["events"]) == 1
+
+
+def test_terminated_job_is_detached_right_away():
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2)
+
+    job_id = submit_job(state, total_run_time=60000)
+    JobsScheduler.handle_job_termination(state, job_id)
+
+    assert state["jobs"][job_id].status == JobStatus.TERMINATED
+    assert state["jobs_index"].count(JobStatus.TERMINATED) == 1
+    node_entity = state["nodes"][node_id]
+    assert node_entity.metadata["threads"] == [[], []]
+    assert node_entity.metadata["free_threads"] == 2
+    assert node_entity.metadata["best_fit_thread"] == {"thread_id": 0, "available_at": None}
+
+
+async def test_batch_is_placed_with_a_single_sweep(monkeypatch, virtual_clock):
+    state = init_state()
+    monkeypatch.setattr(jobs_service, "state", state)
+    provision_node(state, max_concurrent_jobs=2)
+    submit_job(state, total_run_time=5)  # due by the time of the batch
+    virtual_clock.advance(timedelta(milliseconds=10))
+
+    sweeps = []
+    monkeypatch.setattr(JobsScheduler, "_advance_jobs", lambda *args: sweeps.append(args[2]))
+    job = CreateJobRequest(total_run_time=60000, vcpu_units=1, memory=128)
+    await jobs_service.InMemoryJobsService.submit_jobs([job] * 3)
+    monkeypatch.undo()
+
+    # a sweep of the due jobs and the one of the placed batch, both as of the same moment
+    assert len(sweeps) == 2 and sweeps[0] == sweeps[1]
+
+
+def test_nothing_is_swept_when_no_job_is_due():
+    state = init_state()
+    provision_node(state, max_concurrent_jobs=2)
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(3)]
+
+    assert [state["jobs"][job_id].status for job_id in job_ids] == [JobStatus.RUNNING] * 2 + [JobStatus.SCHEDULED]
+    # the jobs started right away do not wait for their start events
+    assert not state["events"].is_due(datetime.now())
+
+
+def test_jobs_run_in_the_virtual_time(virtual_clock):
+    state = init_state()
+    provision_node(state)
+    job_id = submit_job(state, total_run_time=3600000)  # an hour
+
+    virtual_clock.advance(timedelta(minutes=59))
+    JobsScheduler.update_jobs(state)
+    assert JobsScheduler.get_job(state, job_id).status == JobStatus.RUNNING
+
+    virtual_clock.advance(timedelta(minutes=1))
+    JobsScheduler.update_jobs(state)
+    assert JobsScheduler.get_job(state, job_id).status == JobStatus.DONE
+
+    with pytest.raises(ValueError):
+        virtual_clock.set(datetime.now() - timedelta(days=1))
@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+
+from app.config import get_settings
+from app.database import init_state, JobModel
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.enums.jobs import JobStatus
+from app.utils.jobs_archive import JobsArchive
+from tests.utils import provision_node, submit_job
+
+settings = get_settings()
+
+
+async def test_finished_jobs_are_archived_after_ttl(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_RETENTION_TTL", 0)
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2)
+
+    done_job_id = submit_job(state, total_run_time=5)
+    running_job_id = submit_job(state, total_run_time=60000)
+    await asyncio.sleep(0.01)
+    JobsScheduler.update_jobs(state)
+
+    assert JobsScheduler.compact_jobs(state) == 1
+    assert list(state["jobs"]) == [running_job_id]
+    assert state["nodes"][node_id].jobs == [running_job_id]
+    assert not state["finished_jobs"]
+
+    archived_job = JobModel(**state["archive"].get(done_job_id))
+    assert archived_job.status == JobStatus.DONE
+    assert archived_job.node_id == node_id
+    assert state["archive"].get(running_job_id) is None
+
+
+def test_finished_jobs_are_retained_up_to_max_count(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_RETENTION_MAX_COUNT", 1)
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=3)
+
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(3)]
+    for job_id in job_ids[:2]:
+        JobsScheduler.handle_job_termination(state, job_id)
+
+    # terminated jobs are visible until the compaction
+    assert state["nodes"][node_id].jobs == job_ids
+
+    assert JobsScheduler.compact_jobs(state) == 1
+    assert state["nodes"][node_id].jobs == job_ids[1:]
+    assert state["archive"].get(job_ids[0])["status"] == JobStatus.TERMINATED
+
+
+def test_archive_drops_oldest_records():
+    archive = JobsArchive(max_size=20)
+    job_ids = [uuid.uuid4() for _ in range(21)]
+    for job_id in job_ids:
+        archive.append(JobModel(id=job_id, total_run_time=1, vcpu_units=1, memory=1, status=JobStatus.DONE))
+
+    assert len(archive) == 19
+    assert archive.get(job_ids[0]) is None
+    assert archive.get(job_ids[1]) is None
+    assert [job["id"] for job in archive] == job_ids[2:]
+    assert archive.get(job_ids[-1]) == {
+        "id": job_ids[-1],
+        "total_run_time": 1,
+        "vcpu_units": 1,
+        "memory": 1,
+        "node_id": None,
+        "node_thread_id": None,
+        "expected_to_start_at": None,
+        "expected_to_finish_at": None,
+        "status": JobStatus.DONE,
+    }
+
+
+def test_archived_jobs_are_found_after_the_oldest_are_dropped():
+    archive = JobsArchive(max_size=20)
+    job_ids = [uuid.uuid4() for _ in range(55)]
+    for job_id in job_ids:
+        archive.append(JobModel(id=job_id, total_run_time=1, vcpu_units=1, memory=1, status=JobStatus.DONE))
+
+    kept_ids = [job["id"] for job in archive]
+    assert kept_ids == job_ids[-len(archive) :]
+    assert all(archive.get(job_id)["id"] == job_id for job_id in kept_ids)
+    assert all(archive.get(job_id) is None for job_id in job_ids[: -len(archive)])
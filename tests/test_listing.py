@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.config import get_settings
+from app.utils.enums.jobs import JobStatus
+
+settings = get_settings()
+
+
+def get_all_pages(client, url, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor is not None else {})})
+        assert response.status_code == 200
+        items += response.json()
+        pages += 1
+        cursor = response.headers.get(settings.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return items, pages
+
+
+def test_jobs_listing_is_paginated_and_filtered(client, isolated_state):
+    node = {"max_concurrent_jobs": 2, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000}
+    node_ids = [node["id"] for node in client.post("/api/v1/nodes", json=[node, node]).json()]
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    job_ids = [job["id"] for job in client.post("/api/v1/jobs", json=[job] * 7).json()]
+    assert client.delete(f"/api/v1/jobs/{job_ids[0]}").status_code == 204
+
+    jobs, pages = get_all_pages(client, "/api/v1/jobs", limit=3)
+    assert [job["id"] for job in jobs] == job_ids
+    assert pages == 3
+
+    running_jobs, _ = get_all_pages(client, "/api/v1/jobs", status="running", limit=2)
+    assert {job["id"] for job in running_jobs} == {
+        job_id for job_id in job_ids if isolated_state["jobs"][UUID(job_id)].status == "running"
+    }
+    assert len(running_jobs) == 4  # 2 nodes by 2 threads
+
+    node_jobs, _ = get_all_pages(client, "/api/v1/jobs", node_id=node_ids[1], limit=1)
+    assert node_jobs and all(job["node_id"] == node_ids[1] for job in node_jobs)
+
+    later = (datetime.now() + timedelta(seconds=90)).isoformat()
+    queued_jobs, _ = get_all_pages(client, "/api/v1/jobs", window_start=later)
+    assert {job["status"] for job in queued_jobs} == {"scheduled"}
+
+
+def test_jobs_listing_by_window_skips_the_statuses_outside_of_it(client, isolated_state, monkeypatch):
+    node = {"max_concurrent_jobs": 1, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000}
+    client.post("/api/v1/nodes", json=[node])
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    job_ids = [job["id"] for job in client.post("/api/v1/jobs", json=[job] * 3).json()]
+
+    looked_at = []
+    jobs = isolated_state["jobs_index"].jobs
+
+    def spy(statuses, after):
+        looked_at.append(statuses)
+        return jobs(statuses, after)
+
+    monkeypatch.setattr(isolated_state["jobs_index"], "jobs", spy)
+
+    earlier = (datetime.now() - timedelta(seconds=1)).isoformat()
+    assert client.get("/api/v1/jobs", params={"window_end": earlier}).json() == []
+    assert JobStatus.SCHEDULED not in looked_at[-1]
+
+    later = (datetime.now() + timedelta(seconds=90)).isoformat()
+    assert [job["id"] for job in client.get("/api/v1/jobs", params={"window_start": later}).json()] == job_ids[1:]
+    assert JobStatus.DONE not in looked_at[-1]
+
+
+def test_negative_cursor_is_rejected(client, isolated_state):
+    assert client.get("/api/v1/jobs", params={"cursor": -5}).status_code == 422
+    assert client.get("/api/v1/nodes", params={"cursor": -5}).status_code == 422
+
+
+def test_nodes_listing_is_paginated_without_jobs(client, isolated_state):
+    node = {"max_concurrent_jobs": 1, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000}
+    node_ids = [node["id"] for node in client.post("/api/v1/nodes", json=[node] * 5).json()]
+    job_id = client.post("/api/v1/jobs", json=[{"total_run_time": 60000, "vcpu_units": 1, "memory": 128}]).json()[0][
+        "id"
+    ]
+
+    nodes, pages = get_all_pages(client, "/api/v1/nodes", limit=2, jobs="none")
+    assert [node["id"] for node in nodes] == node_ids
+    assert pages == 3
+    assert all("jobs" not in node and "job_ids" not in node for node in nodes)
+
+    nodes, _ = get_all_pages(client, "/api/v1/nodes", jobs="ids")
+    assert nodes[0]["job_ids"] == [job_id]
+    assert "jobs" not in nodes[0]
+
+
+def test_listings_are_streamed_as_ndjson(client, isolated_state, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_CHUNK_SIZE", 2)
+    node = {"max_concurrent_jobs": 5, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000}
+    node_id = client.post("/api/v1/nodes", json=[node]).json()[0]["id"]
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    jobs = client.post("/api/v1/jobs", json=[job] * 5).json()
+
+    response = client.get("/api/v1/jobs", headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in response.iter_lines()] == [job["id"] for job in jobs]
+
+    response = client.get("/api/v1/jobs", params={"stream": True, "cursor": 0, "limit": 3})
+    assert [json.loads(line)["id"] for line in response.iter_lines()] == [job["id"] for job in jobs[1:4]]
+
+    response = client.get("/api/v1/nodes", params={"stream": True, "jobs": "ids"})
+    assert [json.loads(line) for line in response.iter_lines()] == [
+        {**node, "id": node_id, "cordoned": False, "job_ids": [job["id"] for job in jobs]}
+    ]
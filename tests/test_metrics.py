@@ -0,0 +1,52 @@
+import pytest
+
+from app.config import get_settings
+from app.services import metrics
+
+settings = get_settings()
+
+
+@pytest.fixture
+def isolated_state(isolated_state, monkeypatch):
+    monkeypatch.setattr(metrics, "state", isolated_state)
+    return isolated_state
+
+
+def get_samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return dict(line.rsplit(" ", 1) for line in response.text.splitlines() if not line.startswith("#"))
+
+
+def test_scheduler_metrics_are_exported(client, isolated_state):
+    before = get_samples(client)
+    node = {"max_concurrent_jobs": 2, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000}
+    node_id = client.post("/api/v1/nodes", json=[node]).json()[0]["id"]
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    client.post("/api/v1/jobs", json=[job] * 5)
+
+    samples = get_samples(client)
+    placements = int(samples["scheduler_placement_seconds_count"]) - int(before["scheduler_placement_seconds_count"])
+    assert placements == 5
+    assert int(samples["scheduler_resources_check_seconds_count"]) > int(
+        before["scheduler_resources_check_seconds_count"]
+    )
+    assert int(samples['scheduler_batch_size_bucket{le="5"}']) - int(before['scheduler_batch_size_bucket{le="5"}']) == 1
+    assert samples['scheduler_jobs{status="running"}'] == "2"
+    assert samples[f'scheduler_node_active_jobs{{node_id="{node_id}"}}'] == "5"
+    assert samples[f'scheduler_node_free_threads{{node_id="{node_id}"}}'] == "0"
+    assert samples[f'scheduler_node_queue_depth{{node_id="{node_id}"}}'] == "3"
+
+
+def test_jobs_waiting_behind_a_gap_are_queued(client, isolated_state, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_BACKFILL", True)
+    node = {"max_concurrent_jobs": 1, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000}
+    node_id = client.post("/api/v1/nodes", json=[node]).json()[0]["id"]
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    job_ids = [job["id"] for job in client.post("/api/v1/jobs", json=[job] * 3).json()]
+    assert get_samples(client)[f'scheduler_node_queue_depth{{node_id="{node_id}"}}'] == "2"
+
+    # the next job keeps its start, so it waits behind the gap left by the terminated one
+    assert client.delete(f"/api/v1/jobs/{job_ids[0]}").status_code == 204
+    assert get_samples(client)[f'scheduler_node_queue_depth{{node_id="{node_id}"}}'] == "2"
@@ -0,0 +1,55 @@
+def provision_nodes(client, count, **kwargs):
+    node = {"max_concurrent_jobs": 2, "max_total_jobs": 10, "vcpu_units": 10, "memory": 10000, **kwargs}
+    return [node["id"] for node in client.post("/api/v1/nodes", json=[node] * count).json()]
+
+
+def snapshot(client):
+    return client.get("/api/v1/nodes").json(), client.get("/api/v1/jobs").json()
+
+
+def test_dry_run_reports_the_schedule_and_keeps_the_state(client, isolated_state):
+    node_ids = provision_nodes(client, 3)
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    client.post("/api/v1/jobs", json=[job] * 6)
+    before = snapshot(client)
+
+    response = client.post("/api/v1/nodes/drain", json={"node_ids": node_ids[:2], "dry_run": True})
+    assert response.status_code == 200
+    moved_jobs = response.json()
+    assert len(moved_jobs) == 4 and all(job["node_id"] == node_ids[2] for job in moved_jobs)
+    assert snapshot(client) == before
+
+    response = client.post("/api/v1/nodes/drain", json={"node_ids": node_ids[:2]})
+    assert [(job["id"], job["node_id"]) for job in response.json()] == [
+        (job["id"], job["node_id"]) for job in moved_jobs
+    ]
+    nodes, jobs = snapshot(client)
+    assert [node["id"] for node in nodes] == node_ids[2:]
+    assert len(nodes[0]["jobs"]) == 6
+
+
+def test_nodes_are_drained_all_or_none(client, isolated_state):
+    node_ids = provision_nodes(client, 3, max_total_jobs=2)
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    client.post("/api/v1/jobs", json=[job] * 3)
+    before = snapshot(client)
+
+    # 3 jobs do not fit into the 2 slots of the node left
+    assert client.post("/api/v1/nodes/drain", json={"node_ids": node_ids[:2]}).status_code == 503
+    assert snapshot(client) == before
+    assert client.post("/api/v1/nodes/drain", json={"node_ids": [node_ids[0], "unknown"]}).status_code == 422
+
+
+def test_cordoned_node_takes_no_jobs_until_uncordoned(client, isolated_state):
+    node_ids = provision_nodes(client, 2)
+    job = {"total_run_time": 60000, "vcpu_units": 1, "memory": 128}
+    client.post("/api/v1/jobs", json=[job] * 2)
+
+    response = client.post("/api/v1/nodes/drain", json={"node_ids": [node_ids[0]], "action": "cordon"})
+    assert all(job["node_id"] == node_ids[1] for job in response.json())
+    nodes, _ = snapshot(client)
+    assert [(node["cordoned"], len(node["jobs"])) for node in nodes] == [(True, 0), (False, 2)]
+    assert all(job["node_id"] == node_ids[1] for job in client.post("/api/v1/jobs", json=[job]).json())
+
+    assert client.post("/api/v1/nodes/uncordon", json=[node_ids[0]]).status_code == 204
+    assert all(job["node_id"] == node_ids[0] for job in client.post("/api/v1/jobs", json=[job]).json())
@@ -0,0 +1,46 @@
+from app.config import get_settings
+from app.database import init_state
+from tests.utils import provision_node, submit_job
+
+settings = get_settings()
+
+
+def test_job_is_queued_on_earliest_available_node():
+    state = init_state()
+    first_node_id = provision_node(state)
+    second_node_id = provision_node(state)
+    full_node_id = provision_node(state, max_total_jobs=1)
+
+    submit_job(state, total_run_time=60000)
+    submit_job(state, total_run_time=30000)
+    submit_job(state, total_run_time=10000)
+    assert list(state["nodes_index"].free_nodes()) == []
+    assert full_node_id not in state["nodes_index"]
+    assert [node_id for node_id, _ in state["nodes_index"].busy_nodes()] == [second_node_id, first_node_id]
+
+    job_id = submit_job(state, total_run_time=40000)
+    assert state["jobs"][job_id].node_id == second_node_id
+    assert [node_id for node_id, _ in state["nodes_index"].busy_nodes()] == [first_node_id, second_node_id]
+
+
+def test_jobs_are_routed_between_shards(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_SHARDS", 4)
+    state = init_state()
+    node_ids = [provision_node(state, max_total_jobs=2) for _ in range(8)]
+    large_node_id = provision_node(state, vcpu_units=64, memory=64000)
+    nodes_index = state["nodes_index"]
+
+    # the provisioning order is global
+    assert [node_id for _, node_id in nodes_index.provisioned_nodes()] == [*node_ids, large_node_id]
+    assert nodes_index.summary().free_slots == 8 * 2 + 10
+
+    large_job_id = submit_job(state, total_run_time=60000, vcpu_units=32)
+    assert state["jobs"][large_job_id].node_id == large_node_id
+
+    # the shards with more free nodes take the jobs first, so all the nodes are busy before any job is queued
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(8)]
+    assert {state["jobs"][job_id].node_id for job_id in job_ids} == set(node_ids)
+    assert nodes_index.summary().free_nodes == 0
+
+    submit_job(state, total_run_time=60000)
+    assert nodes_index.summary().free_slots == 8 * 2 + 10 - 10
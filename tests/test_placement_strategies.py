@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+
+from app.config import get_settings
+from app.database import init_state
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.clock import use_clock, VirtualClock
+from app.utils.enums.scheduler import PlacementStrategy
+from tests.utils import provision_node, submit_job
+
+settings = get_settings()
+
+
+@pytest.mark.parametrize(
+    "strategy, expected_node",
+    [
+        (PlacementStrategy.EARLIEST_START, "large"),
+        (PlacementStrategy.BEST_FIT, "small"),
+        (PlacementStrategy.WORST_FIT, "large"),
+        (PlacementStrategy.WEIGHTED_SCORE, "small"),
+    ],
+)
+def test_free_node_choice(monkeypatch, strategy, expected_node):
+    monkeypatch.setattr(settings, "PLACEMENT_STRATEGY", strategy)
+    state = init_state()
+    nodes = {
+        "large": provision_node(state, vcpu_units=32, memory=64000),
+        "tiny": provision_node(state, vcpu_units=1, memory=64000),
+        "small": provision_node(state, vcpu_units=4, memory=8000),
+    }
+
+    job_id = submit_job(state, total_run_time=10000, vcpu_units=2, memory=4000)
+    assert state["jobs"][job_id].node_id == nodes[expected_node]
+
+
+@pytest.mark.parametrize("strategy", list(PlacementStrategy))
+def test_busy_nodes_fallback(monkeypatch, strategy):
+    monkeypatch.setattr(settings, "PLACEMENT_STRATEGY", strategy)
+    state = init_state()
+    provision_node(state)
+    second_node_id = provision_node(state)
+    submit_job(state, total_run_time=60000)
+    short_job_id = submit_job(state, total_run_time=10000)
+
+    job_id = submit_job(state, total_run_time=10000)
+    assert state["jobs"][job_id].node_id == second_node_id
+    assert state["jobs"][job_id].expected_to_start_at == state["jobs"][short_job_id].expected_to_finish_at
+
+
+@pytest.mark.parametrize("strategy", list(PlacementStrategy))
+def test_resources_are_not_checked_when_disabled(monkeypatch, strategy):
+    monkeypatch.setattr(settings, "PLACEMENT_STRATEGY", strategy)
+    monkeypatch.setattr(settings, "DISABLE_RESOURCES_CHECKS", True)
+    state = init_state()
+    node_id = provision_node(state, vcpu_units=1, memory=64)
+
+    job_id = submit_job(state, total_run_time=10000, vcpu_units=2, memory=128)
+    assert state["jobs"][job_id].node_id == node_id
+    assert state["jobs"][job_id].expected_to_start_at is not None
+
+
+def test_waiting_time_is_scored_as_of_the_placement(monkeypatch):
+    monkeypatch.setattr(settings, "PLACEMENT_STRATEGY", PlacementStrategy.WEIGHTED_SCORE)
+    state = init_state()
+    with use_clock(VirtualClock()) as clock:
+        large_node_id = provision_node(state, vcpu_units=32)
+        submit_job(state, total_run_time=10000)
+        provision_node(state, vcpu_units=2)
+        submit_job(state, total_run_time=20000)
+
+        # the large node becomes available sooner, however late the placement itself runs
+        with JobsScheduler.fresh(state):
+            clock.advance(timedelta(minutes=1))
+            job_id = submit_job(state, total_run_time=1000)
+
+    assert state["jobs"][job_id].node_id == large_node_id
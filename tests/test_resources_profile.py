@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import init_state, JobModel
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.resources_profile import ResourcesProfile
+from tests.utils import provision_node, submit_job
+
+
+def test_peak_is_concurrent_usage():
+    now = datetime.now()
+    profile = ResourcesProfile()
+    profile.add(uuid.uuid4(), now, now + timedelta(seconds=10), 1, 1000)
+    profile.add(uuid.uuid4(), now + timedelta(seconds=10), now + timedelta(seconds=20), 3, 500)
+    job_id = uuid.uuid4()
+    profile.add(job_id, now + timedelta(seconds=5), now + timedelta(seconds=15), 2, 2000)
+
+    assert profile.peak(now, now + timedelta(seconds=5)) == (1, 1000)
+    assert profile.peak(now, now + timedelta(seconds=20)) == (5, 3000)
+    # adjacent windows do not overlap
+    assert profile.peak(now + timedelta(seconds=20), now + timedelta(seconds=30)) == (0, 0)
+
+    profile.discard(job_id)
+    assert profile.peak(now, now + timedelta(seconds=20)) == (3, 1000)
+
+
+def test_job_fits_next_to_sequential_jobs():
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2, vcpu_units=4)
+
+    first_job_id = submit_job(state, total_run_time=10000, vcpu_units=1)
+    second_job_id = uuid.uuid4()
+    JobsScheduler.add_job(state, JobModel(id=second_job_id, total_run_time=10000, vcpu_units=3, memory=128))
+    JobsScheduler._append_new_job_to_node(
+        state, node_id, second_job_id, 0, state["jobs"][first_job_id].expected_to_finish_at
+    )
+    JobsScheduler.refresh_threads_metadata(state, node_id)
+
+    # 1 (running) + 2 vCPU at most are used at the same time
+    job_id = submit_job(state, total_run_time=5000, vcpu_units=2)
+    assert state["jobs"][job_id].node_id == node_id
+    assert state["jobs"][job_id].node_thread_id == 1
@@ -0,0 +1,60 @@
+import json
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.database import init_state
+from app.scheduler_server import serve_gateway
+from app.schemas.jobs import CreateJobRequest
+from app.schemas.nodes import CreateNodeRequest
+from app.services.crud import jobs_service, nodes_service
+from app.services.gateway import LocalSchedulerGateway, RemoteSchedulerGateway
+from app.utils.enums.jobs import JobStatus
+from app.utils.rpc import RPCClient
+
+
+@pytest.fixture
+async def rpc_client(monkeypatch, tmp_path):
+    state = init_state()
+    monkeypatch.setattr(jobs_service, "state", state)
+    monkeypatch.setattr(nodes_service, "state", state)
+    path = str(tmp_path / "scheduler.sock")
+    server = await serve_gateway(path)
+    client = RPCClient(path)
+    monkeypatch.setattr("app.services.gateway.get_rpc_client", lambda: client)
+    yield client
+    await client.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_workers_share_the_scheduler_state(rpc_client):
+    node = CreateNodeRequest(max_concurrent_jobs=2, max_total_jobs=10, vcpu_units=10, memory=10000)
+    content, _ = await RemoteSchedulerGateway.provision_nodes([node])
+    node_id = UUID(json.loads(content)[0]["id"])
+
+    job = CreateJobRequest(total_run_time=60000, vcpu_units=1, memory=128)
+    content, _ = await RemoteSchedulerGateway.submit_jobs([job] * 3)
+    job_ids = [job["id"] for job in json.loads(content)]
+    assert await RemoteSchedulerGateway.terminate_job(job_ids[0]) == (b"", None)
+
+    # the results are passed through exactly as the owner of the state encodes them
+    for kwargs in ({}, {"limit": 2}, {"status": JobStatus.RUNNING, "ndjson": True}, {"node_id": node_id, "cursor": 1}):
+        assert await RemoteSchedulerGateway.get_jobs(**kwargs) == await LocalSchedulerGateway.get_jobs(**kwargs)
+    assert await RemoteSchedulerGateway.get_nodes() == await LocalSchedulerGateway.get_nodes()
+    content, _ = await RemoteSchedulerGateway.get_metrics()
+    assert b"scheduler_placement_seconds_count" in content
+
+
+async def test_errors_are_raised_on_the_worker(rpc_client):
+    with pytest.raises(HTTPException) as exc_info:
+        await RemoteSchedulerGateway.terminate_job(uuid4())
+    assert exc_info.value.status_code == 404
+
+    with pytest.raises(HTTPException) as exc_info:
+        await RemoteSchedulerGateway.get_jobs(status="unknown")
+    assert exc_info.value.status_code == 422
+
+    # the connection is still usable after the errors
+    assert await RemoteSchedulerGateway.get_jobs() == (b"[]", None)
@@ -0,0 +1,15 @@
+import json
+
+from app.database import init_state
+from app.schemas.jobs import Job, jobs_encoder
+from tests.utils import provision_node, submit_job
+
+
+def test_jobs_encoder_matches_job_schema():
+    state = init_state()
+    provision_node(state)
+    for total_run_time in (10000, 20000):
+        submit_job(state, total_run_time=total_run_time)
+
+    jobs = list(state["jobs"].values())
+    assert json.loads(jobs_encoder.dump_json(jobs)) == [json.loads(Job.from_obj(job).model_dump_json()) for job in jobs]
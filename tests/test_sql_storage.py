@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import init_state
+from app.schemas.jobs import CreateJobRequest
+from app.services.crud import (
+    jobs_service,
+    sql_jobs_service,
+    sql_nodes_service,
+    write_through_jobs_service,
+    write_through_nodes_service,
+)
+from app.services.jobs_scheduler import JobsScheduler
+from app.sql_database import create_tables, jobs_table, save_changes
+from app.utils.change_set import ChangeSet
+from app.utils.enums.jobs import JobStatus
+from tests.utils import provision_node, submit_job
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+    await create_tables(engine)
+    yield engine
+    await engine.dispose()
+
+
+async def restart(monkeypatch, engine):
+    restored_state = init_state()
+    monkeypatch.setattr(write_through_nodes_service, "state", restored_state)
+    monkeypatch.setattr(sql_nodes_service, "get_engine", lambda: engine)
+    await sql_nodes_service.SQLNodesService.load_state()
+    return restored_state
+
+
+async def test_state_is_restored_after_restart(monkeypatch, engine):
+    state = init_state()
+    state["changes"] = ChangeSet()
+    node_ids = [provision_node(state, max_concurrent_jobs=2) for _ in range(2)]
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(5)]
+    state["changes"].new_nodes.update(dict.fromkeys(node_ids))
+    state["changes"].new_jobs.update(dict.fromkeys(job_ids))
+    await save_changes(engine, state)
+
+    restored_state = await restart(monkeypatch, engine)
+
+    assert list(restored_state["nodes"]) == node_ids
+    for node_id in node_ids:
+        assert restored_state["nodes"][node_id].jobs == state["nodes"][node_id].jobs
+        for key in ("threads", "free_threads", "total_active_jobs", "best_fit_thread"):
+            assert restored_state["nodes"][node_id].metadata[key] == state["nodes"][node_id].metadata[key]
+    assert restored_state["jobs"] == state["jobs"]
+    assert list(restored_state["nodes_index"].busy_nodes()) == list(state["nodes_index"].busy_nodes())
+
+
+async def test_only_changed_jobs_are_written(monkeypatch, engine):
+    state = init_state()
+    state["changes"] = ChangeSet()
+    node_id = provision_node(state)
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(3)]
+    state["changes"].new_nodes[node_id] = None
+    state["changes"].new_jobs.update(dict.fromkeys(job_ids))
+    await save_changes(engine, state)
+
+    JobsScheduler.handle_job_termination(state, job_ids[1])
+    assert list(state["changes"].updated_jobs) == [job_ids[1], job_ids[2]]
+    await save_changes(engine, state)
+    assert not state["changes"]
+
+    async with engine.connect() as connection:
+        rows = (await connection.execute(select(jobs_table.c.id, jobs_table.c.status))).all()
+    assert dict(rows)[job_ids[1]] == JobStatus.TERMINATED.value
+
+    restored_state = await restart(monkeypatch, engine)
+    assert restored_state["nodes"][node_id].metadata["threads"] == [[job_ids[0], job_ids[2]]]
+    assert restored_state["jobs"][job_ids[2]] == state["jobs"][job_ids[2]]
+
+
+async def test_concurrent_submissions_are_written_in_order(monkeypatch, engine):
+    state = init_state()
+    state["changes"] = ChangeSet()
+    for module in (jobs_service, write_through_jobs_service):
+        monkeypatch.setattr(module, "state", state)
+    monkeypatch.setattr(sql_jobs_service, "get_engine", lambda: engine)
+    node_id = provision_node(state, max_total_jobs=20)
+    state["changes"].new_nodes[node_id] = None
+
+    job = CreateJobRequest(total_run_time=60000, vcpu_units=1, memory=128)
+    await asyncio.gather(*(sql_jobs_service.SQLJobsService.submit_jobs([job] * 2) for _ in range(5)))
+
+    restored_state = await restart(monkeypatch, engine)
+    assert restored_state["jobs"] == state["jobs"]
+    assert restored_state["nodes"][node_id].metadata["threads"] == state["nodes"][node_id].metadata["threads"]
@@ -0,0 +1,94 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import init_state, JobModel
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.sorted_list import SortedList
+from app.utils.thread_timeline import ThreadTimeline
+from tests.utils import provision_node, submit_job
+
+
+def test_neighbours_are_found_after_removals():
+    SortedList.LOAD, load = 2, SortedList.LOAD  # many buckets
+    try:
+        job_ids = [uuid.uuid4() for _ in range(20)]
+        thread = ThreadTimeline(job_ids)
+        for job_id in job_ids[5:15]:
+            thread.remove(job_id)
+    finally:
+        SortedList.LOAD = load
+
+    assert thread == job_ids[:5] + job_ids[15:]
+    assert thread.previous(job_ids[15]) == job_ids[4]
+    assert thread.previous(job_ids[0]) is None
+    assert list(thread.following(job_ids[4])) == job_ids[15:]
+    assert thread.last() == job_ids[-1]
+
+    thread.append(job_ids[10])
+    assert thread.pop() == job_ids[10]
+    assert job_ids[10] not in thread and len(thread) == 10
+
+
+def test_jobs_after_terminated_one_are_moved_up_lazily():
+    state = init_state()
+    node_id = provision_node(state)
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(5)]
+    initial_start = state["jobs"][job_ids[3]].expected_to_start_at
+
+    JobsScheduler.handle_job_termination(state, job_ids[1])
+
+    assert state["nodes"][node_id].metadata["threads"] == [[job_ids[0], *job_ids[2:]]]
+    # the jobs in the middle of the queue are not touched until they are read
+    assert state["jobs"][job_ids[3]].expected_to_start_at == initial_start
+    previous_job_id = job_ids[0]
+    for job_id in job_ids[2:]:
+        assert (
+            JobsScheduler.get_job(state, job_id).expected_to_start_at
+            == JobsScheduler.get_job(state, previous_job_id).expected_to_finish_at
+        )
+        previous_job_id = job_id
+    assert state["jobs"][job_ids[3]].expected_to_start_at == initial_start - timedelta(seconds=60)
+
+
+def test_shifts_apply_to_following_jobs_only():
+    job_ids = [uuid.uuid4() for _ in range(40)]
+    thread = ThreadTimeline(job_ids)
+    thread.shift(job_ids[10], timedelta(seconds=-5))
+    thread.shift(job_ids[20], timedelta(seconds=-3))
+    thread.append(added_job_id := uuid.uuid4())
+
+    now = datetime.now()
+    jobs = {job_id: JobModel(id=job_id, total_run_time=0, vcpu_units=1, memory=1) for job_id in thread}
+    for job in jobs.values():
+        job.expected_to_start_at = job.expected_to_finish_at = now
+        thread.materialize(job)
+
+    assert jobs[job_ids[9]].expected_to_start_at == now
+    assert jobs[job_ids[10]].expected_to_start_at == now - timedelta(seconds=5)
+    assert jobs[job_ids[39]].expected_to_finish_at == now - timedelta(seconds=8)
+    assert jobs[added_job_id].expected_to_start_at == now
+    assert thread.take_shifted() == job_ids[10:] + [added_job_id] and thread.take_shifted() == []
+
+
+def test_jobs_are_put_in_between_keeping_their_shifts():
+    job_ids = [uuid.uuid4() for _ in range(3)]
+    thread = ThreadTimeline(job_ids)
+    thread.shift(job_ids[1], timedelta(seconds=-5))
+    # many more jobs put right before the same one than there is room for between the positions
+    inserted_job_ids = [uuid.uuid4() for _ in range(40)]
+    for job_id in inserted_job_ids:
+        thread.insert_before(job_ids[1], job_id)
+    thread.shift(job_ids[2], timedelta(seconds=-3))
+
+    assert thread == [job_ids[0], *inserted_job_ids, *job_ids[1:]]
+    assert thread.previous(job_ids[1]) == inserted_job_ids[-1]
+
+    now = datetime.now()
+    jobs = {job_id: JobModel(id=job_id, total_run_time=0, vcpu_units=1, memory=1) for job_id in thread}
+    for job in jobs.values():
+        job.expected_to_start_at = job.expected_to_finish_at = now
+        thread.materialize(job)
+
+    assert all(jobs[job_id].expected_to_start_at == now for job_id in [job_ids[0], *inserted_job_ids])
+    assert jobs[job_ids[1]].expected_to_start_at == now - timedelta(seconds=5)
+    assert jobs[job_ids[2]].expected_to_start_at == now - timedelta(seconds=8)
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import get_settings
+from app.database import init_state
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.custom_exceptions import NoAvailableNodesLeftException
+from app.utils.enums.jobs import JobStatus
+from tests.test_batch_scheduling import create_jobs
+from tests.utils import provision_node, submit_job
+
+settings = get_settings()
+
+
+def test_failed_batch_is_rolled_back():
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2, vcpu_units=4)
+    provision_node(state, vcpu_units=1, memory=64000)
+    job_id = submit_job(state, total_run_time=10000, vcpu_units=2)
+    node_entity = state["nodes"][node_id]
+    metadata_before = {
+        key: node_entity.metadata[key] for key in ("free_threads", "total_active_jobs", "best_fit_thread")
+    }
+
+    job_ids = create_jobs(state, 1, vcpu_units=2) + create_jobs(state, 1, vcpu_units=4, memory=20000)
+    with pytest.raises(NoAvailableNodesLeftException):
+        with JobsScheduler.transaction(state):
+            JobsScheduler.schedule_jobs(state, job_ids)
+
+    assert node_entity.jobs == [job_id]
+    assert node_entity.metadata["threads"] == [[job_id], []]
+    assert {key: node_entity.metadata[key] for key in metadata_before} == metadata_before
+    assert all(state["jobs"][job_id].node_id is None for job_id in job_ids)
+    now = datetime.now()
+    assert node_entity.metadata["resources"].peak(now, now + timedelta(seconds=20)) == (2, 128)
+    assert node_id in list(state["nodes_index"].free_nodes())
+    assert state["undo_log"] is None
+
+
+def test_moved_jobs_are_restored_on_rollback():
+    state = init_state()
+    node_id = provision_node(state, max_concurrent_jobs=2, vcpu_units=4, memory=64000)
+    other_node_id = provision_node(state, vcpu_units=2, memory=1000)
+    provision_node(state, vcpu_units=1, memory=64000)
+    job_ids = [
+        submit_job(state, total_run_time=10000, vcpu_units=1),
+        submit_job(state, total_run_time=10000, vcpu_units=2, memory=20000),
+    ]
+    placement_before = {
+        job_id: (job.node_id, job.node_thread_id, job.status, job.expected_to_start_at)
+        for job_id, job in state["jobs"].items()
+    }
+
+    # the first job fits into the other node, while the second one does not fit anywhere
+    state["nodes_index"].discard(node_id)
+    with pytest.raises(NoAvailableNodesLeftException):
+        with JobsScheduler.transaction(state):
+            JobsScheduler.schedule_jobs(state, job_ids)
+
+    placement_after = {
+        job_id: (job.node_id, job.node_thread_id, job.status, job.expected_to_start_at)
+        for job_id, job in state["jobs"].items()
+    }
+    assert placement_after == placement_before
+    assert state["nodes"][other_node_id].jobs == []
+    assert state["nodes"][other_node_id].metadata["threads"] == [[]]
+
+
+@pytest.mark.parametrize("backfill", [False, True])
+def test_termination_is_rolled_back(monkeypatch, backfill):
+    monkeypatch.setattr(settings, "SCHEDULER_BACKFILL", backfill)
+    state = init_state()
+    node_id = provision_node(state, vcpu_units=4)
+    job_ids = [submit_job(state, total_run_time=10000) for _ in range(3)]
+    node_entity = state["nodes"][node_id]
+
+    def snapshot():
+        now = datetime.now()
+        return (
+            list(node_entity.metadata["threads"][0]),
+            {key: node_entity.metadata[key] for key in ("free_threads", "total_active_jobs", "best_fit_thread")},
+            [
+                (job.status, job.expected_to_start_at, job.expected_to_finish_at)
+                for job in (JobsScheduler.get_job(state, job_id) for job_id in job_ids)
+            ],
+            node_entity.metadata["resources"].peak(now + timedelta(seconds=5), now + timedelta(seconds=15)),
+            state["jobs_index"].count(JobStatus.TERMINATED),
+            len(state["finished_jobs"]),
+            len(state["gaps"]),
+        )
+
+    # the running job and the queued one, with the jobs after them moved up (or a gap left)
+    for job_id in job_ids[:2]:
+        before = snapshot()
+        with JobsScheduler.transaction(state, dry_run=True):
+            JobsScheduler.handle_job_termination(state, job_id)
+            assert state["jobs"][job_id].status == JobStatus.TERMINATED
+        assert snapshot() == before
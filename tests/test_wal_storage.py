@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from app.database import init_state
+from app.schemas.jobs import CreateJobRequest
+from app.schemas.nodes import CreateNodeRequest
+from app.services.crud import (
+    jobs_service,
+    nodes_service,
+    wal_jobs_service,
+    wal_nodes_service,
+    write_through_jobs_service,
+    write_through_nodes_service,
+)
+from app.services.jobs_scheduler import JobsScheduler
+from app.utils.change_set import ChangeSet
+from app.utils.enums.jobs import JobStatus
+from app.wal_database import save_changes, WriteAheadLog
+from tests.utils import provision_node, submit_job
+
+JOB = CreateJobRequest(total_run_time=60000, vcpu_units=1, memory=128)
+NODE = CreateNodeRequest(max_concurrent_jobs=2, max_total_jobs=10, vcpu_units=10, memory=10000)
+
+
+@pytest.fixture
+def wal(tmp_path):
+    wal = WriteAheadLog(tmp_path, fsync=False)
+    wal.recover()
+    yield wal
+    wal.close()
+
+
+@pytest.fixture
+def services(monkeypatch, wal):
+    """
+    The WAL services working on a fresh state, which is returned.
+    """
+    state = init_state()
+    state["changes"] = ChangeSet()
+    for module in (
+        jobs_service,
+        nodes_service,
+        write_through_jobs_service,
+        write_through_nodes_service,
+        wal_nodes_service,
+    ):
+        monkeypatch.setattr(module, "state", state)
+    for module in (wal_jobs_service, wal_nodes_service):
+        monkeypatch.setattr(module, "get_wal", lambda: wal)
+    return state
+
+
+async def restart(monkeypatch, directory):
+    restored_state = init_state()
+    restored_wal = WriteAheadLog(directory, fsync=False)
+    monkeypatch.setattr(write_through_nodes_service, "state", restored_state)
+    monkeypatch.setattr(wal_nodes_service, "get_wal", lambda: restored_wal)
+    await wal_nodes_service.WALNodesService.load_state()
+    restored_wal.close()
+    return restored_state
+
+
+def assert_restored(restored_state, state):
+    assert list(restored_state["nodes"]) == list(state["nodes"])
+    for node_id, node_entity in state["nodes"].items():
+        # restored in order of the start, not of the placement (the moved jobs go last)
+        assert set(restored_state["nodes"][node_id].jobs) == set(node_entity.jobs)
+        for key in ("threads", "free_threads", "total_active_jobs", "best_fit_thread"):
+            assert restored_state["nodes"][node_id].metadata[key] == node_entity.metadata[key]
+    active_jobs = {
+        job_id: JobsScheduler.get_job(state, job_id)
+        for job_id, job_entity in state["jobs"].items()
+        if job_entity.status in (JobStatus.SCHEDULED, JobStatus.RUNNING)
+    }
+    assert restored_state["jobs"] == active_jobs
+    assert list(restored_state["nodes_index"].busy_nodes()) == list(state["nodes_index"].busy_nodes())
+
+
+async def test_state_is_restored_from_the_log(monkeypatch, tmp_path, wal):
+    state = init_state()
+    state["changes"] = ChangeSet()
+    node_ids = [provision_node(state, max_concurrent_jobs=2) for _ in range(2)]
+    job_ids = [submit_job(state, total_run_time=60000) for _ in range(5)]
+    state["changes"].new_nodes.update(dict.fromkeys(node_ids))
+    state["changes"].new_jobs.update(dict.fromkeys(job_ids))
+    await save_changes(wal, state)
+    assert not state["changes"]
+
+    assert_restored(await restart(monkeypatch, tmp_path), state)
+
+
+async def test_state_is_restored_from_the_snapshot_and_the_log_tail(monkeypatch, tmp_path, services):
+    node_entities = await wal_nodes_service.WALNodesService.provision_nodes([NODE] * 3)
+    job_entities = await wal_jobs_service.WALJobsService.submit_jobs([JOB] * 12)
+    await wal_nodes_service.WALNodesService.snapshot_state()
+    assert [path.name for path in sorted(tmp_path.iterdir())] == [
+        "snapshot-00000000000000000001.bin",
+        "wal-00000000000000000002.log",
+    ]
+
+    # the changes of the jobs in the snapshot are taken from the log
+    await wal_jobs_service.WALJobsService.terminate_job(job_entities[0].id)
+    await wal_jobs_service.WALJobsService.submit_jobs([JOB] * 2)
+    await wal_nodes_service.WALNodesService.remove_node(node_entities[0].id)
+
+    restored_state = await restart(monkeypatch, tmp_path)
+    assert_restored(restored_state, services)
+    assert job_entities[0].id not in restored_state["jobs"]
+    assert node_entities[0].id not in restored_state["nodes"]
+
+
+async def test_torn_record_is_skipped(monkeypatch, tmp_path, services):
+    await wal_nodes_service.WALNodesService.provision_nodes([NODE])
+    await wal_jobs_service.WALJobsService.submit_jobs([JOB] * 3)
+    with open(tmp_path / "wal-00000000000000000001.log", "ab") as file:
+        file.write(b"\x40\x00\x00\x00torn")  # the header of a record cut short by a crash
+
+    restored_state = await restart(monkeypatch, tmp_path)
+    assert_restored(restored_state, services)
+    # the records after the restart go to a new segment
+    assert (tmp_path / "wal-00000000000000000002.log").exists()
+
+
+async def test_concurrent_submissions_are_written_in_order(monkeypatch, tmp_path, services):
+    await wal_nodes_service.WALNodesService.provision_nodes([NODE.model_copy(update={"max_total_jobs": 20})])
+    await asyncio.gather(*(wal_jobs_service.WALJobsService.submit_jobs([JOB] * 2) for _ in range(5)))
+
+    assert_restored(await restart(monkeypatch, tmp_path), services)
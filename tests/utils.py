@@ -0,0 +1,28 @@
+import uuid
+
+from app.database import JobModel, NodeModel
+from app.services.jobs_scheduler import JobsScheduler
+
+
+def provision_node(state, max_concurrent_jobs=1, max_total_jobs=10, vcpu_units=10, memory=10000):
+    node_id = uuid.uuid4()
+    state["nodes"][node_id] = NodeModel(
+        id=node_id,
+        max_concurrent_jobs=max_concurrent_jobs,
+        max_total_jobs=max_total_jobs,
+        vcpu_units=vcpu_units,
+        memory=memory,
+        jobs=[],
+        metadata=JobsScheduler.init_node_metadata(max_concurrent_jobs),
+    )
+    JobsScheduler.refresh_threads_metadata(state, node_id)
+    return node_id
+
+
+def submit_job(state, total_run_time, vcpu_units=1, memory=128):
+    job_id = uuid.uuid4()
+    JobsScheduler.add_job(
+        state, JobModel(id=job_id, total_run_time=total_run_time, vcpu_units=vcpu_units, memory=memory)
+    )
+    JobsScheduler.schedule_job(state, job_id)
+    return job_id